@@ -0,0 +1,113 @@
+"""
+Candle ingest benchmark.
+
+Compares rows/sec of `CandleRepository.add` for the executemany INSERT path
+and the COPY path, and reports on-disk bytes per inserted row (heap, TOAST and
+indexes of all candle partitions). Requires a database with applied migrations.
+
+Usage:
+
+    python -m app.benchmarks.candle_ingest --rows 100000
+
+Bytes/row is only meaningful on a freshly vacuumed table and one mode per
+run, otherwise rows land in pages left over from earlier runs:
+
+    python -m app.benchmarks.candle_ingest --rows 100000 --runs 1 --mode copy
+"""
+
+import asyncio
+from datetime import timedelta
+from time import perf_counter
+from uuid import uuid4
+
+import typer
+from sqlalchemy import text
+
+from app.core.date_time import Timestamp
+from app.core.entities import Candle, Security, Timeframe
+from app.dependency.prod import Container
+from app.repository.sa_repository import CandleRepository
+from app.repository.sa_repository.metadata import candle_table
+
+dependencies = Container()
+
+# pg_total_relation_size() of a partitioned table is 0, sum up the partitions.
+CANDLE_SIZE_QUERY = text(
+    "SELECT coalesce(sum(pg_total_relation_size(inhrelid)), 0) "
+    "FROM pg_inherits WHERE inhparent = 'candle'::regclass"
+)
+
+MODES = {
+    "insert": float("inf"),
+    "copy": 0,
+}
+
+
+def generate_candles(security: Security, n_rows: int) -> list[Candle]:
+    t = Timestamp("2020-01-01 10:00:00+03:00")
+    return [
+        Candle(
+            security=security,
+            timeframe=Timeframe.M1,
+            timestamp=Timestamp(t.dt + timedelta(minutes=i)),
+            open=100,
+            high=101.0,
+            low=99.9,
+            close=100.25,
+        )
+        for i in range(n_rows)
+    ]
+
+
+async def benchmark(mode: str, n_rows: int) -> tuple[float, float]:
+    """Insert `n_rows` fresh candles, return rows/sec and bytes/row."""
+    security = Security(ticker=uuid4().hex, board=uuid4().hex)
+    candles = generate_candles(security, n_rows)
+    async with dependencies.get_repos() as elements:
+        uow, security_repo, candle_repo, _ = elements
+        candle_repo: CandleRepository
+        candle_repo.copy_threshold = MODES[mode]
+        async with uow:
+            await security_repo.add([security])
+            size_before = (await uow.connection.execute(CANDLE_SIZE_QUERY)).scalar()
+
+        started = perf_counter()
+        async with uow:
+            await candle_repo.add(candles)
+        elapsed = perf_counter() - started
+
+        async with uow:
+            size_after = (await uow.connection.execute(CANDLE_SIZE_QUERY)).scalar()
+
+            await uow.connection.execute(
+                candle_table.delete().where(
+                    candle_table.c["security_id"] == security.id
+                )
+            )
+            await security_repo.remove([security])
+    return n_rows / elapsed, (size_after - size_before) / n_rows
+
+
+async def run(n_rows: int, n_runs: int, modes: list[str]) -> None:
+    try:
+        for mode in modes:
+            results = [await benchmark(mode, n_rows) for _ in range(n_runs)]
+            speed = [r[0] for r in results]
+            size = [r[1] for r in results]
+            print(
+                f"{mode:>6}: {n_rows} rows, "
+                f"best {max(speed):,.0f} rows/sec, "
+                f"mean {sum(speed) / len(speed):,.0f} rows/sec, "
+                f"{sum(size) / len(size):,.1f} bytes/row"
+            )
+    finally:
+        await dependencies.dispose()
+
+
+def main(rows: int = 100_000, runs: int = 3, mode: list[str] = list(MODES)):
+    """Run candle ingest benchmark."""
+    asyncio.run(run(rows, runs, mode))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,144 @@
+"""
+ISS adapter throughput benchmark.
+
+Runs `MarketDataAdapter` against the local ISS stand-in server and reports
+pages/sec, candles/sec and adapter CPU time per candle. The server runs in a
+child process, so CPU time is spent by the adapter only. No network access is
+needed.
+
+Usage:
+
+    python -m app.benchmarks.iss_adapter --securities 20 --days 30
+
+Compare prefetch windows on a slow server:
+
+    python -m app.benchmarks.iss_adapter --latency 0.05 --prefetch 1 --prefetch 4
+"""
+
+import asyncio
+import multiprocessing
+import socket
+from time import perf_counter, process_time
+
+import aiohttp
+import typer
+from aiohttp import web
+
+import app.market_data_adapter.constants as constants
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
+from app.market_data_adapter import (
+    AdaptiveRateLimiter,
+    MarketDataAdapter,
+    MarketDataRequest,
+    create_session,
+)
+from app.market_data_adapter.iss_server import IssServer, IssServerConfig
+
+
+def serve(config: IssServerConfig, port: int) -> None:
+    web.run_app(
+        IssServer(config).create_app(),
+        host="localhost",
+        port=port,
+        print=None,
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+async def wait_for_server(api: str) -> None:
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(api):
+                    return
+            except aiohttp.ClientConnectionError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"ISS stand-in server did not start at {api}")
+
+
+async def benchmark(
+    api: str,
+    requests: list[MarketDataRequest],
+    rate: float,
+) -> tuple[int, int, float, float]:
+    """Load all requests at once, return pages, candles, wall and CPU time."""
+    rate_limiter = AdaptiveRateLimiter(
+        rate=rate, min_rate=rate, max_rate=rate, burst=rate
+    )
+    async with create_session() as session:
+        adapter = MarketDataAdapter(session=session, rate_limiter=rate_limiter, api=api)
+        started, cpu_started = perf_counter(), process_time()
+        results = await asyncio.gather(*[adapter.load(r) for r in requests])
+        elapsed, cpu = perf_counter() - started, process_time() - cpu_started
+    candles = sum(len(r) for r in results)
+    return rate_limiter.metrics.requests, candles, elapsed, cpu
+
+
+async def run(
+    api: str,
+    requests: list[MarketDataRequest],
+    prefetch: list[int],
+    n_runs: int,
+    rate: float,
+) -> None:
+    await wait_for_server(api)
+    for window in prefetch:
+        constants.PREFETCH_PAGES = window
+        results = [await benchmark(api, requests, rate) for _ in range(n_runs)]
+        pages, candles = results[0][0], results[0][1]
+        elapsed = min(r[2] for r in results)
+        cpu = min(r[3] for r in results)
+        print(
+            f"prefetch {window:>2}: {pages} pages, {candles} candles, "
+            f"{pages / elapsed:,.1f} pages/sec, "
+            f"{candles / elapsed:,.0f} candles/sec, "
+            f"{cpu / candles * 1e6:,.2f} CPU us/candle"
+        )
+
+
+def main(
+    securities: int = 10,
+    days: int = 30,
+    timeframe: Timeframe = Timeframe.M1,
+    prefetch: list[int] = [constants.PREFETCH_PAGES],
+    runs: int = 3,
+    rate: float = 1000.0,
+    latency: float = 0.0,
+    page_size: int = constants.PAGE_SIZE,
+    error_rate: float = 0.0,
+):
+    """Run ISS adapter benchmark."""
+    constants.PAGE_SIZE = page_size
+    config = IssServerConfig(
+        page_size=page_size,
+        latency=latency,
+        error_rate=error_rate,
+    )
+    port = free_port()
+    server = multiprocessing.Process(target=serve, args=(config, port), daemon=True)
+    server.start()
+    time_till = Timestamp("2025-06-30")
+    requests = [
+        MarketDataRequest(
+            security=Security(ticker=f"T{i:03d}", board="TQBR"),
+            timeframe=timeframe,
+            time_from=time_till - (days - 1),
+            time_till=time_till,
+        )
+        for i in range(securities)
+    ]
+    try:
+        asyncio.run(run(f"http://localhost:{port}", requests, prefetch, runs, rate))
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,87 @@
+"""Columnar candle data."""
+
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from pytz import timezone
+
+from app.core.date_time import Timestamp
+from app.core.entities import CandleData, Security, Timeframe
+
+
+@dataclass
+class CandleColumns:
+    """Candles as columns: epoch seconds and OHLC prices."""
+
+    timestamp: array = field(default_factory=lambda: array("q"))
+    open: array = field(default_factory=lambda: array("d"))
+    high: array = field(default_factory=lambda: array("d"))
+    low: array = field(default_factory=lambda: array("d"))
+    close: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def extend(self, other: "CandleColumns") -> None:
+        self.timestamp.extend(other.timestamp)
+        self.open.extend(other.open)
+        self.high.extend(other.high)
+        self.low.extend(other.low)
+        self.close.extend(other.close)
+
+    def unique(self) -> "CandleColumns":
+        """Return columns sorted by timestamp, without duplicate timestamps."""
+        index = {t: i for i, t in enumerate(self.timestamp)}
+        return self._take([index[t] for t in sorted(index)])
+
+    def filter(self, keep: Callable[[int], bool]) -> "CandleColumns":
+        """Return candles whose epoch timestamp satisfies `keep`."""
+        return self._take([i for i, t in enumerate(self.timestamp) if keep(t)])
+
+    def _take(self, order: list[int]) -> "CandleColumns":
+        return CandleColumns(
+            timestamp=array("q", [self.timestamp[i] for i in order]),
+            open=array("d", [self.open[i] for i in order]),
+            high=array("d", [self.high[i] for i in order]),
+            low=array("d", [self.low[i] for i in order]),
+            close=array("d", [self.close[i] for i in order]),
+        )
+
+    @staticmethod
+    def from_candles(candles: list[CandleData]) -> "CandleColumns":
+        return CandleColumns(
+            timestamp=array("q", [int(c.timestamp.dt.timestamp()) for c in candles]),
+            open=array("d", [c.open for c in candles]),
+            high=array("d", [c.high for c in candles]),
+            low=array("d", [c.low for c in candles]),
+            close=array("d", [c.close for c in candles]),
+        )
+
+    def to_candles(
+        self,
+        security: Security,
+        timeframe: Timeframe,
+        tz: str,
+    ) -> list[CandleData]:
+        """
+        Build entities, timestamps are converted to `tz`.
+
+        For API and JSON consumers, the loader stores columns as they are.
+        """
+        tzinfo = timezone(tz)
+        return [
+            CandleData(
+                security=security,
+                timeframe=timeframe,
+                timestamp=Timestamp(datetime.fromtimestamp(t, tzinfo)),
+                open=o,
+                high=h,
+                low=lo,
+                close=c,
+            )
+            for t, o, h, lo, c in zip(
+                self.timestamp, self.open, self.high, self.low, self.close
+            )
+        ]
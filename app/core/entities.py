@@ -1,9 +1,12 @@
 from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
-from uuid import UUID, uuid4
+from uuid import UUID, uuid4, uuid5
 
 from app.core.date_time import Timestamp
 
+CANDLE_ID_NAMESPACE = UUID("be2ffe89-ae02-4488-9899-d7ded1a93680")
+
 
 class Timeframe(str, Enum):
 
@@ -43,7 +46,19 @@ class CandleData:
 
 @dataclass(frozen=True)
 class Candle(Entity, CandleData):
-    pass
+    # Candles are stored by natural key (security, timeframe, timestamp),
+    # the id is derived from it unless given explicitly.
+    id: UUID | None = None
+
+    def __post_init__(self):
+        if self.id is None:
+            object.__setattr__(self, "id", self._derive_id())
+
+    def _derive_id(self) -> UUID:
+        dt = self.timestamp.dt
+        moment = int(dt.timestamp()) if isinstance(dt, datetime) else dt.isoformat()
+        name = f"{self.security.id}/{self.timeframe.value}/{moment}"
+        return uuid5(CANDLE_ID_NAMESPACE, name)
 
 
 @dataclass(frozen=True)
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 
+from app.core.candle_columns import CandleColumns
 from app.core.date_time import Timestamp
 from app.core.entities import CandleData, Security, Timeframe
 
@@ -17,6 +19,15 @@ class MarketDataRequest:
     time_till: Timestamp
 
 
+@dataclass
+class CandleBorders:
+    """Dates of the first and the last candle available for a timeframe."""
+
+    timeframe: Timeframe
+    time_from: Timestamp
+    time_till: Timestamp
+
+
 class IMarketDataAdapter(ABC):
 
     @abstractmethod
@@ -26,3 +37,21 @@ class IMarketDataAdapter(ABC):
     @abstractmethod
     async def load(self, request: MarketDataRequest) -> list[CandleData]:
         pass
+
+    @abstractmethod
+    def stream(self, request: MarketDataRequest) -> AsyncIterator[CandleColumns]:
+        """Yield pages of candles as columns."""
+        pass
+
+    @abstractmethod
+    async def load_candle_borders(self, security: Security) -> list[CandleBorders]:
+        pass
+
+    @abstractmethod
+    async def load_trading_days(
+        self,
+        security: Security,
+        time_from: Timestamp,
+        time_till: Timestamp,
+    ) -> list[Timestamp]:
+        pass
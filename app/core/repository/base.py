@@ -17,10 +17,17 @@ class IRepository(ABC):
     async def __anext__(self) -> Entity:
         raise NotImplementedError
 
+    async def aclose(self) -> None:
+        """Release resources of an iteration stopped early."""
+
     @abstractmethod
     def __getitem__(self, s: slice) -> "IRepository":
         raise NotImplementedError
 
+    @abstractmethod
+    def stream(self, yield_per: int = 1000) -> "IRepository":
+        raise NotImplementedError
+
     @abstractmethod
     async def add(self, items: list[Entity]) -> None:
         pass
@@ -28,3 +35,7 @@ class IRepository(ABC):
     @abstractmethod
     async def remove(self, items: list[Entity]) -> None:
         pass
+
+    @abstractmethod
+    async def remove_all(self) -> None:
+        pass
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 
+from app.core.candle_columns import CandleColumns
 from app.core.date_time import Timestamp
 from app.core.entities import Candle, Security, Timeframe
 from app.core.repository.base import IRepository
@@ -23,6 +24,10 @@ class ICandleRepository(IRepository, ABC):
     def filter_by_timestamp_gte(self, timestamp: Timestamp) -> "ICandleRepository":
         raise NotImplementedError
 
+    @abstractmethod
+    def filter_by_timestamp_gt(self, timestamp: Timestamp) -> "ICandleRepository":
+        raise NotImplementedError
+
     @abstractmethod
     def filter_by_timestamp_lte(self, timestamp: Timestamp) -> "ICandleRepository":
         raise NotImplementedError
@@ -30,3 +35,30 @@ class ICandleRepository(IRepository, ABC):
     @abstractmethod
     def filter_by_timeframe(self, timeframe: Timeframe) -> "ICandleRepository":
         raise NotImplementedError
+
+    @abstractmethod
+    async def add_columns(
+        self,
+        security: Security,
+        timeframe: Timeframe,
+        columns: CandleColumns,
+    ) -> None:
+        """Store candles given as columns, without building entities."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def latest(self) -> Candle | None:
+        """Return the candle with the greatest timestamp, None if there are none."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def resample(
+        self,
+        security: Security,
+        source: Timeframe,
+        target: Timeframe,
+        time_from: Timestamp,
+        time_till: Timestamp,
+    ) -> None:
+        """Store `target` bars built from `source` candles of [time_from, time_till)."""
+        raise NotImplementedError
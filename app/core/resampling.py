@@ -0,0 +1,46 @@
+"""OHLC resampling."""
+
+from datetime import datetime
+
+from app.core.date_time import Timestamp
+from app.core.entities import Candle, CandleData, Security, Timeframe
+
+TIMEFRAME_MINUTES = {
+    Timeframe.M1: 1,
+    Timeframe.M10: 10,
+    Timeframe.H1: 60,
+}
+
+
+def bar_start(timestamp: Timestamp, timeframe: Timeframe) -> Timestamp:
+    """Return start of the `timeframe` bar containing `timestamp`."""
+    dt = timestamp.dt
+    stride = TIMEFRAME_MINUTES[timeframe] * 60
+    epoch = int(dt.timestamp())
+    return Timestamp(datetime.fromtimestamp(epoch - epoch % stride, dt.tzinfo))
+
+
+def resample(candles: list[CandleData], timeframe: Timeframe) -> list[Candle]:
+    """
+    Aggregate candles into bars of `timeframe`.
+
+    Bars are aligned to multiples of the bar length since the epoch, as with
+    `date_bin` in SQL. Moscow time is a whole number of hours off UTC, so the
+    bars match ISS bars.
+    """
+    bars: dict[tuple[Security, Timestamp], list[CandleData]] = {}
+    for candle in sorted(candles, key=lambda c: c.timestamp.dt):
+        key = (candle.security, bar_start(candle.timestamp, timeframe))
+        bars.setdefault(key, []).append(candle)
+    return [
+        Candle(
+            security=security,
+            timeframe=timeframe,
+            timestamp=start,
+            open=group[0].open,
+            high=max(c.high for c in group),
+            low=min(c.low for c in group),
+            close=group[-1].close,
+        )
+        for (security, start), group in bars.items()
+    ]
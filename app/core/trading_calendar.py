@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
+
+
+class ITradingCalendar(ABC):
+
+    @abstractmethod
+    async def trading_days(
+        self,
+        security: Security,
+        timeframe: Timeframe,
+        time_from: Timestamp,
+        time_till: Timestamp,
+    ) -> list[Timestamp]:
+        """Return sorted days of the period which have candles of `timeframe`."""
+        pass
@@ -15,6 +15,7 @@ from app.core.repository import (
 from app.core.unit_of_work import IUnitOfWork
 from app.use_cases.create_security import CreateSecurity
 from app.use_cases.load_candles import LoadCandles
+from app.use_cases.verify_resampling import VerifyResampling
 
 
 class IContainer(ABC):
@@ -76,3 +77,10 @@ class IContainer(ABC):
     @abstractmethod
     async def get_create_security_use_case(self) -> AsyncGenerator[CreateSecurity]:
         raise NotImplementedError
+
+    @asynccontextmanager
+    @abstractmethod
+    async def get_verify_resampling_use_case(
+        self,
+    ) -> AsyncGenerator[VerifyResampling]:
+        raise NotImplementedError
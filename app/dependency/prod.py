@@ -1,11 +1,14 @@
 """Dependency resolution."""
 
+import asyncio
 from contextlib import asynccontextmanager
 from os import environ
 from typing import AsyncGenerator
 
+from aiohttp import ClientSession
 from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
 
+import app.market_data_adapter.constants as constants
 from app.core.logger import ILogger
 from app.core.market_data_adapter import IMarketDataAdapter
 from app.core.market_data_loader import IMarketDataLoader
@@ -17,8 +20,14 @@ from app.core.repository import (
 from app.core.unit_of_work import IUnitOfWork
 from app.dependency.container import IContainer
 from app.logger.logger import StructLogger
-from app.market_data_adapter import MarketDataAdapter
-from app.market_data_loader import MarketDataLoader
+from app.market_data_adapter import (
+    AdaptiveRateLimiter,
+    MarketDataAdapter,
+    PageCache,
+    create_session,
+)
+from app.market_data_loader import MarketDataLoader, TradingCalendar
+from app.market_data_loader.constants import MAX_CONCURRENT_SHARDS
 from app.repository.sa_repository import (
     UOW,
     CandleRepository,
@@ -27,31 +36,175 @@ from app.repository.sa_repository import (
 )
 from app.use_cases.create_security import CreateSecurity
 from app.use_cases.load_candles import LoadCandles
+from app.use_cases.verify_resampling import VerifyResampling
 
 
 class Container(IContainer):
 
+    _engine: AsyncEngine | None = None
+    _read_engine: AsyncEngine | None = None
+    _http_session: ClientSession | None = None
+    _rate_limiter: AdaptiveRateLimiter | None = None
+    _page_cache: PageCache | None = None
+    _market_data_adapter: MarketDataAdapter | None = None
+    _fetch_semaphore: asyncio.Semaphore | None = None
+    _trading_calendar: TradingCalendar | None = None
+
     def get_logger(self) -> ILogger:
         logger = StructLogger()
         logger.bind(app="candles-app")
         return logger
 
-    @asynccontextmanager
-    async def get_connection(self) -> AsyncGenerator[AsyncConnection]:
-        url = "{drivername}://{username}:{password}@{host}:{port}/{database}".format(
+    def get_engine(self) -> AsyncEngine:
+        """Return process-wide engine of the primary, create it on first call."""
+        if Container._engine is None:
+            Container._engine = self._create_engine(
+                host=environ.get("PG_HOST"),
+                port=environ.get("PG_PORT"),
+            )
+        return Container._engine
+
+    def get_read_engine(self) -> AsyncEngine:
+        """
+        Return process-wide engine of the read replica.
+
+        Falls back to the primary engine if PG_READ_HOST is not set.
+        """
+        if not environ.get("PG_READ_HOST"):
+            return self.get_engine()
+        if Container._read_engine is None:
+            Container._read_engine = self._create_engine(
+                host=environ.get("PG_READ_HOST"),
+                port=environ.get("PG_READ_PORT") or environ.get("PG_PORT"),
+            )
+        return Container._read_engine
+
+    def get_pool_status(self) -> dict[str, int]:
+        """Return connection pool statistics, replica pool keys are prefixed."""
+        status = {}
+        if Container._engine is not None:
+            status |= self._get_pool_status(Container._engine, prefix="")
+        if Container._read_engine is not None:
+            status |= self._get_pool_status(Container._read_engine, prefix="read_")
+        return status
+
+    def get_http_session(self) -> ClientSession:
+        """Return process-wide HTTP session, create it on first call."""
+        if Container._http_session is None:
+            Container._http_session = create_session()
+        return Container._http_session
+
+    def get_rate_limiter(self) -> AdaptiveRateLimiter:
+        """Return process-wide ISS rate limiter, create it on first call."""
+        if Container._rate_limiter is None:
+            Container._rate_limiter = AdaptiveRateLimiter()
+        return Container._rate_limiter
+
+    def get_page_cache(self) -> PageCache | None:
+        """Return process-wide ISS page cache if enabled by ISS_CACHE_MODE."""
+        mode = environ.get("ISS_CACHE_MODE") or "off"
+        if mode == "off":
+            return None
+        if Container._page_cache is None:
+            Container._page_cache = PageCache(
+                directory=environ.get("ISS_CACHE_DIR"),
+                max_bytes=int(
+                    environ.get("ISS_CACHE_MAX_BYTES") or constants.ISS_CACHE_MAX_BYTES
+                ),
+                mode=mode,
+            )
+        return Container._page_cache
+
+    def _get_market_data_adapter(self) -> MarketDataAdapter:
+        """Return process-wide adapter, it is safe for concurrent use."""
+        if Container._market_data_adapter is None:
+            Container._market_data_adapter = MarketDataAdapter(
+                session=self.get_http_session(),
+                rate_limiter=self.get_rate_limiter(),
+                page_cache=self.get_page_cache(),
+                api=environ.get("ISS_API") or None,
+            )
+        return Container._market_data_adapter
+
+    def _get_fetch_semaphore(self) -> asyncio.Semaphore:
+        """Return process-wide limit of shards fetched by market data loaders."""
+        if Container._fetch_semaphore is None:
+            Container._fetch_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SHARDS)
+        return Container._fetch_semaphore
+
+    def _get_trading_calendar(self) -> TradingCalendar:
+        """Return process-wide trading calendar, create it on first call."""
+        if Container._trading_calendar is None:
+            Container._trading_calendar = TradingCalendar(
+                self._get_market_data_adapter()
+            )
+        return Container._trading_calendar
+
+    def get_rate_limiter_status(self) -> dict[str, float]:
+        """Return ISS request metrics."""
+        if Container._rate_limiter is None:
+            return {}
+        return Container._rate_limiter.status()
+
+    async def dispose(self) -> None:
+        """Close pooled connections, to be called on process shutdown."""
+        if Container._http_session is not None:
+            await Container._http_session.close()
+            Container._http_session = None
+        Container._rate_limiter = None
+        Container._market_data_adapter = None
+        Container._fetch_semaphore = None
+        Container._trading_calendar = None
+        if Container._engine is None and Container._read_engine is None:
+            return
+        self.get_logger().info("db_pool_dispose", **self.get_pool_status())
+        for engine in [Container._engine, Container._read_engine]:
+            if engine is not None:
+                await engine.dispose()
+        Container._engine = None
+        Container._read_engine = None
+
+    def _create_engine(self, host: str, port: str) -> AsyncEngine:
+        return create_async_engine(
+            self._get_database_url(host, port),
+            echo=False,
+            pool_size=int(environ.get("PG_POOL_SIZE", 5)),
+            max_overflow=int(environ.get("PG_POOL_MAX_OVERFLOW", 10)),
+            pool_timeout=float(environ.get("PG_POOL_TIMEOUT", 30)),
+            pool_recycle=int(environ.get("PG_POOL_RECYCLE", 1800)),
+            pool_pre_ping=environ.get("PG_POOL_PRE_PING", "true") == "true",
+        )
+
+    def _get_pool_status(self, engine: AsyncEngine, prefix: str) -> dict[str, int]:
+        pool = engine.pool
+        return {
+            f"{prefix}size": pool.size(),
+            f"{prefix}checked_in": pool.checkedin(),
+            f"{prefix}checked_out": pool.checkedout(),
+            f"{prefix}overflow": pool.overflow(),
+        }
+
+    def _get_database_url(self, host: str, port: str) -> str:
+        return "{drivername}://{username}:{password}@{host}:{port}/{database}".format(
             drivername=environ.get("DB_DRIVER"),
             username=environ.get("POSTGRES_USER"),
             password=environ.get("POSTGRES_PASSWORD"),
-            host=environ.get("PG_HOST"),
-            port=environ.get("PG_PORT"),
+            host=host,
+            port=port,
             database=environ.get("POSTGRES_DB"),
         )
-        engine: AsyncEngine = create_async_engine(url, echo=False)
-        try:
-            async with engine.connect() as connection:
-                yield connection
-        finally:
-            await engine.dispose()
+
+    @asynccontextmanager
+    async def get_connection(self) -> AsyncGenerator[AsyncConnection]:
+        async with self.get_engine().connect() as connection:
+            yield connection
+
+    @asynccontextmanager
+    async def get_read_connection(self) -> AsyncGenerator[AsyncConnection]:
+        """Connection to the read replica, transactions are READ ONLY."""
+        engine = self.get_read_engine().execution_options(postgresql_readonly=True)
+        async with engine.connect() as connection:
+            yield connection
 
     @asynccontextmanager
     async def get_unit_of_work(self) -> AsyncGenerator[IUnitOfWork]:
@@ -79,12 +232,12 @@ class Container(IContainer):
 
     @asynccontextmanager
     async def get_security_repository(self) -> AsyncGenerator[ISecurityRepository]:
-        async with self.get_connection() as conn:
+        async with self.get_read_connection() as conn:
             yield SecurityRepository(conn)
 
     @asynccontextmanager
     async def get_candle_repository(self) -> AsyncGenerator[ICandleRepository]:
-        async with self.get_connection() as conn:
+        async with self.get_read_connection() as conn:
             yield CandleRepository(conn)
 
     @asynccontextmanager
@@ -94,13 +247,13 @@ class Container(IContainer):
 
     @asynccontextmanager
     async def get_market_data_adapter(self) -> AsyncGenerator[IMarketDataAdapter]:
-        yield MarketDataAdapter()
+        yield self._get_market_data_adapter()
 
     @asynccontextmanager
     async def get_market_data_loader(self) -> AsyncGenerator[IMarketDataLoader]:
         async with self.get_connection() as conn:
             uow = UOW(conn)
-            market_data_adapter = MarketDataAdapter()
+            market_data_adapter = self._get_market_data_adapter()
             security_repository = SecurityRepository(conn)
             candle_repository = CandleRepository(conn)
             candle_span_repository = CandleSpanRepository(conn)
@@ -111,6 +264,8 @@ class Container(IContainer):
                 candle_span_repository=candle_span_repository,
                 unit_of_work=uow,
                 logger=self.get_logger(),
+                fetch_semaphore=self._get_fetch_semaphore(),
+                trading_calendar=self._get_trading_calendar(),
             )
 
     @asynccontextmanager
@@ -118,6 +273,19 @@ class Container(IContainer):
         async with self.get_market_data_loader() as market_data_loader:
             yield LoadCandles(market_data_loader, logger=self.get_logger())
 
+    @asynccontextmanager
+    async def get_verify_resampling_use_case(
+        self,
+    ) -> AsyncGenerator[VerifyResampling]:
+        async with self.get_connection() as conn:
+            yield VerifyResampling(
+                self._get_market_data_adapter(),
+                unit_of_work=UOW(conn),
+                security_repo=SecurityRepository(conn),
+                candle_repo=CandleRepository(conn),
+                logger=self.get_logger(),
+            )
+
     @asynccontextmanager
     async def get_create_security_use_case(self) -> AsyncGenerator[CreateSecurity]:
         async with self.get_connection() as conn:
@@ -2,12 +2,20 @@
 
 from contextlib import asynccontextmanager
 from datetime import timedelta
+from time import monotonic
 from typing import AsyncGenerator
 
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.candle_columns import CandleColumns
 from app.core.date_time import Timestamp
-from app.core.entities import Candle, Timeframe
+from app.core.entities import Candle, Security, Timeframe
 from app.core.logger import ILogger
-from app.core.market_data_adapter import IMarketDataAdapter, MarketDataRequest
+from app.core.market_data_adapter import (
+    CandleBorders,
+    IMarketDataAdapter,
+    MarketDataRequest,
+)
 from app.core.market_data_loader import IMarketDataLoader
 from app.core.repository import (
     ICandleRepository,
@@ -17,7 +25,7 @@ from app.core.repository import (
 from app.core.unit_of_work import IUnitOfWork
 from app.dependency.container import IContainer
 from app.logger.logger import StructLogger
-from app.market_data_loader import MarketDataLoader
+from app.market_data_loader import MarketDataLoader, TradingCalendar
 from app.repository.json_repository import (
     CandleRepository,
     CandleSpanRepository,
@@ -25,6 +33,7 @@ from app.repository.json_repository import (
 )
 from app.use_cases.create_security import CreateSecurity
 from app.use_cases.load_candles import LoadCandles
+from app.use_cases.verify_resampling import VerifyResampling
 
 
 class FakeUOW(IUnitOfWork):
@@ -49,22 +58,49 @@ class FakeMarketDataAdapter(IMarketDataAdapter):
 
     n_minutes = 60 * 9
     n_hours = 9
+    page_size = 500
 
     def __init__(self):
-        self._candles: list[Candle] = []
+        pass
 
     async def load(self, request: MarketDataRequest):
-        self.request = request
-        return self._generate_candles()
+        return self._generate_candles(request)
+
+    async def stream(self, request: MarketDataRequest):
+        candles = self._generate_candles(request)
+        for start in range(0, len(candles), self.page_size):
+            end = start + self.page_size
+            yield CandleColumns.from_candles(candles[start:end])
+
+    async def load_candle_borders(self, security: Security) -> list[CandleBorders]:
+        return [
+            CandleBorders(
+                timeframe=tf,
+                time_from=Timestamp("2000-01-01"),
+                time_till=Timestamp.today(),
+            )
+            for tf in Timeframe
+        ]
+
+    async def load_trading_days(
+        self,
+        security: Security,
+        time_from: Timestamp,
+        time_till: Timestamp,
+    ) -> list[Timestamp]:
+        """Every day is a trading day, as in `_generate_candles`."""
+        return [
+            time_from + i for i in range((time_till.date() - time_from.date()).days + 1)
+        ]
 
-    def _generate_candles(self) -> list[Candle]:
-        t = Timestamp(f"{str(self.request.time_from.date())} 10:00:00+03:00")
+    def _generate_candles(self, request: MarketDataRequest) -> list[Candle]:
+        t = Timestamp(f"{str(request.time_from.date())} 10:00:00+03:00")
         out: list[Candle] = []
-        while Timestamp(t.date()) < self.request.time_till + 1:
+        while Timestamp(t.date()) < request.time_till + 1:
 
             candle = Candle(
-                security=self.request.security,
-                timeframe=self.request.timeframe,
+                security=request.security,
+                timeframe=request.timeframe,
                 timestamp=t,
                 open=100,
                 high=100,
@@ -73,7 +109,7 @@ class FakeMarketDataAdapter(IMarketDataAdapter):
             )
             out.append(candle)
 
-            match self.request.timeframe:
+            match request.timeframe:
                 case Timeframe.M1:
                     t = Timestamp(t.dt + timedelta(minutes=1))
                 case Timeframe.M10:
@@ -88,6 +124,86 @@ class FakeMarketDataAdapter(IMarketDataAdapter):
         return out
 
 
+class WeekdayMarketDataAdapter(FakeMarketDataAdapter):
+    """Fake adapter trading on weekdays, counts calendar requests."""
+
+    def __init__(self):
+        self.border_requests = 0
+        self.day_requests: list[tuple[Timestamp, Timestamp]] = []
+
+    async def load_candle_borders(self, security: Security) -> list[CandleBorders]:
+        self.border_requests += 1
+        return [
+            CandleBorders(
+                timeframe=Timeframe.M1,
+                time_from=Timestamp("2025-01-08"),
+                time_till=Timestamp.today(),
+            ),
+            CandleBorders(
+                timeframe=Timeframe.H1,
+                time_from=Timestamp("2000-01-01"),
+                time_till=Timestamp.today(),
+            ),
+        ]
+
+    async def load_trading_days(self, security, time_from, time_till):
+        self.day_requests += [(time_from, time_till)]
+        days = await super().load_trading_days(security, time_from, time_till)
+        return [d for d in days if d.date().weekday() < 5]
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands used by leases."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.expires: dict[str, float] = {}
+
+    async def get(self, key: str) -> str | None:
+        if key in self.expires and self.expires[key] <= monotonic():
+            self.values.pop(key, None)
+            self.expires.pop(key)
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str, nx: bool = False, ex: int | None = None):
+        if nx and await self.get(key) is not None:
+            return None
+        self.values[key] = value
+        self.expires.pop(key, None)
+        if ex is not None:
+            self.expires[key] = monotonic() + ex
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        n_deleted = 0
+        for key in keys:
+            n_deleted += await self.get(key) is not None
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return n_deleted
+
+    async def eval(self, script: str, n_keys: int, key: str, token: str, *args):
+        if await self.get(key) != token:
+            return 0
+        # compare-and-expire and compare-and-delete scripts of leases
+        if '"expire"' in script:
+            self.expires[key] = monotonic() + float(args[0])
+            return 1
+        if '"del"' in script:
+            return await self.delete(key)
+        raise NotImplementedError(script)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class UnavailableRedis(FakeRedis):
+    """Fake Redis failing lease scripts with a connection error."""
+
+    async def eval(self, *args):
+        raise RedisConnectionError("Redis is not available")
+
+
 class Container(IContainer):
 
     def get_logger(self) -> ILogger:
@@ -95,6 +211,12 @@ class Container(IContainer):
         logger.bind(app="candles-app")
         return logger
 
+    def get_pool_status(self) -> dict[str, int]:
+        return {}
+
+    def get_rate_limiter_status(self) -> dict[str, float]:
+        return {}
+
     @asynccontextmanager
     async def get_unit_of_work(self) -> AsyncGenerator[IUnitOfWork]:
         yield FakeUOW()
@@ -147,6 +269,7 @@ class Container(IContainer):
             candle_span_repository=candle_span_repository,
             unit_of_work=uow,
             logger=self.get_logger(),
+            trading_calendar=TradingCalendar(market_data_adapter),
         )
 
     @asynccontextmanager
@@ -154,6 +277,18 @@ class Container(IContainer):
         async with self.get_market_data_loader() as market_data_loader:
             yield LoadCandles(market_data_loader, logger=self.get_logger())
 
+    @asynccontextmanager
+    async def get_verify_resampling_use_case(
+        self,
+    ) -> AsyncGenerator[VerifyResampling]:
+        yield VerifyResampling(
+            FakeMarketDataAdapter(),
+            unit_of_work=FakeUOW(),
+            security_repo=SecurityRepository(),
+            candle_repo=CandleRepository(),
+            logger=self.get_logger(),
+        )
+
     @asynccontextmanager
     async def get_create_security_use_case(self) -> AsyncGenerator[CreateSecurity]:
         uow = FakeUOW()
@@ -1,7 +1,11 @@
 __all__ = [
     "DatabaseException",
+    "InvalidCursorException",
+    "LeaseLostException",
     "MarketDataSourceException",
 ]
 
 from app.exceptions.database_exception import DatabaseException
+from app.exceptions.invalid_cursor_exception import InvalidCursorException
+from app.exceptions.lease_lost_exception import LeaseLostException
 from app.exceptions.market_data_source_exception import MarketDataSourceException
@@ -0,0 +1,2 @@
+class LeaseLostException(Exception):
+    pass
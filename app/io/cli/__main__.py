@@ -4,9 +4,12 @@ import asyncio
 
 import typer
 
+from app.core.date_time import Timestamp
+from app.core.entities import Timeframe
 from app.dependency.prod import Container
 from app.io.cli.commands import create_security as create_security_command
 from app.io.cli.commands import update_candles as update_candles_command
+from app.io.cli.commands import verify_resampling as verify_resampling_command
 
 dependencies = Container()
 
@@ -26,4 +29,24 @@ def update_candles():
     asyncio.run(update_candles_command())
 
 
+@app.command()
+def verify_resampling(
+    ticker: str,
+    board: str,
+    timeframe: Timeframe = Timeframe.H1,
+    date_from: str = str(Timestamp.today() - 7),
+    date_till: str = str(Timestamp.today() - 1),
+):
+    """Compare M10/H1 bars resampled from ISS M1 candles with ISS bars."""
+    asyncio.run(
+        verify_resampling_command(
+            ticker=ticker,
+            board=board,
+            timeframe=timeframe,
+            time_from=Timestamp(date_from),
+            time_till=Timestamp(date_till),
+        )
+    )
+
+
 app()
@@ -1,10 +1,15 @@
 """CLI commands."""
 
+from dataclasses import asdict
+
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
 from app.core.logger import ILogger
 from app.dependency.prod import Container
 from app.exceptions import DatabaseException, MarketDataSourceException
 from app.use_cases.create_security import CreateSecurityRequest
 from app.use_cases.update_candles import UpdateCandles, UpdateCandlesRequest
+from app.use_cases.verify_resampling import VerifyResamplingRequest
 
 dependencies = Container()
 
@@ -27,6 +32,8 @@ async def create_security(
             await use_case.execute(request)
     except DatabaseException as e:
         logger.error("error", exception=str(e))
+    finally:
+        await dependencies.dispose()
     logger.info("command_finished")
 
 
@@ -38,6 +45,7 @@ async def update_candles(logger: ILogger = dependencies.get_logger()):
         use_case = UpdateCandles(
             load_candles_provider=dependencies.get_load_candles_use_case,
             security_repo_provider=dependencies.get_security_repository,
+            candle_span_repo_provider=dependencies.get_candle_span_repository,
             logger=dependencies.get_logger(),
         )
         await use_case.execute(UpdateCandlesRequest())
@@ -45,4 +53,42 @@ async def update_candles(logger: ILogger = dependencies.get_logger()):
         logger.error("error", exception=str(e))
     except MarketDataSourceException as e:
         logger.error("error", exception=str(e))
+    finally:
+        iss_requests = dependencies.get_rate_limiter_status()
+        await dependencies.dispose()
+    logger.info("command_finished", iss_requests=iss_requests)
+
+
+async def verify_resampling(
+    ticker: str,
+    board: str,
+    timeframe: Timeframe,
+    time_from: Timestamp,
+    time_till: Timestamp,
+    logger: ILogger = dependencies.get_logger(),
+):
+    """Verify Resampling Command."""
+    logger.bind(
+        command="verify_resampling",
+        param_ticker=ticker,
+        param_board=board,
+        param_timeframe=timeframe.value,
+        param_time_from=str(time_from),
+        param_time_till=str(time_till),
+    )
+    logger.info("command_started")
+    try:
+        async with dependencies.get_verify_resampling_use_case() as use_case:
+            request = VerifyResamplingRequest(
+                security=Security(ticker=ticker, board=board),
+                timeframe=timeframe,
+                time_from=time_from,
+                time_till=time_till,
+            )
+            response = await use_case.execute(request)
+        logger.info("resampling_verified", **asdict(response.result))
+    except MarketDataSourceException as e:
+        logger.error("error", exception=str(e))
+    finally:
+        await dependencies.dispose()
     logger.info("command_finished")
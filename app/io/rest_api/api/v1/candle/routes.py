@@ -2,13 +2,13 @@ from datetime import datetime
 from http import HTTPStatus
 
 import pytz
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 from app.core.date_time import Timestamp
 from app.core.entities import Timeframe
 from app.core.logger import ILogger
 from app.core.repository import ICandleRepository, ISecurityRepository
-from app.exceptions import DatabaseException
+from app.exceptions import DatabaseException, InvalidCursorException
 from app.io.rest_api.api.v1.candle.schemas import CandleSchema
 from app.io.rest_api.api.v1.schemas import HTTPErrorSchema
 from app.io.rest_api.dependency import (
@@ -24,10 +24,14 @@ router = APIRouter(prefix="/candles", tags=["candles"])
 
 @router.get(
     "/",
-    responses={HTTPStatus.INTERNAL_SERVER_ERROR: {"model": HTTPErrorSchema}},
+    responses={
+        HTTPStatus.BAD_REQUEST: {"model": HTTPErrorSchema},
+        HTTPStatus.INTERNAL_SERVER_ERROR: {"model": HTTPErrorSchema},
+    },
 )
 async def get_candles(
     request: Request,
+    response: Response,
     ticker: str,
     board: str,
     timeframe: Timeframe,
@@ -58,15 +62,20 @@ async def get_candles(
         time_till=Timestamp(time_till),
         page_number=pagination_parameters["page_number"],
         page_size=pagination_parameters["page_size"],
+        cursor=pagination_parameters["cursor"],
     )
     use_case = GetCandles(
         security_repo=security_repository, candle_repo=candle_repository
     )
     try:
         use_case_response = await use_case.execute(use_case_request)
+    except InvalidCursorException as e:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, detail=str(e))
     except DatabaseException as e:
         logger.error("error", exception=str(e))
         return HTTPException(HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
+    if use_case_response.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = use_case_response.next_cursor
     candles = [
         CandleSchema(
             id=candle.id,
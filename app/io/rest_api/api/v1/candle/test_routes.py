@@ -0,0 +1,149 @@
+"""Tests for candle routes."""
+
+import json
+from datetime import timedelta
+from http import HTTPStatus
+from urllib.parse import urlencode
+from uuid import uuid4
+
+import pytest
+
+from app.core.date_time import Timestamp
+from app.core.entities import Candle, Security, Timeframe
+from app.dependency.test import Container
+from app.io.rest_api.dependency import (
+    candle_repository_provider,
+    security_repository_provider,
+)
+from app.io.rest_api.main import app
+
+dependencies = Container()
+
+PATH = "/api/v1/candles/"
+
+
+async def fake_security_repository_provider():
+    async with dependencies.get_security_repository() as security_repository:
+        yield security_repository
+
+
+async def fake_candle_repository_provider():
+    async with dependencies.get_candle_repository() as candle_repository:
+        yield candle_repository
+
+
+@pytest.fixture(autouse=True)
+def fake_repositories():
+    """Serve the app with repositories of the test container."""
+    app.dependency_overrides[security_repository_provider] = (
+        fake_security_repository_provider
+    )
+    app.dependency_overrides[candle_repository_provider] = (
+        fake_candle_repository_provider
+    )
+    yield
+    app.dependency_overrides.clear()
+
+
+async def add_candles(n: int) -> list[Candle]:
+    security = Security(ticker=uuid4().hex, board=uuid4().hex)
+    t = Timestamp("2025-01-15 10:00:00+03:00")
+    candles = [
+        Candle(
+            security=security,
+            timeframe=Timeframe.M10,
+            timestamp=Timestamp(t.dt + timedelta(minutes=10 * i)),
+            open=100,
+            high=101,
+            low=99,
+            close=100.5,
+        )
+        for i in range(n)
+    ]
+    async with dependencies.get_security_repository() as security_repo:
+        await security_repo.add([security])
+    async with dependencies.get_candle_repository() as candle_repo:
+        await candle_repo.add(candles)
+    return candles
+
+
+async def remove_candles(candles: list[Candle]) -> None:
+    security = candles[0].security
+    async with dependencies.get_candle_repository() as candle_repo:
+        await candle_repo.filter_by_security(security).remove_all()
+    async with dependencies.get_security_repository() as security_repo:
+        await security_repo.filter_by_ticker(security.ticker).remove_all()
+
+
+async def get(path: str, params: dict) -> tuple[int, dict[str, str], object]:
+    """Call the ASGI app with a GET request, return status, headers and body."""
+    messages = []
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": urlencode(params).encode(),
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start, *body = messages
+    headers = {k.decode().lower(): v.decode() for k, v in start["headers"]}
+    return start["status"], headers, json.loads(b"".join(m["body"] for m in body))
+
+
+def query(candles: list[Candle], **kwargs) -> dict:
+    return dict(
+        ticker=candles[0].security.ticker,
+        board=candles[0].security.board,
+        timeframe=Timeframe.M10.value,
+        time_from="2025-01-15T00:00:00+03:00",
+        time_till="2025-01-15T23:59:59+03:00",
+        page_size=10,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_candles_cursor():
+    """Pages are followed by X-Next-Cursor, the last page has no cursor."""
+    candles = await add_candles(25)
+
+    pages = []
+    params = query(candles)
+    while True:
+        status, headers, body = await get(PATH, params)
+        assert status == HTTPStatus.OK
+        pages += [body]
+        if "x-next-cursor" not in headers:
+            break
+        params = query(candles, cursor=headers["x-next-cursor"])
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [c["id"] for page in pages for c in page] == [str(c.id) for c in candles]
+
+    await remove_candles(candles)
+
+
+@pytest.mark.asyncio
+async def test_get_candles_invalid_cursor():
+    candles = await add_candles(1)
+
+    status, _, body = await get(PATH, query(candles, cursor="not a cursor"))
+    assert status == HTTPStatus.BAD_REQUEST
+    assert "Invalid cursor" in body["detail"]
+
+    await remove_candles(candles)
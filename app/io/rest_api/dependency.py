@@ -43,6 +43,16 @@ async def pagination_parameters(
             le=100,
         ),
     ] = 10,
+    cursor: Annotated[
+        str | None,
+        Query(
+            title="cursor",
+            description=(
+                "optional parameter - value of X-Next-Cursor header of the "
+                "previous page, used instead of page number"
+            ),
+        ),
+    ] = None,
 ):
     """Return pagination query parameters."""
-    return {"page_number": page_number, "page_size": page_size}
+    return {"page_number": page_number, "page_size": page_size, "cursor": cursor}
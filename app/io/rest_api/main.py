@@ -1,6 +1,18 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.io.rest_api.api import router as router_api
+from app.io.rest_api.dependency import dependencies
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create DB connection pool on startup and close it on shutdown."""
+    dependencies.get_read_engine()
+    yield
+    await dependencies.dispose()
+
 
 app = FastAPI(
     title="Candlestick Service",
@@ -9,5 +21,6 @@ app = FastAPI(
         "url": "https://github.com/armsmaster/candlestick-service",
         "email": "edward.gordin@gmail.com",
     },
+    lifespan=lifespan,
 )
 app.include_router(router_api)
@@ -1,9 +1,17 @@
 __all__ = [
+    "AdaptiveRateLimiter",
+    "CandleColumns",
     "MarketDataAdapter",
     "MarketDataRequest",
+    "PageCache",
+    "create_session",
 ]
 
+from app.core.candle_columns import CandleColumns
 from app.market_data_adapter.market_data_adapter import (
     MarketDataAdapter,
     MarketDataRequest,
+    create_session,
 )
+from app.market_data_adapter.page_cache import PageCache
+from app.market_data_adapter.rate_limiter import AdaptiveRateLimiter
@@ -1,8 +1,8 @@
 from app.core.entities import Timeframe
 
-
 API = "https://iss.moex.com"
 ENGINE = "stock"
+TIMEZONE = "Europe/Moscow"
 MARKETS = {
     "TQBR": "shares",
     "TQOB": "bonds",
@@ -13,5 +13,36 @@ INTERVALS = {
     Timeframe.M10: "10",
     Timeframe.H1: "60",
 }
+# daily candles tell which days were trading days
+DAILY_INTERVAL = "24"
+
+# ISS returns up to PAGE_SIZE candles per request, PREFETCH_PAGES requests
+# are kept in flight by the producer
+PAGE_SIZE = 500
+PREFETCH_PAGES = 4
+
+# HTTP connection pool of the shared aiohttp session
+HTTP_LIMIT = 20
+HTTP_LIMIT_PER_HOST = 10
+HTTP_DNS_CACHE_TTL = 300
+HTTP_KEEPALIVE_TIMEOUT = 30
+
+# shared request rate limit, requests/sec
+RATE_LIMIT_INITIAL = 10.0
+RATE_LIMIT_MIN = 1.0
+RATE_LIMIT_MAX = 50.0
+RATE_LIMIT_BURST = 10.0
+RATE_LIMIT_TARGET_LATENCY = 1.0
+RATE_LIMIT_INCREASE = 0.5
+RATE_LIMIT_SLOW_DECREASE = 0.9
+RATE_LIMIT_ERROR_DECREASE = 0.5
+
+# retries of failed requests, delay is random up to min(MAX, BASE * 2**attempt)
+REQUEST_TIMEOUT = 30
+RETRY_ATTEMPTS = 5
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30.0
 
-N_CONSUMERS = 5
+# on-disk cache of ISS pages, evicted down to EVICT_RATIO of the size limit
+ISS_CACHE_MAX_BYTES = 1024**3
+ISS_CACHE_EVICT_RATIO = 0.9
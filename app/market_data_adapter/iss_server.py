@@ -0,0 +1,187 @@
+"""
+Local ISS stand-in server.
+
+Serves `candles.json` and `candleborders.json` with the ISS paging contract:
+`from`/`till` dates are inclusive, `start` is the row offset and a page past
+the end is empty. Candles are generated on the fly for weekdays, so any volume
+of data can be served. Latency, page size and injected errors are
+configurable.
+
+Usage:
+
+    python -m app.market_data_adapter.iss_server --port 8081 --latency 0.05
+
+and point the app to it with ISS_API=http://localhost:8081.
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import typer
+from aiohttp import web
+
+import app.market_data_adapter.constants as constants
+
+COLUMNS = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+BORDERS_COLUMNS = ["begin", "end", "interval", "board_group_id"]
+CANDLES_PATH = (
+    "/iss/engines/{engine}/markets/{market}/boards/{board}"
+    "/securities/{ticker}/candles.json"
+)
+BORDERS_PATH = (
+    "/iss/engines/{engine}/markets/{market}/boards/{board}"
+    "/securities/{ticker}/candleborders.json"
+)
+
+
+@dataclass
+class IssServerConfig:
+    """Behaviour of the stand-in server."""
+
+    page_size: int = constants.PAGE_SIZE
+    latency: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    session_start: int = 10 * 60  # minutes after local midnight
+    session_minutes: int = 9 * 60
+    history_from: date = date(2011, 12, 15)
+    seed: int = 0
+
+
+@dataclass
+class IssServerMetrics:
+    """Counters of served responses."""
+
+    pages: int = 0
+    candles: int = 0
+    errors: int = 0
+    throttled: int = 0
+
+
+class IssServer:
+    """aiohttp application generating candles."""
+
+    def __init__(self, config: IssServerConfig | None = None):
+        self.config = config or IssServerConfig()
+        self.metrics = IssServerMetrics()
+        self._random = random.Random(self.config.seed)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(CANDLES_PATH, self.candles)
+        app.router.add_get(BORDERS_PATH, self.candle_borders)
+        return app
+
+    async def candles(self, request: web.Request) -> web.Response:
+        if (error := await self._inject()) is not None:
+            return error
+        interval = int(request.query.get("interval", "1"))
+        time_from = request.query["from"]
+        days = self._trading_days(
+            date.fromisoformat(time_from[:10]),
+            date.fromisoformat(request.query["till"][:10]),
+        )
+        per_day = self._candles_per_day(interval)
+        # `from` with time of day skips earlier candles of the first day
+        skip = 0
+        first_day = days[0].isoformat() if days else None
+        if interval != 24 and first_day == time_from[:10] and len(time_from) > 10:
+            minutes = int(time_from[11:13]) * 60 + int(time_from[14:16])
+            skip = -(-(minutes - self.config.session_start) // interval)
+            skip = min(max(skip, 0), per_day)
+        start = int(request.query.get("start", "0")) + skip
+        stop = min(start + self.config.page_size, len(days) * per_day)
+        rows = [
+            self._row(days[i // per_day], i % per_day, interval)
+            for i in range(start, stop)
+        ]
+        self.metrics.pages += 1
+        self.metrics.candles += len(rows)
+        return web.json_response({"candles": {"columns": COLUMNS, "data": rows}})
+
+    async def candle_borders(self, request: web.Request) -> web.Response:
+        if (error := await self._inject()) is not None:
+            return error
+        begin = self.config.history_from.isoformat()
+        end = date.today().isoformat()
+        rows = [
+            [f"{begin} 00:00:00", f"{end} 23:59:59", interval, 57]
+            for interval in [1, 10, 60, 24]
+        ]
+        return web.json_response(
+            {"borders": {"columns": BORDERS_COLUMNS, "data": rows}}
+        )
+
+    async def _inject(self) -> web.Response | None:
+        """Sleep for the latency, then maybe return an error response."""
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+        dice = self._random.random()
+        if dice < self.config.throttle_rate:
+            self.metrics.throttled += 1
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        if dice < self.config.throttle_rate + self.config.error_rate:
+            self.metrics.errors += 1
+            return web.Response(status=502)
+        return None
+
+    def _trading_days(self, time_from: date, time_till: date) -> list[date]:
+        time_from = max(time_from, self.config.history_from)
+        n_days = (time_till - time_from).days + 1
+        days = [time_from + timedelta(days=i) for i in range(n_days)]
+        return [d for d in days if d.weekday() < 5]
+
+    def _candles_per_day(self, interval: int) -> int:
+        if interval == 24:
+            return 1
+        return self.config.session_minutes // interval
+
+    def _row(self, day: date, slot: int, interval: int) -> list:
+        """Bar aggregated from minute prices, so bars of all intervals agree."""
+        if interval == 24:
+            first, n_minutes = self.config.session_start, self.config.session_minutes
+            begin, end = f"{day} 00:00:00", f"{day} 00:00:00"
+        else:
+            first, n_minutes = self.config.session_start + slot * interval, interval
+            last = first + interval - 1
+            begin = f"{day} {first // 60:02d}:{first % 60:02d}:00"
+            end = f"{day} {last // 60:02d}:{last % 60:02d}:59"
+        base = day.toordinal() * 24 * 60
+        prices = [self._price(base + m) for m in range(first, first + n_minutes)]
+        return [
+            prices[0],
+            prices[-1] + 0.01,
+            max(prices) + 0.02,
+            min(prices) - 0.01,
+            1e6,
+            1e4,
+            begin,
+            end,
+        ]
+
+    def _price(self, minute: int) -> float:
+        return 100 + minute % 100 / 100
+
+
+def main(
+    host: str = "localhost",
+    port: int = 8081,
+    latency: float = 0.0,
+    page_size: int = constants.PAGE_SIZE,
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+):
+    """Run ISS stand-in server."""
+    config = IssServerConfig(
+        page_size=page_size,
+        latency=latency,
+        error_rate=error_rate,
+        throttle_rate=throttle_rate,
+    )
+    web.run_app(IssServer(config).create_app(), host=host, port=port)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -1,136 +1,421 @@
 import asyncio
+import random
+from array import array
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from time import monotonic
 from urllib.parse import urlencode
 
 import aiohttp
 import aiohttp.client_exceptions
+from pytz import timezone
 
 import app.market_data_adapter.constants as constants
+from app.core.candle_columns import CandleColumns
 from app.core.date_time import Timestamp
-from app.core.entities import CandleData
+from app.core.entities import CandleData, Security, Timeframe
 from app.core.market_data_adapter import (
+    CandleBorders,
     IMarketDataAdapter,
     MarketDataAdapterException,
     MarketDataRequest,
 )
 from app.exceptions import MarketDataSourceException
+from app.market_data_adapter.page_cache import PageCache
+from app.market_data_adapter.rate_limiter import AdaptiveRateLimiter
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Create HTTP session with a keep-alive connection pool."""
+    connector = aiohttp.TCPConnector(
+        limit=constants.HTTP_LIMIT,
+        limit_per_host=constants.HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=constants.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=constants.HTTP_KEEPALIVE_TIMEOUT,
+    )
+    timeout = aiohttp.ClientTimeout(total=constants.REQUEST_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+class RetryableRequestError(Exception):
+    """Transient request failure."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class RequestContext:
+    """State of one `load()` call."""
+
+    security: Security
+    timeframe: Timeframe | None  # None for daily candles
+    time_from: Timestamp
+    time_till: Timestamp
+    market: str
+    interval: str
 
 
 class MarketDataAdapter(IMarketDataAdapter):
+    """
+    ISS client.
+
+    The adapter keeps no per-request state, so one instance can serve
+    concurrent `load()` calls.
+    """
 
     API = constants.API
     ENGINE = constants.ENGINE
     MARKETS = constants.MARKETS
     INTERVALS = constants.INTERVALS
+    DAILY_INTERVAL = constants.DAILY_INTERVAL
+    TIMEZONE = constants.TIMEZONE
+
+    # epoch seconds of local midnight by ISO date, shared by all instances
+    _day_epochs: dict[str, int] = {}
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        page_cache: PageCache | None = None,
+        api: str | None = None,
+    ):
+        """
+        Initialize.
+
+        `api` replaces the ISS base URL, e.g. with a local stand-in server.
+        An injected session is owned by the caller, otherwise the adapter
+        creates one on first request and closes it in `close()`. Adapters
+        sharing a rate limiter share its request budget. Pages of requests
+        ending before today are read from and written to `page_cache`.
+        """
+        self._session = session
+        self._owns_session = session is None
+        self._rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self._page_cache = page_cache
+        if api is not None:
+            self.API = api
+
+    async def __aenter__(self) -> "MarketDataAdapter":
+        return self
 
-    def __init__(self):
-        self.security = None
-        self.time_from = None
-        self.time_till = None
-        self.timeframe = None
-        self._candles: list[CandleData] = None
-        self.market = None
-        self.interval = None
-        self.candles_set: set[CandleData] = None
-
-    def _init(self, request: MarketDataRequest) -> None:
-        self.security = request.security
-        self.time_from = request.time_from
-        self.time_till = request.time_till
-        self.timeframe = request.timeframe
-        self._candles: list[CandleData] = []
-        self._init_market()
-        self._init_interval()
-
-    def _init_market(self):
+    async def __aexit__(self, exc_type, exc_val, traceback) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close own HTTP session."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = create_session()
+        return self._session
+
+    def _create_context(self, request: MarketDataRequest) -> RequestContext:
+        return RequestContext(
+            security=request.security,
+            timeframe=request.timeframe,
+            time_from=request.time_from,
+            time_till=request.time_till,
+            market=self._get_market(request.security),
+            interval=self._get_interval(request.timeframe),
+        )
+
+    def _get_market(self, security: Security) -> str:
         try:
-            self.market = self.MARKETS[self.security.board]
+            return self.MARKETS[security.board]
         except KeyError:
-            raise MarketDataAdapterException(
-                f"Board '{self.security.board}' not supported."
-            )
+            raise MarketDataAdapterException(f"Board '{security.board}' not supported.")
 
-    def _init_interval(self):
+    def _get_interval(self, timeframe: Timeframe) -> str:
         try:
-            self.interval = self.INTERVALS[self.timeframe]
+            return self.INTERVALS[timeframe]
         except KeyError:
-            raise MarketDataAdapterException(
-                f"Timeframe '{self.timeframe}' not supported."
-            )
+            raise MarketDataAdapterException(f"Timeframe '{timeframe}' not supported.")
 
-    async def load(self, request: MarketDataRequest):
-        self._init(request)
-        self.candles_set: set[CandleData] = set()
-        queue = asyncio.Queue()
-        n_consumers = constants.N_CONSUMERS
-        consumers = [
-            asyncio.create_task(self._consume(queue)) for _ in range(n_consumers)
+    async def load(self, request: MarketDataRequest) -> list[CandleData]:
+        columns = await self.load_columns(request)
+        return columns.to_candles(request.security, request.timeframe, self.TIMEZONE)
+
+    async def load_columns(self, request: MarketDataRequest) -> CandleColumns:
+        """Load candles as columns, sorted by timestamp and deduplicated."""
+        return await self._load_pages(self._create_context(request))
+
+    async def load_candle_borders(self, security: Security) -> list[CandleBorders]:
+        """Load dates of the first and the last candle of each timeframe."""
+        url = self._generate_borders_url(security, self._get_market(security))
+        data, _ = await self._request_get(url)
+        return self._parse_borders(data["borders"]["columns"], data["borders"]["data"])
+
+    async def load_trading_days(
+        self,
+        security: Security,
+        time_from: Timestamp,
+        time_till: Timestamp,
+    ) -> list[Timestamp]:
+        """Load days of the period which have a daily candle."""
+        ctx = RequestContext(
+            security=security,
+            timeframe=None,
+            time_from=time_from,
+            time_till=time_till,
+            market=self._get_market(security),
+            interval=self.DAILY_INTERVAL,
+        )
+        columns = await self._load_pages(ctx)
+        tzinfo = timezone(self.TIMEZONE)
+        return [
+            Timestamp(datetime.fromtimestamp(t, tzinfo).date())
+            for t in columns.timestamp
         ]
-        await self._produce(queue)
-        await queue.join()
-        for consumer in consumers:
-            consumer.cancel()
 
-        candles = list(self.candles_set)
-        candles.sort(key=lambda x: x.timestamp)
-        return candles
+    async def _load_pages(self, ctx: RequestContext) -> CandleColumns:
+        columns = CandleColumns()
+        async for page in self._stream_pages(ctx):
+            columns.extend(page)
+        return columns.unique()
 
-    async def _produce(self, queue: asyncio.Queue):
+    async def stream(
+        self,
+        request: MarketDataRequest,
+    ) -> AsyncIterator[CandleColumns]:
+        """Yield candles page by page, in the order ISS returns them."""
+        async for page in self._stream_pages(self._create_context(request)):
+            yield page
+
+    async def _stream_pages(self, ctx: RequestContext) -> AsyncIterator[CandleColumns]:
+        """
+        Parse pages while the producer fetches the next ones.
+
+        The queue holds at most PREFETCH_PAGES pages, a slow reader pauses
+        fetching.
+        """
+        queue = asyncio.Queue(maxsize=constants.PREFETCH_PAGES)
+        producer = asyncio.create_task(self._run_producer(ctx, queue))
+        try:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield self._parse_page(*item)
+        finally:
+            producer.cancel()
+
+    async def _run_producer(self, ctx: RequestContext, queue: asyncio.Queue):
+        """Run `_produce`, then put its error or None as the end of stream."""
+        try:
+            await self._produce(ctx, queue)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(None)
+
+    async def _produce(self, ctx: RequestContext, queue: asyncio.Queue):
+        """
+        Fetch pages, keeping a window of requests in flight.
+
+        The first page is requested alone, most requests fit in one page. After
+        a full page a window of PREFETCH_PAGES pages is requested at offsets
+        predicted from the ISS page size. A short page is the last one.
+        """
         i = 0
+        window = 1
         while True:
-            url = self._generate_url(index=i)
-            data = await self._request_get(url)
-            columns, rows = data["candles"]["columns"], data["candles"]["data"]
-            if not rows:
-                break
-            await queue.put((columns, rows))
-            i += len(rows)
-
-    async def _consume(self, queue: asyncio.Queue):
-        while True:
-            columns, rows = await queue.get()
-            candles = self._process_rows(columns, rows)
-            self.candles_set.update(candles)
-            queue.task_done()
+            offsets = [i + k * constants.PAGE_SIZE for k in range(window)]
+            pages = await asyncio.gather(*[self._request_page(ctx, o) for o in offsets])
+            for offset, (columns, rows) in zip(offsets, pages):
+                if rows:
+                    await queue.put((columns, rows))
+                if len(rows) < constants.PAGE_SIZE:
+                    return
+                i = offset + len(rows)
+            window = constants.PREFETCH_PAGES
+
+    async def _request_page(
+        self,
+        ctx: RequestContext,
+        index: int,
+    ) -> tuple[list[str], list[list]]:
+        url = self._generate_url(ctx, index=index)
+        if self._page_cache is None:
+            data, _ = await self._request_get(url)
+        else:
+            data = await self._request_cached(ctx, url, index)
+        return data["candles"]["columns"], data["candles"]["data"]
+
+    async def _request_cached(self, ctx: RequestContext, url: str, index: int) -> dict:
+        """Serve page from cache, pages of closed days are stored."""
+        cache, metrics = self._page_cache, self._rate_limiter.metrics
+        closed = ctx.time_till.date() < Timestamp.now(self.TIMEZONE).date()
+        key = cache.key(
+            ctx.security.board,
+            ctx.security.ticker,
+            ctx.interval,
+            ctx.time_from,
+            ctx.time_till,
+            index,
+        )
+        if closed and (body := await cache.get(key)) is not None:
+            metrics.cache_hits += 1
+            return json_loads(body)
+        metrics.cache_misses += 1
+        if cache.mode == "only":
+            raise MarketDataSourceException(f"Page not cached: {url}")
+        data, body = await self._request_get(url)
+        if closed:
+            await cache.put(key, body)
+        return data
+
+    async def _request_get(self, url: str) -> tuple[dict, bytes]:
+        """
+        GET JSON under the shared rate limit, return decoded and raw body.
+
+        Throttling, server errors, connection errors, timeouts and non-JSON
+        responses are retried with jittered exponential backoff. Pages are
+        addressed by offset, so a retried request returns the same page.
+        """
+        metrics = self._rate_limiter.metrics
+        for attempt in range(constants.RETRY_ATTEMPTS):
+            await self._rate_limiter.acquire()
+            try:
+                return await self._request_once(url)
+            except RetryableRequestError as e:
+                self._rate_limiter.on_error()
+                error = e
+                if attempt + 1 < constants.RETRY_ATTEMPTS:
+                    metrics.retries += 1
+                    await asyncio.sleep(max(e.retry_after, self._backoff(attempt)))
+        metrics.failures += 1
+        raise MarketDataSourceException(
+            f"{error} (after {constants.RETRY_ATTEMPTS} attempts)"
+        )
 
-    async def _request_get(self, url: str) -> dict:
+    async def _request_once(self, url: str) -> tuple[dict, bytes]:
+        metrics = self._rate_limiter.metrics
+        started = monotonic()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url=url) as resp:
-                    response_json = await resp.json()
-                    return response_json
+            async with self._get_session().get(url=url) as resp:
+                if resp.status == HTTPStatus.TOO_MANY_REQUESTS:
+                    metrics.throttled += 1
+                    raise RetryableRequestError(
+                        f"HTTP {resp.status}", self._retry_after(resp)
+                    )
+                if resp.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                    metrics.server_errors += 1
+                    raise RetryableRequestError(f"HTTP {resp.status}")
+                if resp.status >= HTTPStatus.BAD_REQUEST:
+                    metrics.failures += 1
+                    raise MarketDataSourceException(f"HTTP {resp.status}: {url}")
+                response_json = await resp.json(loads=json_loads)
+                body = await resp.read()
+        except (aiohttp.client_exceptions.ContentTypeError, ValueError) as e:
+            metrics.invalid_responses += 1
+            raise RetryableRequestError(f"Invalid response: {str(e)}")
+        except TimeoutError as e:
+            metrics.timeouts += 1
+            raise RetryableRequestError(f"TimeoutError: {str(e)}")
         except aiohttp.client_exceptions.ClientConnectionError as e:
-            raise MarketDataSourceException(f"ClientConnectionError: {str(e)}")
+            metrics.connection_errors += 1
+            raise RetryableRequestError(f"ClientConnectionError: {str(e)}")
+        self._rate_limiter.on_success(monotonic() - started)
+        return response_json, body
+
+    def _backoff(self, attempt: int) -> float:
+        limit = constants.RETRY_BACKOFF_BASE * 2**attempt
+        return random.uniform(0, min(constants.RETRY_BACKOFF_MAX, limit))
+
+    def _retry_after(self, resp: aiohttp.ClientResponse) -> float:
+        try:
+            retry_after = float(resp.headers.get("Retry-After", 0))
+        except ValueError:
+            return 0.0
+        return min(constants.RETRY_BACKOFF_MAX, retry_after)
 
-    def _generate_url(self, index: int) -> str:
+    def _generate_url(self, ctx: RequestContext, index: int) -> str:
         url = "{a}/iss/{e}/{m}/{b}/{t}/candles.json".format(
             a=self.API,
             e=f"engines/{self.ENGINE}",
-            m=f"markets/{self.market}",
-            b=f"boards/{self.security.board}",
-            t=f"securities/{self.security.ticker}",
+            m=f"markets/{ctx.market}",
+            b=f"boards/{ctx.security.board}",
+            t=f"securities/{ctx.security.ticker}",
         )
         params = {
-            "from": self.time_from,
-            "till": self.time_till,
+            "from": self._format_time(ctx.time_from),
+            "till": self._format_time(ctx.time_till),
             "iss.reverse": "true",
-            "interval": self.interval,
+            "interval": ctx.interval,
             "start": index,
         }
         url += "?" + urlencode(params)
         return url
 
-    def _process_rows(self, columns: list[str], data: list[list]) -> list[CandleData]:
+    def _generate_borders_url(self, security: Security, market: str) -> str:
+        return "{a}/iss/{e}/{m}/{b}/{t}/candleborders.json".format(
+            a=self.API,
+            e=f"engines/{self.ENGINE}",
+            m=f"markets/{market}",
+            b=f"boards/{security.board}",
+            t=f"securities/{security.ticker}",
+        )
+
+    def _format_time(self, timestamp: Timestamp) -> str:
+        """Format dates as is and times as ISS local time."""
+        dt = timestamp.dt
+        if not isinstance(dt, datetime):
+            return str(timestamp)
+        return dt.astimezone(timezone(self.TIMEZONE)).strftime("%Y-%m-%d %H:%M:%S")
+
+    def _parse_borders(
+        self, columns: list[str], rows: list[list]
+    ) -> list[CandleBorders]:
         mapping = {c: idx for idx, c in enumerate(columns)}
-        return [self._process_row(mapping, item) for item in data]
-
-    def _process_row(self, mapping: dict[str, int], data: list) -> CandleData:
-        timestamp_str: str = data[mapping["begin"]]
-        return CandleData(
-            security=self.security,
-            timeframe=self.timeframe,
-            timestamp=Timestamp(timestamp=timestamp_str, tz="Europe/Moscow"),
-            open=data[mapping["open"]],
-            high=data[mapping["high"]],
-            low=data[mapping["low"]],
-            close=data[mapping["close"]],
+        begin, end, interval = (mapping[name] for name in ["begin", "end", "interval"])
+        timeframes = {v: k for k, v in self.INTERVALS.items()}
+        return [
+            CandleBorders(
+                timeframe=timeframes[str(row[interval])],
+                time_from=Timestamp(row[begin][:10]),
+                time_till=Timestamp(row[end][:10]),
+            )
+            for row in rows
+            if str(row[interval]) in timeframes
+        ]
+
+    def _parse_page(self, columns: list[str], rows: list[list]) -> CandleColumns:
+        mapping = {c: idx for idx, c in enumerate(columns)}
+        begin, o, h, lo, c = (
+            mapping[name] for name in ["begin", "open", "high", "low", "close"]
+        )
+        return CandleColumns(
+            timestamp=array("q", [self._to_epoch(row[begin]) for row in rows]),
+            open=array("d", [row[o] for row in rows]),
+            high=array("d", [row[h] for row in rows]),
+            low=array("d", [row[lo] for row in rows]),
+            close=array("d", [row[c] for row in rows]),
+        )
+
+    def _to_epoch(self, value: str) -> int:
+        """Convert local 'YYYY-MM-DD hh:mm:ss' to epoch seconds."""
+        day = value[:10]
+        midnight = self._day_epochs.get(day)
+        if midnight is None:
+            midnight = self._day_epochs[day] = self._day_epoch(day)
+        hours, minutes, seconds = value[11:13], value[14:16], value[17:19]
+        return midnight + int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+    def _day_epoch(self, day: str) -> int:
+        # UTC offset is taken at noon, DST switches happened at night
+        noon = timezone(self.TIMEZONE).localize(
+            datetime.fromisoformat(day) + timedelta(hours=12)
         )
+        return int(noon.timestamp()) - 12 * 3600
@@ -0,0 +1,90 @@
+"""On-disk cache of ISS pages."""
+
+import asyncio
+import os
+from hashlib import sha256
+from pathlib import Path
+from threading import get_ident
+
+import app.market_data_adapter.constants as constants
+
+
+class PageCache:
+    """
+    Content-addressed cache of raw ISS responses.
+
+    Entries never expire. Reading an entry touches it, and once the total size
+    exceeds `max_bytes` the least recently used entries are removed.
+
+    Modes: "on" - read through, "only" - never go to the network.
+    """
+
+    MODES = ("on", "only")
+
+    def __init__(self, directory: str, max_bytes: int, mode: str = "on"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected {self.MODES}")
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._size: int | None = None
+
+    @staticmethod
+    def key(*parts) -> str:
+        return sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+
+    async def get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._read, key)
+
+    async def put(self, key: str, body: bytes) -> None:
+        await asyncio.to_thread(self._write, key, body)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            body = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return body
+
+    def _write(self, key: str, body: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        tmp_path = path.with_suffix(f".{os.getpid()}.{get_ident()}.tmp")
+        tmp_path.write_bytes(body)
+        os.replace(tmp_path, path)
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(body) - replaced
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * constants.ISS_CACHE_EVICT_RATIO
+        for _, size, f in entries:
+            if self._size <= target:
+                break
+            f.unlink(missing_ok=True)
+            self._size -= size
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        """Return (mtime, size, path) of cached files."""
+        entries = []
+        for f in self.directory.glob("*/*.json"):
+            try:
+                stat = f.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, f))
+        return entries
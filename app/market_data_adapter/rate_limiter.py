@@ -0,0 +1,96 @@
+"""Adaptive rate limiter."""
+
+import asyncio
+from dataclasses import asdict, dataclass
+from time import monotonic
+
+import app.market_data_adapter.constants as constants
+
+
+@dataclass
+class RequestMetrics:
+    """Counters of request outcomes and limiter decisions."""
+
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    server_errors: int = 0
+    connection_errors: int = 0
+    timeouts: int = 0
+    invalid_responses: int = 0
+    failures: int = 0
+    rate_increases: int = 0
+    rate_decreases: int = 0
+    waits: int = 0
+    wait_seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by concurrent requests.
+
+    The refill rate follows AIMD: it grows by a fixed step after each fast
+    successful response, and shrinks by a factor after a slow response or an
+    error.
+    """
+
+    def __init__(
+        self,
+        rate: float = constants.RATE_LIMIT_INITIAL,
+        min_rate: float = constants.RATE_LIMIT_MIN,
+        max_rate: float = constants.RATE_LIMIT_MAX,
+        burst: float = constants.RATE_LIMIT_BURST,
+        target_latency: float = constants.RATE_LIMIT_TARGET_LATENCY,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self.metrics = RequestMetrics()
+        self._tokens = burst
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait for a token."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self.metrics.waits += 1
+                self.metrics.wait_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+            self.metrics.requests += 1
+
+    def on_success(self, latency: float) -> None:
+        """Adapt rate to latency of a successful response."""
+        if latency <= self.target_latency:
+            self._set_rate(self.rate + constants.RATE_LIMIT_INCREASE)
+        else:
+            self._set_rate(self.rate * constants.RATE_LIMIT_SLOW_DECREASE)
+
+    def on_error(self) -> None:
+        """Back off after throttling or a server side error."""
+        self._set_rate(self.rate * constants.RATE_LIMIT_ERROR_DECREASE)
+
+    def status(self) -> dict[str, float]:
+        """Return metrics and current rate."""
+        return {"rate": round(self.rate, 2), **asdict(self.metrics)}
+
+    def _set_rate(self, rate: float) -> None:
+        rate = min(self.max_rate, max(self.min_rate, rate))
+        if rate > self.rate:
+            self.metrics.rate_increases += 1
+        elif rate < self.rate:
+            self.metrics.rate_decreases += 1
+        self.rate = rate
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
@@ -0,0 +1,38 @@
+import pytest
+from aiohttp import test_utils
+
+import app.market_data_adapter.constants as constants
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
+from app.market_data_adapter import MarketDataAdapter, MarketDataRequest
+from app.market_data_adapter.iss_server import IssServer, IssServerConfig
+
+
+@pytest.mark.asyncio
+async def test_market_data_adapter_iss_server(monkeypatch):
+    monkeypatch.setattr(constants, "PAGE_SIZE", 100)
+    monkeypatch.setattr(constants, "RETRY_BACKOFF_BASE", 0.001)
+    server = IssServer(IssServerConfig(page_size=100, error_rate=0.2, seed=1))
+    security = Security(ticker="SBER", board="TQBR")
+    request = MarketDataRequest(
+        security=security,
+        timeframe=Timeframe.M10,
+        time_from=Timestamp("2025-01-13"),
+        time_till=Timestamp("2025-01-19"),
+    )
+    async with test_utils.TestServer(server.create_app()) as test_server:
+        api = str(test_server.make_url("")).rstrip("/")
+        async with MarketDataAdapter(api=api) as adapter:
+            candles = await adapter.load(request)
+            days = await adapter.load_trading_days(
+                security, request.time_from, request.time_till
+            )
+            borders = await adapter.load_candle_borders(security)
+
+    assert len(candles) == 5 * 54
+    assert str(candles[0].timestamp) == "2025-01-13T10:00:00+03:00"
+    assert str(candles[-1].timestamp) == "2025-01-17T18:50:00+03:00"
+    assert [str(d) for d in days] == [f"2025-01-{d}" for d in range(13, 18)]
+    assert [b.timeframe for b in borders] == [Timeframe.M1, Timeframe.M10, Timeframe.H1]
+    assert server.metrics.errors > 0
+    assert server.metrics.candles == 5 * 54 + 5
@@ -1,10 +1,17 @@
 import asyncio
 
 import pytest
+from aiohttp import test_utils, web
 
+import app.market_data_adapter.constants as constants
 from app.core.date_time import Timestamp
 from app.core.entities import CandleData, Security, Timeframe
-from app.market_data_adapter import MarketDataAdapter, MarketDataRequest
+from app.market_data_adapter import (
+    AdaptiveRateLimiter,
+    MarketDataAdapter,
+    MarketDataRequest,
+    create_session,
+)
 
 pytest_plugins = ("pytest_asyncio",)
 
@@ -17,8 +24,8 @@ async def test_market_data_adapter_mono():
         time_from=Timestamp("2024-12-17"),
         time_till=Timestamp("2025-02-17"),
     )
-    adapter = MarketDataAdapter()
-    candles = await adapter.load(request=request)
+    async with MarketDataAdapter() as adapter:
+        candles = await adapter.load(request=request)
     assert isinstance(candles, list)
     assert len(candles) == 674
     assert isinstance(candles[0], CandleData)
@@ -46,12 +53,159 @@ async def test_market_data_adapter_concurrent():
             time_till=Timestamp("2025-02-17"),
         ),
     ]
-    adapters = [MarketDataAdapter() for _ in requests]
-    candles = await asyncio.gather(
-        *[adapter.load(request) for adapter, request in zip(adapters, requests)]
-    )
+    async with create_session() as session:
+        adapters = [MarketDataAdapter(session=session) for _ in requests]
+        candles = await asyncio.gather(
+            *[adapter.load(request) for adapter, request in zip(adapters, requests)]
+        )
     assert isinstance(candles[0][0], CandleData)
     assert isinstance(candles[1][0], CandleData)
     assert isinstance(candles[2][0], CandleData)
     assert len(candles[0]) == 674
     assert len(candles[1]) == 674
+
+
+def test_market_data_adapter_parse_page():
+    columns = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+    rows = [
+        [100, 101, 102, 99, 0, 0, "2025-01-15 10:01:00", "2025-01-15 10:01:59"],
+        [100, 101, 102, 99, 0, 0, "2025-01-15 10:00:00", "2025-01-15 10:00:59"],
+        [100, 101, 102, 99, 0, 0, "2010-07-01 10:00:00", "2010-07-01 10:00:59"],
+        [100, 101, 102, 99, 0, 0, "2025-01-15 10:00:00", "2025-01-15 10:00:59"],
+    ]
+    security = Security(ticker="SBER", board="TQBR")
+    adapter = MarketDataAdapter()
+    page = adapter._parse_page(columns, rows).unique()
+    assert len(page) == 3
+    candles = page.to_candles(security, Timeframe.M1, "Europe/Moscow")
+    expected = sorted(set(Timestamp(r[6], tz="Europe/Moscow") for r in rows))
+    assert [c.timestamp for c in candles] == expected
+    assert (candles[0].open, candles[0].high, candles[0].low) == (100, 102, 99)
+    assert candles[0].close == 101
+
+
+def test_market_data_adapter_parse_borders():
+    columns = ["begin", "end", "interval", "board_group_id"]
+    rows = [
+        ["2011-12-15 10:00:00", "2025-06-20 18:49:00", 1, 57],
+        ["2011-12-08 10:00:00", "2025-06-20 18:40:00", 10, 57],
+        ["2011-11-21 10:00:00", "2025-06-20 18:00:00", 60, 57],
+        ["1997-03-24 00:00:00", "2025-06-20 00:00:00", 24, 57],
+    ]
+    borders = MarketDataAdapter()._parse_borders(columns, rows)
+    assert [b.timeframe for b in borders] == [Timeframe.M1, Timeframe.M10, Timeframe.H1]
+    assert borders[0].time_from == Timestamp("2011-12-15")
+    assert borders[0].time_till == Timestamp("2025-06-20")
+
+
+@pytest.mark.asyncio
+async def test_market_data_adapter_retry(monkeypatch):
+    monkeypatch.setattr(constants, "RETRY_BACKOFF_BASE", 0.01)
+    columns = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+    row = [100, 101, 102, 99, 0, 0, "2025-01-15 10:00:00", "2025-01-15 10:59:59"]
+    responses = [
+        web.Response(status=429, headers={"Retry-After": "0"}),
+        web.Response(status=502),
+        web.Response(text="<html>busy</html>", content_type="text/html"),
+    ]
+
+    async def handler(request: web.Request):
+        if responses:
+            return responses.pop(0)
+        rows = [row] if request.query["start"] == "0" else []
+        return web.json_response({"candles": {"columns": columns, "data": rows}})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    request = MarketDataRequest(
+        security=Security(ticker="SBER", board="TQBR"),
+        timeframe=Timeframe.H1,
+        time_from=Timestamp("2025-01-15"),
+        time_till=Timestamp("2025-01-15"),
+    )
+    rate_limiter = AdaptiveRateLimiter()
+    async with test_utils.TestServer(app) as server:
+        async with MarketDataAdapter(rate_limiter=rate_limiter) as adapter:
+            adapter.API = str(server.make_url("")).rstrip("/")
+            candles = await adapter.load(request)
+    assert len(candles) == 1
+    status = rate_limiter.status()
+    assert (status["throttled"], status["server_errors"]) == (1, 1)
+    assert status["invalid_responses"] == 1
+    assert status["retries"] == 3
+
+
+@pytest.mark.asyncio
+async def test_market_data_adapter_shared_concurrent(monkeypatch):
+    monkeypatch.setattr(constants, "PAGE_SIZE", 10)
+    columns = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+
+    async def handler(request: web.Request):
+        ticker = request.match_info["ticker"]
+        price = float(len(ticker))
+        start = int(request.query["start"])
+        rows = [
+            [price, price, price, price, 0, 0, f"2025-01-15 10:{m:02d}:00", ""]
+            for m in range(start, min(start + 10, 30))
+        ]
+        await asyncio.sleep(0.01)
+        return web.json_response({"candles": {"columns": columns, "data": rows}})
+
+    app = web.Application()
+    app.router.add_get("/iss/{p:.*}/securities/{ticker}/candles.json", handler)
+    requests = [
+        MarketDataRequest(
+            security=Security(ticker="X" * n, board="TQBR"),
+            timeframe=Timeframe.M1,
+            time_from=Timestamp("2025-01-15"),
+            time_till=Timestamp("2025-01-15"),
+        )
+        for n in range(1, 6)
+    ]
+    async with test_utils.TestServer(app) as server:
+        async with MarketDataAdapter() as adapter:
+            adapter.API = str(server.make_url("")).rstrip("/")
+            results = await asyncio.gather(*[adapter.load(r) for r in requests])
+    for request, candles in zip(requests, results):
+        assert len(candles) == 30
+        assert all(c.security == request.security for c in candles)
+        assert all(c.open == len(request.security.ticker) for c in candles)
+
+
+@pytest.mark.asyncio
+async def test_market_data_adapter_request_count(monkeypatch):
+    monkeypatch.setattr(constants, "PAGE_SIZE", 10)
+    columns = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+    n_rows = 0
+    starts = []
+
+    async def handler(request: web.Request):
+        start = int(request.query["start"])
+        starts.append(start)
+        rows = [
+            [100, 100, 100, 100, 0, 0, f"2025-01-15 10:{m:02d}:00", ""]
+            for m in range(start, min(start + 10, n_rows))
+        ]
+        return web.json_response({"candles": {"columns": columns, "data": rows}})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    request = MarketDataRequest(
+        security=Security(ticker="SBER", board="TQBR"),
+        timeframe=Timeframe.M1,
+        time_from=Timestamp("2025-01-15"),
+        time_till=Timestamp("2025-01-15"),
+    )
+    async with test_utils.TestServer(app) as server:
+        async with MarketDataAdapter() as adapter:
+            adapter.API = str(server.make_url("")).rstrip("/")
+            for n_rows, expected_starts in [
+                (0, [0]),
+                (7, [0]),
+                (10, [0, 10, 20, 30, 40]),
+                (25, [0, 10, 20, 30, 40]),
+            ]:
+                starts.clear()
+                candles = await adapter.load(request)
+                assert len(candles) == n_rows
+                assert sorted(starts) == expected_starts
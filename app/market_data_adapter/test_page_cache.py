@@ -0,0 +1,84 @@
+import os
+
+import pytest
+from aiohttp import test_utils, web
+
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
+from app.exceptions import MarketDataSourceException
+from app.market_data_adapter import MarketDataAdapter, MarketDataRequest, PageCache
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest.mark.asyncio
+async def test_page_cache_eviction(tmp_path):
+    cache = PageCache(directory=tmp_path, max_bytes=350)
+    for i in range(3):
+        await cache.put(str(i) * 64, b"x" * 100)
+        os.utime(cache._path(str(i) * 64), (i, i))
+    assert await cache.get("0" * 64) == b"x" * 100
+    await cache.put("3" * 64, b"x" * 100)
+    assert await cache.get("1" * 64) is None
+    assert await cache.get("0" * 64) is not None
+    assert await cache.get("2" * 64) is not None
+    assert await cache.get("3" * 64) is not None
+
+
+@pytest.mark.asyncio
+async def test_page_cache_overwrite(tmp_path):
+    cache = PageCache(directory=tmp_path, max_bytes=350)
+    for i in range(3):
+        await cache.put(str(i) * 64, b"x" * 100)
+    for _ in range(3):
+        await cache.put("0" * 64, b"y" * 100)
+    assert cache._size == 300
+    await cache.put("0" * 64, b"y" * 50)
+    assert cache._size == 250
+    for i in range(3):
+        assert await cache.get(str(i) * 64) is not None
+
+
+@pytest.mark.asyncio
+async def test_page_cache_replay(tmp_path):
+    columns = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+    row = [100, 101, 102, 99, 0, 0, "2025-01-15 10:00:00", "2025-01-15 10:59:59"]
+    n_requests = 0
+
+    async def handler(request: web.Request):
+        nonlocal n_requests
+        n_requests += 1
+        rows = [row] if request.query["start"] == "0" else []
+        return web.json_response({"candles": {"columns": columns, "data": rows}})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+
+    security = Security(ticker="SBER", board="TQBR")
+
+    def make_request(time_till: Timestamp) -> MarketDataRequest:
+        return MarketDataRequest(
+            security=security,
+            timeframe=Timeframe.H1,
+            time_from=Timestamp("2025-01-15"),
+            time_till=time_till,
+        )
+
+    async with test_utils.TestServer(app) as server:
+        cache = PageCache(directory=tmp_path, max_bytes=10**6)
+        async with MarketDataAdapter(page_cache=cache) as adapter:
+            adapter.API = str(server.make_url("")).rstrip("/")
+            candles = await adapter.load(make_request(Timestamp("2025-01-16")))
+            n_fetched = n_requests
+            assert await adapter.load(make_request(Timestamp("2025-01-16"))) == candles
+            assert n_requests == n_fetched
+            await adapter.load(make_request(Timestamp.today()))
+            await adapter.load(make_request(Timestamp.today()))
+            assert n_requests == 3 * n_fetched
+
+    cache = PageCache(directory=tmp_path, max_bytes=10**6, mode="only")
+    async with MarketDataAdapter(page_cache=cache) as adapter:
+        adapter.API = "http://127.0.0.1:9"
+        assert await adapter.load(make_request(Timestamp("2025-01-16"))) == candles
+        with pytest.raises(MarketDataSourceException):
+            await adapter.load(make_request(Timestamp("2025-01-17")))
@@ -0,0 +1,37 @@
+from time import monotonic
+
+import pytest
+
+from app.market_data_adapter import AdaptiveRateLimiter
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_wait():
+    limiter = AdaptiveRateLimiter(rate=20, burst=5)
+    started = monotonic()
+    for _ in range(10):
+        await limiter.acquire()
+    elapsed = monotonic() - started
+    assert 0.2 <= elapsed < 0.5
+    assert limiter.metrics.requests == 10
+    assert limiter.metrics.waits == 5
+
+
+def test_rate_limiter_aimd():
+    limiter = AdaptiveRateLimiter(rate=10, min_rate=1, max_rate=12, target_latency=1)
+    limiter.on_success(latency=0.1)
+    assert limiter.rate > 10
+    for _ in range(10):
+        limiter.on_success(latency=0.1)
+    assert limiter.rate == 12
+    limiter.on_success(latency=2)
+    assert limiter.rate < 12
+    for _ in range(10):
+        limiter.on_error()
+    assert limiter.rate == 1
+    status = limiter.status()
+    assert status["rate"] == 1
+    assert status["rate_increases"] == 4
+    assert status["rate_decreases"] == 5
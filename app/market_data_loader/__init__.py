@@ -1,9 +1,11 @@
 __all__ = [
     "MarketDataLoader",
     "MarketDataLoaderRequest",
+    "TradingCalendar",
 ]
 
 from app.market_data_loader.market_data_loader import (
     MarketDataLoader,
     MarketDataLoaderRequest,
 )
+from app.market_data_loader.trading_calendar import TradingCalendar
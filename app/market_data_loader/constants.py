@@ -0,0 +1,23 @@
+from app.core.entities import Timeframe
+
+# Candle spans are dates of the exchange local time
+TIMEZONE = "Europe/Moscow"
+
+# Missing date ranges are loaded in shards of SHARD_DAYS days, each shard is
+# stored together with its candle span as soon as it is fetched
+SHARD_DAYS = {
+    Timeframe.M1: 7,
+    Timeframe.M10: 30,
+    Timeframe.H1: 91,
+}
+
+# Shards fetched at once by all loaders of the process
+MAX_CONCURRENT_SHARDS = 8
+
+# Candles are written in chunks of WRITE_CHUNK_ROWS while a shard streams in,
+# same as CandleRepository.copy_threshold so that full chunks use COPY
+WRITE_CHUNK_ROWS = 5000
+
+# Today's candles are stored once complete, ISS publishes a candle shortly
+# after it ends
+TAIL_DELAY_SECONDS = 60
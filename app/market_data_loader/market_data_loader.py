@@ -1,8 +1,14 @@
 """Market Data Loader implementation."""
 
 import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime, time, timedelta
 
-from app.core.entities import Candle, CandleData, CandleSpan, Security, Timeframe
+from pytz import timezone
+
+from app.core.candle_columns import CandleColumns
+from app.core.date_time import Timestamp
+from app.core.entities import CandleSpan, Security, Timeframe
 from app.core.market_data_adapter import IMarketDataAdapter, MarketDataRequest
 from app.core.market_data_loader import IMarketDataLoader, MarketDataLoaderRequest
 from app.core.repository import (
@@ -10,14 +16,30 @@ from app.core.repository import (
     ICandleSpanRepository,
     ISecurityRepository,
 )
+from app.core.resampling import TIMEFRAME_MINUTES
+from app.core.trading_calendar import ITradingCalendar
 from app.core.unit_of_work import IUnitOfWork
 from app.logger.logger import ILogger
-from app.market_data_loader.range_operations import Range, rangediff, rangemerge
+from app.market_data_loader.constants import (
+    MAX_CONCURRENT_SHARDS,
+    SHARD_DAYS,
+    TAIL_DELAY_SECONDS,
+    TIMEZONE,
+    WRITE_CHUNK_ROWS,
+)
+from app.market_data_loader.range_operations import (
+    Range,
+    rangediff,
+    rangemerge,
+    rangesplit,
+)
 
 
 class MarketDataLoader(IMarketDataLoader):
     """Market Data Loader."""
 
+    write_chunk_rows = WRITE_CHUNK_ROWS
+
     def __init__(
         self,
         market_data_adapter: IMarketDataAdapter,
@@ -26,30 +48,307 @@ class MarketDataLoader(IMarketDataLoader):
         candle_span_repository: ICandleSpanRepository,
         unit_of_work: IUnitOfWork,
         logger: ILogger,
+        fetch_semaphore: asyncio.Semaphore | None = None,
+        trading_calendar: ITradingCalendar | None = None,
     ):
-        """Initialize."""
+        """
+        Initialize.
+
+        `fetch_semaphore` limits shards streamed at once, share it between
+        loaders to set a process-wide budget. Without `trading_calendar`
+        every calendar day is requested.
+        """
         self.market_data_adapter = market_data_adapter
         self.security_repository = security_repository
         self.candle_repository = candle_repository
         self.candle_span_repository = candle_span_repository
         self.unit_of_work = unit_of_work
         self.logger = logger
-        self._candles: list[CandleData] = []
+        if fetch_semaphore is None:
+            fetch_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SHARDS)
+        self.fetch_semaphore = fetch_semaphore
+        self.trading_calendar = trading_calendar
+        self._write_lock = asyncio.Lock()
 
     async def load_candles(self, request: MarketDataLoaderRequest) -> None:
-        """Load candles."""
-        request_batches = await self._construct_batches(request)
-        if not request_batches:
+        """
+        Load candles.
+
+        Missing periods are split into shards which are fetched concurrently.
+        Each shard is stored with its candle span once fetched, so a failed
+        shard does not discard the others. Today's candles are loaded after the
+        latest stored one, alongside the shards, and are not recorded in spans.
+        """
+        today = Timestamp(self._now().date())
+        shards = []
+        if request.time_from < today:
+            shards = await self._plan_shards(
+                MarketDataLoaderRequest(
+                    security=request.security,
+                    timeframe=request.timeframe,
+                    time_from=request.time_from,
+                    time_till=min(request.time_till, today - 1),
+                )
+            )
+        loads = [self._load_shard(shard) for shard in shards]
+        if request.time_till >= today:
+            loads += [self._load_tail(request.security, request.timeframe)]
+        if not loads:
             return
-        await asyncio.gather(*[self._load_batch(rb) for rb in request_batches])
-        candles = [Candle(**cd.__dict__) for cd in self._candles]
-        async with self.unit_of_work:
-            await self.candle_repository.add(candles)
-            await self._update_candle_spans(
-                request.security,
-                request.timeframe,
-                request_batches,
+        results = await asyncio.gather(*loads, return_exceptions=True)
+        errors = []
+        for shard, result in zip(shards, results):
+            if not isinstance(result, BaseException):
+                continue
+            errors += [result]
+            self.logger.error(
+                "shard_failed",
+                ticker=shard.security.ticker,
+                board=shard.security.board,
+                timeframe=shard.timeframe.value,
+                time_from=str(shard.time_from),
+                time_till=str(shard.time_till),
+                error=repr(result),
+            )
+        if len(results) > len(shards) and isinstance(results[-1], BaseException):
+            errors += [results[-1]]
+            self.logger.error(
+                "tail_failed",
+                ticker=request.security.ticker,
+                board=request.security.board,
+                timeframe=request.timeframe.value,
+                error=repr(results[-1]),
+            )
+        if errors:
+            raise errors[0]
+
+    async def _plan_shards(
+        self,
+        request: MarketDataLoaderRequest,
+    ) -> list[MarketDataLoaderRequest]:
+        """Return shards of closed days left to fetch, record non-trading days."""
+        request_batches = await self._construct_batches(request)
+        request_batches = await self._resample_stored(request_batches)
+        request_batches, non_trading = await self._drop_non_trading(request_batches)
+        if non_trading:
+            async with self._write_lock:
+                async with self.unit_of_work:
+                    await self._update_candle_spans(
+                        request.security,
+                        request.timeframe,
+                        non_trading,
+                    )
+        return [
+            shard for batch in request_batches for shard in self._split_batch(batch)
+        ]
+
+    async def _load_tail(self, security: Security, timeframe: Timeframe) -> None:
+        """
+        Load today's complete candles after the latest stored one.
+
+        The latest stored candle is the high-water mark of the series, so each
+        call requests only the tail of the session, usually a single page.
+        """
+        now = self._now()
+        today = Timestamp(now.date())
+        repo = self.candle_repository.filter_by_security(security)
+        latest = await repo.filter_by_timeframe(timeframe).latest()
+        time_from = today
+        if latest is not None and latest.timestamp.date() >= today.date():
+            time_from = latest.timestamp
+        md_request = MarketDataRequest(
+            security=security,
+            timeframe=timeframe,
+            time_from=time_from,
+            time_till=today,
+        )
+        bar = timedelta(minutes=TIMEFRAME_MINUTES[timeframe])
+        complete_till = (
+            now.dt - bar - timedelta(seconds=TAIL_DELAY_SECONDS)
+        ).timestamp()
+        after = -1 if latest is None else latest.timestamp.dt.timestamp()
+        candles = CandleColumns()
+        async for page in self.market_data_adapter.stream(md_request):
+            candles.extend(page.filter(lambda t: after < t <= complete_till))
+        async with self._write_lock:
+            async with self.unit_of_work:
+                await self.candle_repository.add_columns(security, timeframe, candles)
+
+    def _now(self) -> Timestamp:
+        return Timestamp.now(TIMEZONE)
+
+    async def _resample_stored(
+        self,
+        batches: list[MarketDataLoaderRequest],
+    ) -> list[MarketDataLoaderRequest]:
+        """
+        Build M10 and H1 bars from stored M1 candles where M1 spans cover them.
+
+        Return the parts of the batches which still need to be loaded.
+        """
+        if not batches or batches[0].timeframe == Timeframe.M1:
+            return batches
+        security, timeframe = batches[0].security, batches[0].timeframe
+        repo = self.candle_span_repository.filter_by_security(security)
+        repo = repo.filter_by_timeframe(Timeframe.M1)
+        m1_ranges = [Range(sr.date_from, sr.date_till) async for sr in repo]
+        to_load: list[Range] = []
+        stored: list[Range] = []
+        for batch in batches:
+            rng = Range(batch.time_from, batch.time_till)
+            missing = rangediff(remove_what=list(m1_ranges), remove_from=rng)
+            to_load += missing
+            stored += rangediff(remove_what=list(missing), remove_from=rng)
+        for rng in stored:
+            for part in rangesplit(rng, SHARD_DAYS[timeframe]):
+                async with self._write_lock:
+                    async with self.unit_of_work:
+                        await self.candle_repository.resample(
+                            security,
+                            Timeframe.M1,
+                            timeframe,
+                            self._day_start(part.left),
+                            self._day_start(part.right + 1),
+                        )
+                        await self._update_candle_spans(
+                            security, timeframe, self._to_batches(batches, [part])
+                        )
+        return self._to_batches(batches, to_load)
+
+    def _to_timestamp(self, epoch: int) -> Timestamp:
+        return Timestamp(datetime.fromtimestamp(epoch, timezone(TIMEZONE)))
+
+    def _day_start(self, day: Timestamp) -> Timestamp:
+        return Timestamp(datetime.combine(day.date(), time()), TIMEZONE)
+
+    async def _drop_non_trading(
+        self,
+        batches: list[MarketDataLoaderRequest],
+    ) -> tuple[list[MarketDataLoaderRequest], list[MarketDataLoaderRequest]]:
+        """
+        Trim closed days without trading off the batches.
+
+        Return batches to load and periods which have no candles. Batches are
+        not split on gaps inside them, to keep the number of requests down.
+        """
+        if self.trading_calendar is None:
+            return batches, []
+        last_closed = Timestamp(self._now().date()) - 1
+        to_load: list[Range] = []
+        no_candles: list[Range] = []
+        for batch in batches:
+            if batch.time_from > last_closed:
+                to_load += [Range(batch.time_from, batch.time_till)]
+                continue
+            closed = Range(batch.time_from, min(batch.time_till, last_closed))
+            days = await self.trading_calendar.trading_days(
+                batch.security, batch.timeframe, closed.left, closed.right
             )
+            trading = [Range(days[0], days[-1])] if days else []
+            to_load += trading
+            no_candles += rangediff(remove_what=list(trading), remove_from=closed)
+            if batch.time_till > last_closed:
+                to_load += [Range(last_closed + 1, batch.time_till)]
+        return (
+            self._to_batches(batches, to_load),
+            self._to_batches(batches, no_candles),
+        )
+
+    def _to_batches(
+        self,
+        batches: list[MarketDataLoaderRequest],
+        ranges: list[Range],
+    ) -> list[MarketDataLoaderRequest]:
+        return [
+            MarketDataLoaderRequest(
+                security=batches[0].security,
+                timeframe=batches[0].timeframe,
+                time_from=rng.left,
+                time_till=rng.right,
+            )
+            for rng in ranges
+        ]
+
+    def _split_batch(
+        self,
+        batch: MarketDataLoaderRequest,
+    ) -> list[MarketDataLoaderRequest]:
+        """Split batch into shards of SHARD_DAYS days."""
+        ranges = rangesplit(
+            Range(batch.time_from, batch.time_till),
+            SHARD_DAYS[batch.timeframe],
+        )
+        return [
+            MarketDataLoaderRequest(
+                security=batch.security,
+                timeframe=batch.timeframe,
+                time_from=rng.left,
+                time_till=rng.right,
+            )
+            for rng in ranges
+        ]
+
+    async def _load_shard(self, shard: MarketDataLoaderRequest) -> None:
+        """
+        Stream shard into the repository in chunks.
+
+        Each chunk is committed together with the span of the days it
+        completes, only the last chunk of the shard is held in memory.
+        """
+        chunk = CandleColumns()
+        first: Timestamp | None = None
+        async with self.fetch_semaphore:
+            async for page in self._stream_batch(shard):
+                chunk.extend(page)
+                if len(chunk) < self.write_chunk_rows:
+                    continue
+                if first is None:
+                    first = self._to_timestamp(chunk.timestamp[0])
+                last = self._to_timestamp(chunk.timestamp[-1])
+                covered = self._complete_days(shard, first, last)
+                await self._write_chunk(shard, chunk, covered)
+                chunk = CandleColumns()
+        await self._write_chunk(shard, chunk, Range(shard.time_from, shard.time_till))
+
+    def _complete_days(
+        self,
+        shard: MarketDataLoaderRequest,
+        first: Timestamp,
+        last: Timestamp,
+    ) -> Range | None:
+        """
+        Return days of the shard fully covered by candles streamed so far.
+
+        Pages come in time order, ascending or descending, so all days between
+        the shard edge and the day of the last candle are complete.
+        """
+        if last > first:
+            rng = Range(shard.time_from, Timestamp(last.date()) - 1)
+        elif first > last:
+            rng = Range(Timestamp(last.date()) + 1, shard.time_till)
+        else:
+            return None
+        return rng if rng.right >= rng.left else None
+
+    async def _write_chunk(
+        self,
+        shard: MarketDataLoaderRequest,
+        candles: CandleColumns,
+        covered: Range | None,
+    ) -> None:
+        """Store candles and covered days in one transaction."""
+        # Repositories share one connection, transactions must not interleave
+        async with self._write_lock:
+            async with self.unit_of_work:
+                await self.candle_repository.add_columns(
+                    shard.security, shard.timeframe, candles
+                )
+                if covered is not None:
+                    await self._update_candle_spans(
+                        shard.security,
+                        shard.timeframe,
+                        self._to_batches([shard], [covered]),
+                    )
 
     async def _construct_batches(
         self,
@@ -107,13 +406,15 @@ class MarketDataLoader(IMarketDataLoader):
         await self.candle_span_repository.remove(span_records)
         await self.candle_span_repository.add(updated_spans)
 
-    async def _load_batch(self, request: MarketDataLoaderRequest) -> None:
-        """Load market data."""
+    def _stream_batch(
+        self,
+        request: MarketDataLoaderRequest,
+    ) -> AsyncIterator[CandleColumns]:
+        """Stream market data page by page."""
         md_request = MarketDataRequest(
             security=request.security,
             timeframe=request.timeframe,
             time_from=request.time_from,
             time_till=request.time_till,
         )
-        candles = await self.market_data_adapter.load(md_request)
-        self._candles += candles
+        return self.market_data_adapter.stream(md_request)
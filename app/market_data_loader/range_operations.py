@@ -67,3 +67,13 @@ def rangediff(remove_what: list[Range], remove_from: Range) -> list[Range]:
 
     out += [remove_from]
     return out
+
+
+def rangesplit(rng: Range, size: int) -> list[Range]:
+    out: list[Range] = []
+    left = rng.left
+    while left <= rng.right:
+        right = min(left + (size - 1), rng.right)
+        out += [Range(left, right)]
+        left = right + 1
+    return out
@@ -6,6 +6,7 @@ import pytest
 
 from app.core.date_time import Timestamp
 from app.core.entities import Security, Timeframe
+from app.core.market_data_adapter import MarketDataRequest
 from app.core.market_data_loader import IMarketDataLoader, MarketDataLoaderRequest
 from app.core.repository import (
     ICandleRepository,
@@ -13,12 +14,41 @@ from app.core.repository import (
     IRepository,
     ISecurityRepository,
 )
-from app.dependency.test import Container, FakeMarketDataAdapter
-from app.market_data_loader import MarketDataLoader
+from app.dependency.test import (
+    Container,
+    FakeMarketDataAdapter,
+    WeekdayMarketDataAdapter,
+)
+from app.exceptions import MarketDataSourceException
+from app.market_data_loader import MarketDataLoader, TradingCalendar
 
 dependencies = Container()
 
 
+class FailingMarketDataAdapter(FakeMarketDataAdapter):
+    """
+    Fake adapter failing for requests starting at or after `fail_from`.
+
+    Other requests fail after `fail_after_pages` pages of `page_size` candles.
+    """
+
+    fail_from = Timestamp("2025-04-01")
+
+    def __init__(self, page_size: int = 500, fail_after_pages: int | None = None):
+        self.page_size = page_size
+        self.fail_after_pages = fail_after_pages
+
+    async def stream(self, request: MarketDataRequest):
+        if request.time_from >= self.fail_from:
+            raise MarketDataSourceException("ISS is not available")
+        n_pages = 0
+        async for page in super().stream(request):
+            if n_pages == self.fail_after_pages:
+                raise MarketDataSourceException("Connection lost")
+            n_pages += 1
+            yield page
+
+
 class TestCases:
     """Test Cases for IMarketDataLoader (interface)."""
 
@@ -222,6 +252,338 @@ class TestCases:
             candle_span_repo=candle_span_repo,
         )
 
+    @staticmethod
+    async def case_load_failed_shard(
+        market_data_loader: IMarketDataLoader,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+        candle_span_repo: ICandleSpanRepository,
+    ):
+        """
+        Load a long period, one of the shards fails.
+
+        Shards loaded before the failure should be stored with their spans.
+        """
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        test_tf = Timeframe.H1
+
+        security = Security(ticker=test_ticker, board=test_board)
+        await security_repo.add([security])
+
+        request = MarketDataLoaderRequest(
+            security=security,
+            timeframe=test_tf,
+            time_from=Timestamp("2025-01-01"),
+            time_till=Timestamp("2025-06-30"),
+        )
+        with pytest.raises(MarketDataSourceException):
+            await market_data_loader.load_candles(request)
+
+        await TestCases._check_count(
+            repo=candle_repo.filter_by_security(security).filter_by_timeframe(test_tf),
+            expected_count=91 * FakeMarketDataAdapter.n_hours,
+        )
+        candle_span_records = [
+            rec async for rec in candle_span_repo.filter_by_security(security=security)
+        ]
+        assert len(candle_span_records) == 1
+        assert candle_span_records[0].date_from == Timestamp("2025-01-01")
+        assert candle_span_records[0].date_till == Timestamp("2025-04-01")
+
+        await TestCases._clean_up(
+            ticker=test_ticker,
+            security_repo=security_repo,
+            candle_repo=candle_repo,
+            candle_span_repo=candle_span_repo,
+        )
+
+    @staticmethod
+    async def case_skip_non_trading_days(
+        market_data_loader: IMarketDataLoader,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+        candle_span_repo: ICandleSpanRepository,
+    ):
+        """
+        Load periods with weekends.
+
+        Days without trading should not be requested and should be stored as
+        covered by candle spans.
+        """
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        test_tf = Timeframe.H1
+
+        security = Security(ticker=test_ticker, board=test_board)
+        await security_repo.add([security])
+
+        request = MarketDataLoaderRequest(
+            security=security,
+            timeframe=test_tf,
+            time_from=Timestamp("2025-01-04"),
+            time_till=Timestamp("2025-01-05"),
+        )
+        await market_data_loader.load_candles(request)
+        await TestCases._check_count(
+            repo=candle_repo.filter_by_security(security).filter_by_timeframe(test_tf),
+            expected_count=0,
+        )
+
+        request = MarketDataLoaderRequest(
+            security=security,
+            timeframe=test_tf,
+            time_from=Timestamp("2025-01-01"),
+            time_till=Timestamp("2025-01-12"),
+        )
+        mdl: MarketDataLoader = market_data_loader
+        batches = await mdl._construct_batches(request)
+        batches, non_trading = await mdl._drop_non_trading(batches)
+        assert [(b.time_from, b.time_till) for b in batches] == [
+            (Timestamp("2025-01-01"), Timestamp("2025-01-03")),
+            (Timestamp("2025-01-06"), Timestamp("2025-01-10")),
+        ]
+        assert [(b.time_from, b.time_till) for b in non_trading] == [
+            (Timestamp("2025-01-11"), Timestamp("2025-01-12")),
+        ]
+
+        # just after midnight in Moscow, still the day before in UTC,
+        # days from today on are not closed and are left to load
+        mdl._now = lambda: Timestamp("2025-01-11 00:30:00+03:00")
+        batches = await mdl._construct_batches(request)
+        batches, non_trading = await mdl._drop_non_trading(batches)
+        del mdl._now
+        assert [(b.time_from, b.time_till) for b in batches] == [
+            (Timestamp("2025-01-01"), Timestamp("2025-01-03")),
+            (Timestamp("2025-01-06"), Timestamp("2025-01-10")),
+            (Timestamp("2025-01-11"), Timestamp("2025-01-12")),
+        ]
+        assert non_trading == []
+
+        await market_data_loader.load_candles(request)
+        await TestCases._check_count(
+            repo=candle_repo.filter_by_security(security).filter_by_timeframe(test_tf),
+            expected_count=8 * FakeMarketDataAdapter.n_hours,
+        )
+        candle_span_records = [
+            rec async for rec in candle_span_repo.filter_by_security(security=security)
+        ]
+        assert len(candle_span_records) == 1
+        assert candle_span_records[0].date_from == Timestamp("2025-01-01")
+        assert candle_span_records[0].date_till == Timestamp("2025-01-12")
+
+        await TestCases._clean_up(
+            ticker=test_ticker,
+            security_repo=security_repo,
+            candle_repo=candle_repo,
+            candle_span_repo=candle_span_repo,
+        )
+
+    @staticmethod
+    async def case_load_interrupted_stream(
+        market_data_loader: IMarketDataLoader,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+        candle_span_repo: ICandleSpanRepository,
+    ):
+        """
+        Candle stream breaks in the middle of a shard.
+
+        Committed chunks should stay stored, with spans of the complete days.
+        """
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        test_tf = Timeframe.H1
+
+        security = Security(ticker=test_ticker, board=test_board)
+        await security_repo.add([security])
+
+        request = MarketDataLoaderRequest(
+            security=security,
+            timeframe=test_tf,
+            time_from=Timestamp("2025-01-01"),
+            time_till=Timestamp("2025-01-30"),
+        )
+        with pytest.raises(MarketDataSourceException):
+            await market_data_loader.load_candles(request)
+
+        # pages of 20 candles, chunks of 50 rows: the first chunk of 60 candles
+        # is committed, 40 candles of the next chunk are lost
+        await TestCases._check_count(
+            repo=candle_repo.filter_by_security(security).filter_by_timeframe(test_tf),
+            expected_count=60,
+        )
+        candle_span_records = [
+            rec async for rec in candle_span_repo.filter_by_security(security=security)
+        ]
+        assert len(candle_span_records) == 1
+        assert candle_span_records[0].date_from == Timestamp("2025-01-01")
+        assert candle_span_records[0].date_till == Timestamp("2025-01-06")
+
+        await TestCases._clean_up(
+            ticker=test_ticker,
+            security_repo=security_repo,
+            candle_repo=candle_repo,
+            candle_span_repo=candle_span_repo,
+        )
+
+    @staticmethod
+    async def case_resample_stored_m1(
+        m1_loader: IMarketDataLoader,
+        offline_loader: IMarketDataLoader,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+        candle_span_repo: ICandleSpanRepository,
+    ):
+        """
+        Load H1 for a period with stored M1 candles.
+
+        Bars should be built from M1 candles, without requests to the source.
+        """
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+
+        security = Security(ticker=test_ticker, board=test_board)
+        await security_repo.add([security])
+
+        request = MarketDataLoaderRequest(
+            security=security,
+            timeframe=Timeframe.M1,
+            time_from=Timestamp("2025-01-13"),
+            time_till=Timestamp("2025-01-14"),
+        )
+        await m1_loader.load_candles(request)
+
+        request = MarketDataLoaderRequest(
+            security=security,
+            timeframe=Timeframe.H1,
+            time_from=Timestamp("2025-01-13"),
+            time_till=Timestamp("2025-01-14"),
+        )
+        await offline_loader.load_candles(request)
+
+        repo = candle_repo.filter_by_security(security)
+        bars = [c async for c in repo.filter_by_timeframe(Timeframe.H1)]
+        assert len(bars) == 2 * FakeMarketDataAdapter.n_hours
+        assert str(bars[0].timestamp) == "2025-01-13T10:00:00+03:00"
+        candle_span_records = [
+            rec
+            async for rec in candle_span_repo.filter_by_security(
+                security=security
+            ).filter_by_timeframe(Timeframe.H1)
+        ]
+        assert len(candle_span_records) == 1
+        assert candle_span_records[0].date_from == Timestamp("2025-01-13")
+        assert candle_span_records[0].date_till == Timestamp("2025-01-14")
+
+        await TestCases._clean_up(
+            ticker=test_ticker,
+            security_repo=security_repo,
+            candle_repo=candle_repo,
+            candle_span_repo=candle_span_repo,
+        )
+
+    @staticmethod
+    async def case_load_intraday_tail(
+        market_data_loader: IMarketDataLoader,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+        candle_span_repo: ICandleSpanRepository,
+    ):
+        """
+        Load a period ending today, twice during the session.
+
+        Today's complete candles should be stored, without a span for today.
+        The second run should request only candles after the latest stored one.
+        """
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        test_tf = Timeframe.M10
+
+        security = Security(ticker=test_ticker, board=test_board)
+        await security_repo.add([security])
+
+        request = MarketDataLoaderRequest(
+            security=security,
+            timeframe=test_tf,
+            time_from=Timestamp("2025-01-14"),
+            time_till=Timestamp("2025-01-15"),
+        )
+        mdl: MarketDataLoader = market_data_loader
+
+        # bars of 10 minutes complete by 12:30:30 with 1 minute delay: 10:00-12:10
+        mdl._now = lambda: Timestamp("2025-01-15 12:30:30+03:00")
+        await market_data_loader.load_candles(request)
+        repo = candle_repo.filter_by_security(security).filter_by_timeframe(test_tf)
+        await TestCases._check_count(repo=repo, expected_count=49 + 14)
+
+        mdl._now = lambda: Timestamp("2025-01-15 13:05:30+03:00")
+        await market_data_loader.load_candles(request)
+        repo = candle_repo.filter_by_security(security).filter_by_timeframe(test_tf)
+        await TestCases._check_count(repo=repo, expected_count=49 + 18)
+        latest = await repo.latest()
+        assert latest.timestamp == Timestamp("2025-01-15 12:50:00+03:00")
+
+        candle_span_records = [
+            rec async for rec in candle_span_repo.filter_by_security(security=security)
+        ]
+        assert len(candle_span_records) == 1
+        assert candle_span_records[0].date_from == Timestamp("2025-01-14")
+        assert candle_span_records[0].date_till == Timestamp("2025-01-14")
+
+        await TestCases._clean_up(
+            ticker=test_ticker,
+            security_repo=security_repo,
+            candle_repo=candle_repo,
+            candle_span_repo=candle_span_repo,
+        )
+
+    @staticmethod
+    async def case_load_failed_tail(
+        market_data_loader: IMarketDataLoader,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+        candle_span_repo: ICandleSpanRepository,
+    ):
+        """
+        Load a period ending today, loading today's candles fails.
+
+        Closed days should still be stored with their span.
+        """
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        test_tf = Timeframe.M10
+
+        security = Security(ticker=test_ticker, board=test_board)
+        await security_repo.add([security])
+
+        request = MarketDataLoaderRequest(
+            security=security,
+            timeframe=test_tf,
+            time_from=Timestamp("2025-01-13"),
+            time_till=Timestamp("2025-01-15"),
+        )
+        mdl: MarketDataLoader = market_data_loader
+        mdl._now = lambda: Timestamp("2025-01-15 12:30:30+03:00")
+        with pytest.raises(MarketDataSourceException):
+            await market_data_loader.load_candles(request)
+
+        repo = candle_repo.filter_by_security(security).filter_by_timeframe(test_tf)
+        await TestCases._check_count(repo=repo, expected_count=2 * 49)
+        candle_span_records = [
+            rec async for rec in candle_span_repo.filter_by_security(security=security)
+        ]
+        assert len(candle_span_records) == 1
+        assert candle_span_records[0].date_from == Timestamp("2025-01-13")
+        assert candle_span_records[0].date_till == Timestamp("2025-01-14")
+
+        await TestCases._clean_up(
+            ticker=test_ticker,
+            security_repo=security_repo,
+            candle_repo=candle_repo,
+            candle_span_repo=candle_span_repo,
+        )
+
 
 class Test:
     """Tests for MarketDataLoader (implementation)."""
@@ -301,3 +663,163 @@ class Test:
                 candle_repo=candle_repository,
                 candle_span_repo=candle_span_repository,
             )
+
+    @pytest.mark.asyncio
+    async def test_load_failed_shard(self):
+        """Load a long period, one of the shards fails."""
+        async with (
+            dependencies.get_security_repository() as security_repository,
+            dependencies.get_candle_repository() as candle_repository,
+            dependencies.get_candle_span_repository() as candle_span_repository,
+            dependencies.get_unit_of_work() as uow,
+        ):
+            market_data_loader = MarketDataLoader(
+                market_data_adapter=FailingMarketDataAdapter(),
+                security_repository=security_repository,
+                candle_repository=candle_repository,
+                candle_span_repository=candle_span_repository,
+                unit_of_work=uow,
+                logger=dependencies.get_logger(),
+            )
+            await TestCases.case_load_failed_shard(
+                market_data_loader=market_data_loader,
+                security_repo=security_repository,
+                candle_repo=candle_repository,
+                candle_span_repo=candle_span_repository,
+            )
+
+    @pytest.mark.asyncio
+    async def test_load_failed_tail(self):
+        """Load a period ending today, loading today's candles fails."""
+        async with (
+            dependencies.get_security_repository() as security_repository,
+            dependencies.get_candle_repository() as candle_repository,
+            dependencies.get_candle_span_repository() as candle_span_repository,
+            dependencies.get_unit_of_work() as uow,
+        ):
+            market_data_adapter = FailingMarketDataAdapter()
+            market_data_adapter.fail_from = Timestamp("2025-01-15")
+            market_data_loader = MarketDataLoader(
+                market_data_adapter=market_data_adapter,
+                security_repository=security_repository,
+                candle_repository=candle_repository,
+                candle_span_repository=candle_span_repository,
+                unit_of_work=uow,
+                logger=dependencies.get_logger(),
+            )
+            await TestCases.case_load_failed_tail(
+                market_data_loader=market_data_loader,
+                security_repo=security_repository,
+                candle_repo=candle_repository,
+                candle_span_repo=candle_span_repository,
+            )
+
+    @pytest.mark.asyncio
+    async def test_skip_non_trading_days(self):
+        """Load periods with weekends."""
+        async with (
+            dependencies.get_security_repository() as security_repository,
+            dependencies.get_candle_repository() as candle_repository,
+            dependencies.get_candle_span_repository() as candle_span_repository,
+            dependencies.get_unit_of_work() as uow,
+        ):
+            market_data_adapter = WeekdayMarketDataAdapter()
+            market_data_loader = MarketDataLoader(
+                market_data_adapter=market_data_adapter,
+                security_repository=security_repository,
+                candle_repository=candle_repository,
+                candle_span_repository=candle_span_repository,
+                unit_of_work=uow,
+                logger=dependencies.get_logger(),
+                trading_calendar=TradingCalendar(market_data_adapter),
+            )
+            await TestCases.case_skip_non_trading_days(
+                market_data_loader=market_data_loader,
+                security_repo=security_repository,
+                candle_repo=candle_repository,
+                candle_span_repo=candle_span_repository,
+            )
+
+    @pytest.mark.asyncio
+    async def test_load_interrupted_stream(self):
+        """Candle stream breaks in the middle of a shard."""
+        async with (
+            dependencies.get_security_repository() as security_repository,
+            dependencies.get_candle_repository() as candle_repository,
+            dependencies.get_candle_span_repository() as candle_span_repository,
+            dependencies.get_unit_of_work() as uow,
+        ):
+            market_data_loader = MarketDataLoader(
+                market_data_adapter=FailingMarketDataAdapter(
+                    page_size=20, fail_after_pages=5
+                ),
+                security_repository=security_repository,
+                candle_repository=candle_repository,
+                candle_span_repository=candle_span_repository,
+                unit_of_work=uow,
+                logger=dependencies.get_logger(),
+            )
+            market_data_loader.write_chunk_rows = 50
+            await TestCases.case_load_interrupted_stream(
+                market_data_loader=market_data_loader,
+                security_repo=security_repository,
+                candle_repo=candle_repository,
+                candle_span_repo=candle_span_repository,
+            )
+
+    @pytest.mark.asyncio
+    async def test_resample_stored_m1(self):
+        """Load H1 for a period with stored M1 candles."""
+        async with (
+            dependencies.get_security_repository() as security_repository,
+            dependencies.get_candle_repository() as candle_repository,
+            dependencies.get_candle_span_repository() as candle_span_repository,
+            dependencies.get_market_data_adapter() as market_data_adapter,
+            dependencies.get_unit_of_work() as uow,
+        ):
+            loaders = [
+                MarketDataLoader(
+                    market_data_adapter=adapter,
+                    security_repository=security_repository,
+                    candle_repository=candle_repository,
+                    candle_span_repository=candle_span_repository,
+                    unit_of_work=uow,
+                    logger=dependencies.get_logger(),
+                )
+                for adapter in [
+                    market_data_adapter,
+                    FailingMarketDataAdapter(fail_after_pages=0),
+                ]
+            ]
+            await TestCases.case_resample_stored_m1(
+                m1_loader=loaders[0],
+                offline_loader=loaders[1],
+                security_repo=security_repository,
+                candle_repo=candle_repository,
+                candle_span_repo=candle_span_repository,
+            )
+
+    @pytest.mark.asyncio
+    async def test_load_intraday_tail(self):
+        """Load a period ending today, twice during the session."""
+        async with (
+            dependencies.get_security_repository() as security_repository,
+            dependencies.get_candle_repository() as candle_repository,
+            dependencies.get_candle_span_repository() as candle_span_repository,
+            dependencies.get_market_data_adapter() as market_data_adapter,
+            dependencies.get_unit_of_work() as uow,
+        ):
+            market_data_loader = MarketDataLoader(
+                market_data_adapter=market_data_adapter,
+                security_repository=security_repository,
+                candle_repository=candle_repository,
+                candle_span_repository=candle_span_repository,
+                unit_of_work=uow,
+                logger=dependencies.get_logger(),
+            )
+            await TestCases.case_load_intraday_tail(
+                market_data_loader=market_data_loader,
+                security_repo=security_repository,
+                candle_repo=candle_repository,
+                candle_span_repo=candle_span_repository,
+            )
@@ -0,0 +1,18 @@
+from app.core.date_time import Timestamp
+from app.market_data_loader.range_operations import Range, rangesplit
+
+
+def test_rangesplit():
+    t = Timestamp("2025-01-01")
+
+    assert rangesplit(Range(t, t + 6), 7) == [Range(t, t + 6)]
+
+    assert rangesplit(Range(t, t + 15), 7) == [
+        Range(t, t + 6),
+        Range(t + 7, t + 13),
+        Range(t + 14, t + 15),
+    ]
+
+    assert rangesplit(Range(t, t), 7) == [Range(t, t)]
+
+    assert rangesplit(Range(t + 1, t), 7) == []
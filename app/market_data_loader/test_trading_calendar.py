@@ -0,0 +1,51 @@
+"""Tests for Trading Calendar."""
+
+import pytest
+
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
+from app.dependency.test import WeekdayMarketDataAdapter
+from app.market_data_loader import TradingCalendar
+
+
+@pytest.mark.asyncio
+async def test_trading_calendar():
+    adapter = WeekdayMarketDataAdapter()
+    calendar = TradingCalendar(adapter)
+    security = Security(ticker="SBER", board="TQBR")
+
+    days = await calendar.trading_days(
+        security, Timeframe.H1, Timestamp("2025-01-01"), Timestamp("2025-01-12")
+    )
+    assert [str(d) for d in days] == [
+        "2025-01-01",
+        "2025-01-02",
+        "2025-01-03",
+        "2025-01-06",
+        "2025-01-07",
+        "2025-01-08",
+        "2025-01-09",
+        "2025-01-10",
+    ]
+
+    days = await calendar.trading_days(
+        security, Timeframe.H1, Timestamp("2025-01-04"), Timestamp("2025-01-05")
+    )
+    assert days == []
+
+    days = await calendar.trading_days(
+        security, Timeframe.M1, Timestamp("2025-01-01"), Timestamp("2025-01-14")
+    )
+    assert [str(d) for d in days] == [
+        "2025-01-08",
+        "2025-01-09",
+        "2025-01-10",
+        "2025-01-13",
+        "2025-01-14",
+    ]
+
+    assert adapter.border_requests == 1
+    assert adapter.day_requests == [
+        (Timestamp("2025-01-01"), Timestamp("2025-01-12")),
+        (Timestamp("2025-01-13"), Timestamp("2025-01-14")),
+    ]
@@ -0,0 +1,69 @@
+"""Trading calendar."""
+
+import asyncio
+
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
+from app.core.market_data_adapter import CandleBorders, IMarketDataAdapter
+from app.core.trading_calendar import ITradingCalendar
+from app.market_data_loader.range_operations import Range, rangediff, rangemerge
+
+
+class TradingCalendar(ITradingCalendar):
+    """
+    Trading days of securities, loaded from the market data source.
+
+    Candle borders limit the days of each timeframe. Within them, days with a
+    daily candle are trading days. Days are kept in memory and each period is
+    fetched once. Borders are refreshed once a day. Only closed days should be
+    asked for, today's candles are not final.
+    """
+
+    def __init__(self, market_data_adapter: IMarketDataAdapter):
+        """Initialize."""
+        self.market_data_adapter = market_data_adapter
+        self._borders: dict[tuple, tuple[Timestamp, list[CandleBorders]]] = {}
+        self._days: dict[tuple, set[Timestamp]] = {}
+        self._known: dict[tuple, list[Range]] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+
+    async def trading_days(
+        self,
+        security: Security,
+        timeframe: Timeframe,
+        time_from: Timestamp,
+        time_till: Timestamp,
+    ) -> list[Timestamp]:
+        key = (security.board, security.ticker)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            borders = await self._get_borders(key, security)
+            border = next((b for b in borders if b.timeframe == timeframe), None)
+            if border is None:
+                return []
+            time_from = max(time_from, border.time_from)
+            time_till = min(time_till, border.time_till)
+            if time_from > time_till:
+                return []
+            await self._load_days(key, security, Range(time_from, time_till))
+        return sorted(d for d in self._days[key] if time_from <= d <= time_till)
+
+    async def _get_borders(self, key: tuple, security: Security) -> list[CandleBorders]:
+        today = Timestamp.today()
+        cached = self._borders.get(key)
+        if cached is None or cached[0] != today:
+            borders = await self.market_data_adapter.load_candle_borders(security)
+            cached = self._borders[key] = (today, borders)
+        return cached[1]
+
+    async def _load_days(self, key: tuple, security: Security, rng: Range) -> None:
+        """Fetch trading days of the parts of `rng` not fetched before."""
+        known = self._known.get(key, [])
+        days = self._days.setdefault(key, set())
+        missing = rangediff(remove_what=list(known), remove_from=rng)
+        for m in missing:
+            days.update(
+                await self.market_data_adapter.load_trading_days(
+                    security, m.left, m.right
+                )
+            )
+        self._known[key] = rangemerge([*known, *missing])
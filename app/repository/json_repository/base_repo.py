@@ -35,6 +35,14 @@ class BaseRepository(IRepository):
             return record
         raise StopAsyncIteration
 
+    @override
+    def stream(self, yield_per: int = 1000) -> "IRepository":
+        return self.__class__(repo=self)
+
+    @override
+    async def remove_all(self) -> None:
+        await self.remove([self._row_to_entity(row) for row in self._rows])
+
     def _row_to_entity(self, row: dict) -> Entity:
         pass
 
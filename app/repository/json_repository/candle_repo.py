@@ -4,6 +4,7 @@ from uuid import UUID
 from app.core.date_time import Timestamp
 from app.core.entities import Candle, Security, Timeframe
 from app.core.repository import ICandleRepository
+from app.core.resampling import resample
 from app.repository.json_repository.base_repo import BaseRepository
 from app.repository.json_repository.security_repo import SecurityRepository
 
@@ -72,6 +73,28 @@ class CandleRepository(BaseRepository, ICandleRepository):
         repo._rows += [i for i in items_to_insert if not_dublicate(i, repo._rows)]
         repo._dump_rows("candle.json")
 
+    @override
+    async def add_columns(self, security, timeframe, columns):
+        await self.add(
+            [
+                Candle(**cd.__dict__)
+                for cd in columns.to_candles(security, timeframe, "Europe/Moscow")
+            ]
+        )
+
+    @override
+    async def latest(self):
+        candles = [c async for c in self]
+        return max(candles, key=lambda c: c.timestamp.dt, default=None)
+
+    @override
+    async def resample(self, security, source, target, time_from, time_till):
+        repo = self.filter_by_security(security).filter_by_timeframe(source)
+        candles = [
+            c async for c in repo if time_from.dt <= c.timestamp.dt < time_till.dt
+        ]
+        await self.add(resample(candles, target))
+
     async def _get_security_id(self, security: Security) -> UUID:
         if security in self._securities:
             return self._securities[security]
@@ -128,6 +151,14 @@ class CandleRepository(BaseRepository, ICandleRepository):
         repo._rows = rows
         return repo
 
+    @override
+    def filter_by_timestamp_gt(self, timestamp):
+        filter = lambda a, b: Timestamp(a["timestamp"]).dt > b.dt
+        repo = CandleRepository(repo=self)
+        rows = [r for r in self._rows if filter(r, timestamp)]
+        repo._rows = rows
+        return repo
+
     @override
     def filter_by_timestamp_lte(self, timestamp):
         filter = lambda a, b: Timestamp(a["timestamp"]).date() <= b.date()
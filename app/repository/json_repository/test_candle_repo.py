@@ -30,6 +30,17 @@ class TestCandleRepoJson:
                 candle_repo,
             )
 
+    @pytest.mark.asyncio
+    async def test_add_columns(self):
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+
+            await TestCases.execute_add_columns(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
     @pytest.mark.asyncio
     async def test_slicing(self):
         async with dependencies.get_repos() as elements:
@@ -51,3 +62,56 @@ class TestCandleRepoJson:
                 security_repo,
                 candle_repo,
             )
+
+    @pytest.mark.asyncio
+    async def test_keyset_pagination(self):
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+
+            await TestCases.execute_keyset_pagination(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_streaming(self):
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+
+            await TestCases.execute_streaming(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_remove_all(self):
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+
+            await TestCases.execute_remove_all(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_resample(self):
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_resample(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_latest(self):
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_latest(
+                uow,
+                security_repo,
+                candle_repo,
+            )
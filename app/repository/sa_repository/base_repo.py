@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Any, override
 
 from sqlalchemy import (
+    UUID,
     ColumnElement,
     ColumnExpressionArgument,
     Connection,
@@ -9,10 +10,15 @@ from sqlalchemy import (
     Select,
     Table,
     and_,
+    any_,
+    bindparam,
     func,
     select,
+    tuple_,
 )
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncResult
 
 from app.core.entities import Entity
 from app.core.repository import IRepository
@@ -32,12 +38,15 @@ class FilterGroup:
 
 class BaseRepository(IRepository):
 
+    remove_chunk_size = 10000
+
     def __init__(
         self,
         connection: Connection,
         table: Table,
         filters: list[ColumnExpressionArgument] = [],
         order_by: list[str] = [],
+        yield_per: int | None = None,
     ):
         self._connection = connection
         self._table = table
@@ -45,7 +54,10 @@ class BaseRepository(IRepository):
         self._order_by: list[str] = order_by
         self._limit: int | None = None
         self._offset: int | None = None
+        self._yield_per: int | None = yield_per
         self._rows = None
+        self._result: AsyncResult | None = None
+        self._stale_result: AsyncResult | None = None
 
     def _construct_select_base(self) -> Select:
         return select(self._table)
@@ -89,10 +101,17 @@ class BaseRepository(IRepository):
     @override
     def __aiter__(self) -> "IRepository":
         self.index = 0
+        # a cursor left by an iteration stopped early is closed on next fetch
+        if self._result is not None:
+            self._stale_result = self._result
+            self._result = None
         return self
 
     @override
     async def __anext__(self) -> Entity:
+        if self._yield_per is not None:
+            return await self._stream_next()
+
         if self._rows is None:
             statement = self._construct_select()
 
@@ -110,9 +129,84 @@ class BaseRepository(IRepository):
             return record
         raise StopAsyncIteration
 
+    async def _stream_next(self) -> Entity:
+        """Fetch next record from server-side cursor."""
+        if self._stale_result is not None:
+            await self._close_stale_result()
+        if self._result is None:
+            statement = self._construct_select().execution_options(
+                yield_per=self._yield_per
+            )
+            try:
+                self._result = await self._connection.stream(statement)
+            except OperationalError as e:
+                raise DatabaseException(f"OperationalError: {str(e)}")
+
+        row: Row | None = await self._result.fetchone()
+        if row is None:
+            await self._result.close()
+            self._result = None
+            raise StopAsyncIteration
+        return self._row_to_entity(row)
+
+    @override
+    async def aclose(self) -> None:
+        """Close the server-side cursor of a streamed iteration."""
+        await self._close_stale_result()
+        if self._result is not None:
+            result, self._result = self._result, None
+            await result.close()
+
+    async def _close_stale_result(self) -> None:
+        if self._stale_result is not None:
+            result, self._stale_result = self._stale_result, None
+            await result.close()
+
+    @override
+    def stream(self, yield_per: int = 1000) -> "IRepository":
+        repo = self.__class__(repo=self)
+        repo._limit = self._limit
+        repo._offset = self._offset
+        repo._yield_per = yield_per
+        return repo
+
     def _row_to_entity(self, row: Row) -> Entity:
         pass
 
+    @override
+    async def remove(self, items: list[Entity]) -> None:
+        for start in range(0, len(items), self.remove_chunk_size):
+            end = start + self.remove_chunk_size
+            await self._execute(self._construct_remove(items[start:end]))
+
+    def _construct_remove(self, items: list[Entity]):
+        ids_param = bindparam(
+            "ids", value=[item.id for item in items], type_=ARRAY(UUID)
+        )
+        return self._table.delete().where(self._table.c["id"] == any_(ids_param))
+
+    @override
+    async def remove_all(self) -> None:
+        """Delete the records the repository selects, a slice by primary key."""
+        where = self._construct_where()
+        if self._limit is not None or self._offset is not None:
+            keys = list(self._table.primary_key.columns)
+            sliced = (
+                select(*keys)
+                .where(where)
+                .order_by(*[self._table.c[name] for name in self._order_by])
+                .offset(self._offset)
+                .limit(self._limit)
+            )
+            where = tuple_(*keys).in_(sliced)
+        await self._execute(self._table.delete().where(where))
+
+    async def _execute(self, statement) -> None:
+        try:
+            await self._connection.execute(statement)
+        except OperationalError as e:
+            raise DatabaseException(f"OperationalError: {str(e)}")
+
     async def _select_raw(
         self,
         table: Table,
@@ -1,20 +1,44 @@
+from datetime import datetime, timedelta, timezone
 from typing import override
 
-from sqlalchemy import Connection, Row, or_, select
-from sqlalchemy.dialects.postgresql import insert
+from asyncpg import InterfaceError, PostgresError
+from sqlalchemy import (
+    UUID,
+    Connection,
+    DateTime,
+    Interval,
+    Row,
+    SmallInteger,
+    and_,
+    bindparam,
+    column,
+    func,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, array_agg, insert
 from sqlalchemy.exc import OperationalError
 
 from app.core.date_time import Timestamp
-from app.core.entities import Candle, Security, Timeframe
+from app.core.entities import Candle, Security
 from app.core.repository import ICandleRepository
+from app.core.resampling import TIMEFRAME_MINUTES
 from app.exceptions import DatabaseException
 from app.repository.sa_repository.base_repo import BaseRepository
 from app.repository.sa_repository.metadata import candle_table, security_table
 
+# Timeframes are stored as smallint: candle duration in minutes.
+TIMEFRAME_CODES = dict(TIMEFRAME_MINUTES)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TIMEFRAMES = {code: timeframe for timeframe, code in TIMEFRAME_CODES.items()}
+
 
 class CandleRepository(BaseRepository, ICandleRepository):
 
     table = candle_table
+    staging_table = "candle_staging"
+    copy_threshold = 5000
 
     @override
     def __init__(
@@ -27,25 +51,33 @@ class CandleRepository(BaseRepository, ICandleRepository):
             table=self.table,
             filters=[] if repo is None else list(repo._filters),
             order_by=["timestamp"] if repo is None else list(repo._order_by),
+            yield_per=None if repo is None else repo._yield_per,
         )
+        self._security: Security | None = None if repo is None else repo._security
 
     @override
     def _construct_select_base(self):
+        if self._security is not None:
+            return select(self.table)
         return select(self.table, security_table).join(
             security_table,
             security_table.c["id"] == candle_table.c["security_id"],
         )
 
+    def _row_to_security(self, row: Row) -> Security:
+        if self._security is not None:
+            return self._security
+        return Security(
+            id=row.security_id,
+            ticker=row.ticker,
+            board=row.board,
+        )
+
     @override
     def _row_to_entity(self, row: Row) -> Candle:
         entity = Candle(
-            id=row.id,
-            security=Security(
-                id=row.security_id,
-                ticker=row.ticker,
-                board=row.board,
-            ),
-            timeframe=Timeframe(row.timeframe),
+            security=self._row_to_security(row),
+            timeframe=TIMEFRAMES[row.timeframe],
             timestamp=Timestamp(row.timestamp),
             open=row.open,
             high=row.high,
@@ -56,37 +88,174 @@ class CandleRepository(BaseRepository, ICandleRepository):
 
     @override
     async def add(self, items: list[Candle]) -> None:
-        if len(items) == 0:
+        records = [
+            (
+                item.security.id,
+                TIMEFRAME_CODES[item.timeframe],
+                item.timestamp.dt,
+                item.open,
+                item.high,
+                item.low,
+                item.close,
+            )
+            for item in items
+        ]
+        await self._add_records(records)
+
+    @override
+    async def add_columns(self, security, timeframe, columns):
+        """Build table records straight from the column arrays."""
+        code = TIMEFRAME_CODES[timeframe]
+        records = [
+            (security.id, code, datetime.fromtimestamp(t, timezone.utc), o, h, lo, c)
+            for t, o, h, lo, c in zip(
+                columns.timestamp,
+                columns.open,
+                columns.high,
+                columns.low,
+                columns.close,
+            )
+        ]
+        await self._add_records(records)
+
+    async def _add_records(self, records: list[tuple]) -> None:
+        """Insert records ordered as the table columns, skip stored candles."""
+        if len(records) == 0:
+            return
+
+        if len(records) >= self.copy_threshold and self._supports_copy():
+            await self._add_copy(records)
             return
 
         insert_stmt = insert(self.table).on_conflict_do_nothing()
-        items_to_insert = [
-            {
-                "id": item.id,
-                "security_id": item.security.id,
-                "timeframe": item.timeframe.value,
-                "timestamp": item.timestamp.dt,
-                "open": item.open,
-                "high": item.high,
-                "low": item.low,
-                "close": item.close,
-            }
-            for item in items
-        ]
+        columns = [c.name for c in self.table.c]
+        items_to_insert = [dict(zip(columns, record)) for record in records]
         try:
             await self._connection.execute(insert_stmt, items_to_insert)
         except OperationalError as e:
             raise DatabaseException(f"OperationalError: {str(e)}")
 
     @override
-    async def remove(self, items: list[Candle]):
-        statement = self.table.delete().where(
-            or_(False, *[self.table.c["id"] == i.id for i in items])
+    def _construct_remove(self, items: list[Candle]):
+        """Delete by natural key, passed as three arrays and joined via unnest."""
+        keys = (
+            func.unnest(
+                bindparam(
+                    "security_ids",
+                    value=[item.security.id for item in items],
+                    type_=ARRAY(UUID),
+                ),
+                bindparam(
+                    "timeframes",
+                    value=[TIMEFRAME_CODES[item.timeframe] for item in items],
+                    type_=ARRAY(SmallInteger),
+                ),
+                bindparam(
+                    "timestamps",
+                    value=[item.timestamp.dt for item in items],
+                    type_=ARRAY(DateTime(timezone=True)),
+                ),
+            )
+            .table_valued("security_id", "timeframe", "timestamp")
+            .render_derived()
+        )
+        return self.table.delete().where(
+            and_(*[self.table.c[c] == keys.c[c] for c in keys.c.keys()])
+        )
+
+    @override
+    async def latest(self):
+        statement = (
+            self._construct_select_base()
+            .where(self._construct_where())
+            .order_by(self.table.c["timestamp"].desc())
+            .limit(1)
         )
         try:
-            await self._connection.execute(statement)
+            result = await self._connection.execute(statement)
         except OperationalError as e:
             raise DatabaseException(f"OperationalError: {str(e)}")
+        row = result.first()
+        return None if row is None else self._row_to_entity(row)
+
+    @override
+    async def resample(self, security, source, target, time_from, time_till):
+        """Aggregate in the database with INSERT ... SELECT and date_bin."""
+        c = self.table.c
+        stride = timedelta(minutes=TIMEFRAME_MINUTES[target])
+        bar = func.date_bin(
+            bindparam("stride", stride, type_=Interval),
+            c["timestamp"],
+            bindparam("origin", EPOCH, type_=DateTime(timezone=True)),
+        )
+        bars = (
+            select(
+                c["security_id"],
+                bindparam("target", TIMEFRAME_CODES[target], type_=SmallInteger),
+                bar,
+                array_agg(aggregate_order_by(c["open"], c["timestamp"].asc()))[1],
+                func.max(c["high"]),
+                func.min(c["low"]),
+                array_agg(aggregate_order_by(c["close"], c["timestamp"].desc()))[1],
+            )
+            .where(
+                c["security_id"] == security.id,
+                c["timeframe"] == TIMEFRAME_CODES[source],
+                c["timestamp"] >= time_from.dt,
+                c["timestamp"] < time_till.dt,
+            )
+            .group_by(c["security_id"], bar)
+        )
+        columns = [
+            "security_id",
+            "timeframe",
+            "timestamp",
+            "open",
+            "high",
+            "low",
+            "close",
+        ]
+        statement = (
+            insert(self.table).from_select(columns, bars).on_conflict_do_nothing()
+        )
+        await self._execute(statement)
+
+    def _supports_copy(self) -> bool:
+        return self._connection.dialect.driver == "asyncpg"
+
+    async def _add_copy(self, records: list[tuple]) -> None:
+        """
+        Bulk insert via binary COPY.
+
+        Rows are copied into a temporary staging table first and then moved
+        into the candle table with one INSERT ... SELECT, so duplicates are
+        skipped the same way as in the executemany path.
+        """
+        columns = [c.name for c in self.table.c]
+        staging = table(self.staging_table, *[column(c) for c in columns])
+        insert_stmt = (
+            insert(self.table).from_select(columns, select(staging))
+        ).on_conflict_do_nothing()
+        try:
+            await self._connection.execute(
+                text(
+                    f"CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging_table} "
+                    f"(LIKE {self.table.name}) ON COMMIT DROP"
+                )
+            )
+            raw_connection = await self._connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                self.staging_table,
+                records=records,
+                columns=columns,
+            )
+            await self._connection.execute(insert_stmt)
+            await self._connection.execute(text(f"TRUNCATE {self.staging_table}"))
+        except OperationalError as e:
+            raise DatabaseException(f"OperationalError: {str(e)}")
+        # COPY runs on the raw asyncpg connection, its errors are not wrapped
+        except (PostgresError, InterfaceError, OSError) as e:
+            raise DatabaseException(f"{type(e).__name__}: {str(e)}")
 
     @override
     def __getitem__(self, s):
@@ -103,14 +272,14 @@ class CandleRepository(BaseRepository, ICandleRepository):
     @override
     def filter_by_security(self, security):
         repo = CandleRepository(repo=self)
-        repo._filters += [security_table.c["ticker"] == security.ticker]
-        repo._filters += [security_table.c["board"] == security.board]
+        repo._filters += [self.table.c["security_id"] == security.id]
+        repo._security = security
         return repo
 
     @override
     def filter_by_timeframe(self, timeframe):
         repo = CandleRepository(repo=self)
-        repo._filters += [self.table.c["timeframe"] == timeframe.value]
+        repo._filters += [self.table.c["timeframe"] == TIMEFRAME_CODES[timeframe]]
         return repo
 
     @override
@@ -119,6 +288,12 @@ class CandleRepository(BaseRepository, ICandleRepository):
         repo._filters += [self.table.c["timestamp"] >= timestamp.dt]
         return repo
 
+    @override
+    def filter_by_timestamp_gt(self, timestamp):
+        repo = CandleRepository(repo=self)
+        repo._filters += [self.table.c["timestamp"] > timestamp.dt]
+        return repo
+
     @override
     def filter_by_timestamp_lte(self, timestamp):
         repo = CandleRepository(repo=self)
@@ -1,6 +1,6 @@
 from typing import override
 
-from sqlalchemy import Connection, Row, or_, select
+from sqlalchemy import Connection, Row, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import OperationalError
 
@@ -27,24 +27,33 @@ class CandleSpanRepository(BaseRepository, ICandleSpanRepository):
             table=self.table,
             filters=[] if repo is None else list(repo._filters),
             order_by=["date_from"] if repo is None else list(repo._order_by),
+            yield_per=None if repo is None else repo._yield_per,
         )
+        self._security: Security | None = None if repo is None else repo._security
 
     @override
     def _construct_select_base(self):
+        if self._security is not None:
+            return select(self.table)
         return select(candle_span_table, security_table).join(
             security_table,
             security_table.c["id"] == candle_span_table.c["security_id"],
         )
 
+    def _row_to_security(self, row: Row) -> Security:
+        if self._security is not None:
+            return self._security
+        return Security(
+            id=row.security_id,
+            ticker=row.ticker,
+            board=row.board,
+        )
+
     @override
     def _row_to_entity(self, row: Row) -> CandleSpan:
         entity = CandleSpan(
             id=row.id,
-            security=Security(
-                id=row.security_id,
-                ticker=row.ticker,
-                board=row.board,
-            ),
+            security=self._row_to_security(row),
             timeframe=Timeframe(row.timeframe),
             date_from=Timestamp(row.date_from),
             date_till=Timestamp(row.date_till),
@@ -72,16 +81,6 @@ class CandleSpanRepository(BaseRepository, ICandleSpanRepository):
         except OperationalError as e:
             raise DatabaseException(f"OperationalError: {str(e)}")
 
-    @override
-    async def remove(self, items: list[CandleSpan]):
-        statement = self.table.delete().where(
-            or_(False, *[self.table.c["id"] == i.id for i in items])
-        )
-        try:
-            await self._connection.execute(statement)
-        except OperationalError as e:
-            raise DatabaseException(f"OperationalError: {str(e)}")
-
     @override
     def __getitem__(self, s):
         sl = slice(*s)
@@ -97,8 +96,8 @@ class CandleSpanRepository(BaseRepository, ICandleSpanRepository):
     @override
     def filter_by_security(self, security):
         repo = CandleSpanRepository(repo=self)
-        repo._filters += [security_table.c["ticker"] == security.ticker]
-        repo._filters += [security_table.c["board"] == security.board]
+        repo._filters += [self.table.c["security_id"] == security.id]
+        repo._security = security
         return repo
 
     @override
@@ -1,5 +1,6 @@
 from sqlalchemy import MetaData
 from sqlalchemy import Table, Column, Integer, String, UUID, Float, DateTime, Date
+from sqlalchemy import SmallInteger
 
 metadata_obj = MetaData()
 
@@ -14,10 +15,9 @@ security_table = Table(
 candle_table = Table(
     "candle",
     metadata_obj,
-    Column("id", UUID, primary_key=True),
-    Column("security_id", UUID),
-    Column("timeframe", String),
-    Column("timestamp", DateTime(timezone=True)),
+    Column("security_id", UUID, primary_key=True),
+    Column("timeframe", SmallInteger, primary_key=True),
+    Column("timestamp", DateTime(timezone=True), primary_key=True),
     Column("open", Float),
     Column("high", Float),
     Column("low", Float),
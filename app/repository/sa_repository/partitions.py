@@ -0,0 +1,28 @@
+"""Candle table partition maintenance."""
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.date_time import Timestamp
+from app.exceptions import DatabaseException
+
+
+async def create_candle_partitions(
+    connection: AsyncConnection,
+    date_from: Timestamp,
+    date_till: Timestamp,
+) -> int:
+    """
+    Create monthly partitions of candle table covering the given dates.
+
+    Existing partitions are kept as is. Return number of created partitions.
+    """
+    statement = select(
+        func.candle_create_partitions(date_from.date(), date_till.date())
+    )
+    try:
+        result = await connection.execute(statement)
+    except OperationalError as e:
+        raise DatabaseException(f"OperationalError: {str(e)}")
+    return result.scalar_one()
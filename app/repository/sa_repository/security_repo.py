@@ -1,6 +1,6 @@
 from typing import override
 
-from sqlalchemy import Connection, Row, or_
+from sqlalchemy import Connection, Row
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import OperationalError
 
@@ -26,6 +26,7 @@ class SecurityRepository(BaseRepository, ISecurityRepository):
             table=self.table,
             filters=[] if repo is None else list(repo._filters),
             order_by=["ticker", "board"] if repo is None else list(repo._order_by),
+            yield_per=None if repo is None else repo._yield_per,
         )
 
     @override
@@ -55,16 +56,6 @@ class SecurityRepository(BaseRepository, ISecurityRepository):
         except OperationalError as e:
             raise DatabaseException(f"OperationalError: {str(e)}")
 
-    @override
-    async def remove(self, items: list[Security]):
-        statement = self.table.delete().where(
-            or_(False, *[self.table.c["id"] == i.id for i in items])
-        )
-        try:
-            await self._connection.execute(statement)
-        except OperationalError as e:
-            raise DatabaseException(f"OperationalError: {str(e)}")
-
     @override
     def __getitem__(self, s):
         sl = slice(*s)
@@ -33,6 +33,41 @@ class TestCandleRepoAlchemy:
                 candle_repo,
             )
 
+    @pytest.mark.asyncio
+    async def test_create_many_copy(self):
+        """Create many candles via COPY."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            candle_repo.copy_threshold = 1
+            await TestCases.execute_create_many_candles(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_add_columns(self):
+        """Create candles from columns."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_add_columns(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_add_columns_copy(self):
+        """Create candles from columns via COPY."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            candle_repo.copy_threshold = 1
+            await TestCases.execute_add_columns(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
     @pytest.mark.asyncio
     async def test_slicing(self):
         """Test slicing."""
@@ -54,3 +89,69 @@ class TestCandleRepoAlchemy:
                 security_repo,
                 candle_repo,
             )
+
+    @pytest.mark.asyncio
+    async def test_keyset_pagination(self):
+        """Test keyset pagination."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_keyset_pagination(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_streaming(self):
+        """Test streaming iteration."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_streaming(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_remove_all(self):
+        """Test remove_all on filtered repository."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_remove_all(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_remove_all_sliced(self):
+        """Remove the candles a slice selects."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_remove_all_sliced(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_resample(self):
+        """Test resampling of M1 candles in the database."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_resample(
+                uow,
+                security_repo,
+                candle_repo,
+            )
+
+    @pytest.mark.asyncio
+    async def test_latest(self):
+        """Test high-water mark of a series."""
+        async with dependencies.get_repos() as elements:
+            uow, security_repo, candle_repo, _ = elements
+            await TestCases.execute_latest(
+                uow,
+                security_repo,
+                candle_repo,
+            )
@@ -1,6 +1,8 @@
+from array import array
 from datetime import timedelta
 from uuid import uuid4
 
+from app.core.candle_columns import CandleColumns
 from app.core.date_time import Timestamp
 from app.core.entities import Candle, Entity, Security, Timeframe
 from app.core.repository import ICandleRepository, IRepository, ISecurityRepository
@@ -97,6 +99,38 @@ class TestCases:
             count = await security_repo_ticker.count()
             assert count == 0
 
+    @staticmethod
+    async def execute_add_columns(
+        uow: IUnitOfWork,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+    ):
+        security = Security(ticker=uuid4().hex, board=uuid4().hex)
+        start = int(Timestamp("2025-01-15 10:00:00+03:00").dt.timestamp())
+        columns = CandleColumns(
+            timestamp=array("q", [start + 60 * i for i in range(100)]),
+            open=array("d", [100 + i for i in range(100)]),
+            high=array("d", [101 + i for i in range(100)]),
+            low=array("d", [99 + i for i in range(100)]),
+            close=array("d", [100.5 + i for i in range(100)]),
+        )
+        expected = [
+            Candle(**cd.__dict__)
+            for cd in columns.to_candles(security, Timeframe.M1, "Europe/Moscow")
+        ]
+
+        async with uow:
+            await security_repo.add([security])
+            await candle_repo.add_columns(security, Timeframe.M1, columns)
+            await candle_repo.add_columns(security, Timeframe.M1, columns)
+
+            candle_repo = candle_repo.filter_by_security(security)
+            assert [r async for r in candle_repo] == expected
+
+            await candle_repo.remove_all()
+            security_repo_ticker = security_repo.filter_by_ticker(security.ticker)
+            await security_repo_ticker.remove_all()
+
     @staticmethod
     async def execute_slicing(
         uow: IUnitOfWork,
@@ -234,3 +268,312 @@ class TestCases:
                 security_records = [r async for r in security_repo_ticker]
                 await security_repo.remove(security_records)
                 await _check_count(security_repo_ticker, 0)
+
+    @staticmethod
+    async def execute_keyset_pagination(
+        uow: IUnitOfWork,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+    ):
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        security = Security(
+            ticker=test_ticker,
+            board=test_board,
+        )
+
+        now = Timestamp.now()
+        candles = [
+            Candle(
+                security=security,
+                timeframe=Timeframe.H1,
+                timestamp=Timestamp(now.dt - timedelta(minutes=i)),
+                open=100,
+                high=101.0,
+                low=99.9,
+                close=100.25,
+            )
+            for i in range(1000)
+        ]
+
+        async with uow:
+
+            await security_repo.add([security])
+            await candle_repo.add(candles)
+
+            candle_repo = candle_repo.filter_by_security(security)
+
+            retrieved_candles: list[Candle] = []
+            batch_size = 100
+            batch_repo = candle_repo[0, batch_size]
+            while True:
+                items = [r async for r in batch_repo]
+                retrieved_candles += items
+                if not items:
+                    break
+                batch_repo = candle_repo.filter_by_timestamp_gt(items[-1].timestamp)
+                batch_repo = batch_repo[0, batch_size]
+
+            assert len(retrieved_candles) == len(candles)
+            assert set(candles) == set(retrieved_candles)
+
+            records = [r async for r in candle_repo]
+            await candle_repo.remove(records)
+
+            count = await candle_repo.count()
+            assert count == 0
+
+            security_repo_ticker = security_repo.filter_by_ticker(security.ticker)
+            security_records = [r async for r in security_repo_ticker]
+            await security_repo.remove(security_records)
+            count = await security_repo_ticker.count()
+            assert count == 0
+
+    @staticmethod
+    async def execute_streaming(
+        uow: IUnitOfWork,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+    ):
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        security = Security(
+            ticker=test_ticker,
+            board=test_board,
+        )
+
+        now = Timestamp.now()
+        candles = [
+            Candle(
+                security=security,
+                timeframe=Timeframe.H1,
+                timestamp=Timestamp(now.dt - timedelta(minutes=i)),
+                open=100,
+                high=101.0,
+                low=99.9,
+                close=100.25,
+            )
+            for i in range(1000)
+        ]
+
+        async with uow:
+
+            await security_repo.add([security])
+            await candle_repo.add(candles)
+
+            candle_repo = candle_repo.filter_by_security(security)
+            stream_repo = candle_repo.stream(yield_per=100)
+            retrieved_candles = [r async for r in stream_repo]
+            assert len(retrieved_candles) == len(candles)
+            assert set(candles) == set(retrieved_candles)
+
+            stream_repo = candle_repo.stream(yield_per=100).filter_by_timeframe(
+                Timeframe.H1
+            )
+            assert [r async for r in stream_repo] == retrieved_candles
+
+            # iteration stopped early restarts from the first record
+            async for first in stream_repo:
+                break
+            assert [r async for r in stream_repo] == retrieved_candles
+            async for _ in stream_repo:
+                break
+            await stream_repo.aclose()
+            assert [r async for r in stream_repo] == retrieved_candles
+            assert first == retrieved_candles[0]
+
+            await candle_repo.remove(retrieved_candles)
+
+            count = await candle_repo.count()
+            assert count == 0
+
+            security_repo_ticker = security_repo.filter_by_ticker(security.ticker)
+            security_records = [r async for r in security_repo_ticker]
+            await security_repo.remove(security_records)
+            count = await security_repo_ticker.count()
+            assert count == 0
+
+    @staticmethod
+    async def execute_remove_all(
+        uow: IUnitOfWork,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+    ):
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        security = Security(
+            ticker=test_ticker,
+            board=test_board,
+        )
+
+        t = Timestamp("2025-01-01 12:00:00+03:00")
+        candles = [
+            Candle(
+                security=security,
+                timeframe=timeframe,
+                timestamp=Timestamp(t.dt + timedelta(days=i)),
+                open=100,
+                high=101.0,
+                low=99.9,
+                close=100.25,
+            )
+            for timeframe in [Timeframe.M1, Timeframe.M10]
+            for i in range(60)
+        ]
+
+        async with uow:
+
+            await security_repo.add([security])
+            await candle_repo.add(candles)
+
+            candle_repo = candle_repo.filter_by_security(security)
+            repo_jan = (
+                candle_repo.filter_by_timeframe(Timeframe.M1)
+                .filter_by_timestamp_gte(Timestamp("2025-01-01 00:00:00"))
+                .filter_by_timestamp_lte(Timestamp("2025-01-31 23:59:59"))
+            )
+            count = await repo_jan.count()
+            assert count == 31
+            await repo_jan.remove_all()
+            count = await repo_jan.count()
+            assert count == 0
+
+            await candle_repo.remove_all()
+            count = await candle_repo.count()
+            assert count == 0
+
+            security_repo_ticker = security_repo.filter_by_ticker(security.ticker)
+            await security_repo_ticker.remove_all()
+            count = await security_repo_ticker.count()
+            assert count == 0
+
+    @staticmethod
+    async def execute_remove_all_sliced(
+        uow: IUnitOfWork,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+    ):
+        security = Security(ticker=uuid4().hex, board=uuid4().hex)
+        t = Timestamp("2025-01-01 12:00:00+03:00")
+        candles = [
+            Candle(
+                security=security,
+                timeframe=Timeframe.M1,
+                timestamp=Timestamp(t.dt + timedelta(minutes=i)),
+                open=100,
+                high=101.0,
+                low=99.9,
+                close=100.25,
+            )
+            for i in range(30)
+        ]
+
+        async with uow:
+            await security_repo.add([security])
+            await candle_repo.add(candles)
+
+            candle_repo = candle_repo.filter_by_security(security)
+            await candle_repo[10, 20].remove_all()
+            assert [r async for r in candle_repo] == candles[:10] + candles[20:]
+
+            await candle_repo.remove_all()
+            security_repo_ticker = security_repo.filter_by_ticker(security.ticker)
+            await security_repo_ticker.remove_all()
+
+    @staticmethod
+    async def execute_resample(
+        uow: IUnitOfWork,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+    ):
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        security = Security(
+            ticker=test_ticker,
+            board=test_board,
+        )
+
+        t = Timestamp("2025-01-15 10:00:00+03:00")
+        candles = [
+            Candle(
+                security=security,
+                timeframe=Timeframe.M1,
+                timestamp=Timestamp(t.dt + timedelta(minutes=i)),
+                open=100 + i,
+                high=101 + i,
+                low=99 + i,
+                close=100.5 + i,
+            )
+            for i in range(120)
+        ]
+
+        async with uow:
+            await security_repo.add([security])
+            await candle_repo.add(candles)
+
+            for timeframe in [Timeframe.M10, Timeframe.H1]:
+                await candle_repo.resample(
+                    security,
+                    Timeframe.M1,
+                    timeframe,
+                    Timestamp("2025-01-15 09:00:00+03:00"),
+                    Timestamp("2025-01-15 11:00:00+03:00"),
+                )
+
+            candle_repo = candle_repo.filter_by_security(security)
+            bars = [r async for r in candle_repo.filter_by_timeframe(Timeframe.M10)]
+            assert len(bars) == 6
+            assert [b.open for b in bars] == [100 + 10 * i for i in range(6)]
+
+            bars = [r async for r in candle_repo.filter_by_timeframe(Timeframe.H1)]
+            assert len(bars) == 1
+            assert bars[0].timestamp == t
+            assert (bars[0].open, bars[0].high) == (100, 160)
+            assert (bars[0].low, bars[0].close) == (99, 159.5)
+
+            await candle_repo.remove_all()
+            security_repo_ticker = security_repo.filter_by_ticker(security.ticker)
+            await security_repo_ticker.remove_all()
+
+    @staticmethod
+    async def execute_latest(
+        uow: IUnitOfWork,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+    ):
+        test_ticker = uuid4().hex
+        test_board = uuid4().hex
+        security = Security(
+            ticker=test_ticker,
+            board=test_board,
+        )
+
+        t = Timestamp("2025-01-15 10:00:00+03:00")
+        candles = [
+            Candle(
+                security=security,
+                timeframe=timeframe,
+                timestamp=Timestamp(t.dt + timedelta(minutes=i * minutes)),
+                open=100,
+                high=101.0,
+                low=99.9,
+                close=100.25,
+            )
+            for timeframe, minutes in [(Timeframe.M1, 1), (Timeframe.M10, 10)]
+            for i in range(30)
+        ]
+
+        async with uow:
+            await security_repo.add([security])
+            await candle_repo.add(candles)
+
+            candle_repo = candle_repo.filter_by_security(security)
+            latest = await candle_repo.filter_by_timeframe(Timeframe.M1).latest()
+            assert latest.timestamp == Timestamp("2025-01-15 10:29:00+03:00")
+            latest = await candle_repo.filter_by_timeframe(Timeframe.M10).latest()
+            assert latest.timestamp == Timestamp("2025-01-15 14:50:00+03:00")
+            assert await candle_repo.filter_by_timeframe(Timeframe.H1).latest() is None
+
+            await candle_repo.remove_all()
+            security_repo_ticker = security_repo.filter_by_ticker(security.ticker)
+            await security_repo_ticker.remove_all()
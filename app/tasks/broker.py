@@ -1,5 +1,6 @@
 from os import environ
 
+from redis.asyncio import Redis
 from taskiq_redis import RedisAsyncResultBackend, RedisStreamBroker
 
 redis_host = environ.get("REDIS_HOST")
@@ -9,3 +10,6 @@ redis_url = f"redis://{redis_host}:{redis_port}"
 
 result_backend = RedisAsyncResultBackend(redis_url=redis_url)
 broker = RedisStreamBroker(url=redis_url).with_result_backend(result_backend)
+
+# Dedup keys of enqueued tasks
+redis = Redis.from_url(redis_url)
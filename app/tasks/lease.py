@@ -0,0 +1,97 @@
+"""Redis leases."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.logger import ILogger
+from app.exceptions import LeaseLostException
+
+# Extend or delete the key only while it holds our token
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class Lease:
+    """
+    Redis key owned by the holder of a random token.
+
+    The key expires after `ttl` seconds unless renewed, so a lease of a dead
+    worker is freed on its own. Renewal and release check the token, a lease
+    that expired and was taken by someone else is left alone.
+    """
+
+    def __init__(self, redis: Redis, key: str, ttl: int, token: str | None = None):
+        self.redis = redis
+        self.key = key
+        self.ttl = ttl
+        self.token = token or uuid4().hex
+        self.lost: str | None = None
+
+    async def acquire(self, ttl: int | None = None) -> bool:
+        """Take the lease if it is free."""
+        return bool(
+            await self.redis.set(self.key, self.token, nx=True, ex=ttl or self.ttl)
+        )
+
+    async def renew(self) -> bool:
+        """Extend the lease, return False if it is not held."""
+        return bool(
+            await self.redis.eval(RENEW_SCRIPT, 1, self.key, self.token, self.ttl)
+        )
+
+    async def release(self) -> None:
+        await self.redis.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+
+    @asynccontextmanager
+    async def hold(self, logger: ILogger):
+        """
+        Renew the lease every third of its TTL, release it on exit.
+
+        If renewal fails the lease may be taken by someone else, the work
+        inside is cancelled and LeaseLostException is raised.
+        """
+        task = asyncio.current_task()
+        renewal = asyncio.create_task(self._keep_renewed(task, logger))
+        try:
+            yield self
+        except asyncio.CancelledError:
+            if self.lost is None:
+                raise
+            task.uncancel()
+            raise LeaseLostException(f"Lease {self.key} lost") from None
+        finally:
+            renewal.cancel()
+            try:
+                await self.release()
+            except RedisError as e:
+                # the lease expires on its own
+                logger.warning("lease_release_failed", key=self.key, error=repr(e))
+
+    async def _keep_renewed(self, task: asyncio.Task, logger: ILogger) -> None:
+        """Renew until cancelled, on failure mark the lease lost and cancel `task`."""
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                if await self.renew():
+                    continue
+                reason = "taken"
+            except RedisError as e:
+                reason = repr(e)
+            self.lost = reason
+            logger.error("lease_lost", key=self.key, reason=reason)
+            task.cancel()
+            return
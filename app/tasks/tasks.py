@@ -1,25 +1,338 @@
+import asyncio
+from contextlib import AsyncExitStack
+from time import monotonic
+
+from taskiq import TaskiqEvents, TaskiqState
+
+from app.core.date_time import Timestamp
+from app.core.entities import Timeframe
+from app.core.logger import ILogger
 from app.dependency.prod import Container
-from app.exceptions import DatabaseException, MarketDataSourceException
-from app.tasks.broker import broker
-from app.use_cases.update_candles import UpdateCandles, UpdateCandlesRequest
+from app.exceptions import (
+    DatabaseException,
+    LeaseLostException,
+    MarketDataSourceException,
+)
+from app.repository.sa_repository.partitions import create_candle_partitions
+from app.tasks.broker import broker, redis
+from app.tasks.lease import Lease
+from app.use_cases.constants import BACKFILL_TASKS, TIMEFRAME_PRIORITY
+from app.use_cases.load_candles import LoadCandlesRequest
+from app.use_cases.update_candles import (
+    BACKFILL,
+    UpdateCandles,
+    UpdateCandlesRequest,
+    WorkItem,
+)
 
 dependencies = Container()
 
+PARTITIONS_DAYS_AHEAD = 92
+
+# A run of update_candles holds its lease while planning and collecting results,
+# an overlapping tick is skipped
+RUN_LEASE_TTL_SECONDS = 120
+
+# A series lease is taken when its subtask is enqueued and lasts while it waits
+# in the queue, the running subtask renews it with a shorter TTL so that the
+# lease of a dead worker is freed soon
+SERIES_QUEUED_TTL_SECONDS = 3600
+SERIES_LEASE_TTL_SECONDS = 120
+
+# The planner waits for results of fresh subtasks until the next scheduled run
+SERIES_RESULT_TIMEOUT_SECONDS = 540
+
+
+RUN_KEY = "update_candles:run"
+
+
+def series_key(ticker: str, board: str, timeframe: str) -> str:
+    return f"update_candles:{board}:{ticker}:{timeframe}"
+
+
+# Backfills run in BACKFILL_TASKS slots shared by all workers, a backfill that
+# finds no free slot is left to a later run
+def backfill_slot_key(slot: int) -> str:
+    return f"update_candles:backfill:{slot}"
+
+
+@broker.on_event(TaskiqEvents.WORKER_STARTUP)
+async def worker_startup(state: TaskiqState) -> None:
+    """Create DB connection pool once per worker process."""
+    dependencies.get_engine()
+
+
+@broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
+async def worker_shutdown(state: TaskiqState) -> None:
+    """Close DB connection pool."""
+    await dependencies.dispose()
+    await redis.aclose()
+
 
 @broker.task(schedule=[{"cron": "*/10 * * * *"}])
 async def update_candles(logger=dependencies.get_logger()):
-    """Update Candles Task."""
+    """
+    Update Candles Task.
+
+    Plans the update and fans it out into `load_series` subtasks, skipping
+    series leased by a subtask still queued or running.
+    """
     logger.bind(task="update_candles")
     logger.info("task_started")
+    run_lease = Lease(redis, RUN_KEY, RUN_LEASE_TTL_SECONDS)
+    if not await run_lease.acquire():
+        logger.info("task_skipped", reason="run_in_progress")
+        return
+    async with run_lease.hold(logger):
+        await fan_out(UpdateCandlesRequest(), logger)
+
+
+async def fan_out(request: UpdateCandlesRequest, logger: ILogger) -> None:
+    """
+    Enqueue subtasks for planned work items, collect results of fresh ones.
+
+    Fresh M1 series are loaded first and M10 and H1 after them, loaders build
+    M10 and H1 from stored M1 candles. All series of a security with a
+    backfill go to one subtask loading them in the same order, at most
+    BACKFILL_TASKS such subtasks run at once and the planner does not wait
+    for them.
+    """
     use_case = UpdateCandles(
         load_candles_provider=dependencies.get_load_candles_use_case,
         security_repo_provider=dependencies.get_security_repository,
+        candle_span_repo_provider=dependencies.get_candle_span_repository,
         logger=dependencies.get_logger(),
     )
     try:
-        await use_case.execute(UpdateCandlesRequest())
+        items = await use_case.plan(request)
     except DatabaseException as e:
         logger.error("error", exception=str(e))
-    except MarketDataSourceException as e:
+        return
+    deadline = monotonic() + SERIES_RESULT_TIMEOUT_SECONDS
+    backfilled = {item.request.security.id for item in items if item.lane == BACKFILL}
+    fresh = [item for item in items if item.request.security.id not in backfilled]
+    errors = []
+    n_enqueued = 0
+    n_skipped = 0
+    for phase in (
+        [item for item in fresh if item.request.timeframe == Timeframe.M1],
+        [item for item in fresh if item.request.timeframe != Timeframe.M1],
+    ):
+        subtasks = []
+        for item in phase:
+            subtask, skipped = await _enqueue([item])
+            n_skipped += skipped
+            if subtask is not None:
+                subtasks += [subtask]
+        n_enqueued += len(subtasks)
+        results = await asyncio.gather(
+            *[
+                subtask.wait_result(timeout=max(0, deadline - monotonic()))
+                for subtask in subtasks
+            ],
+            return_exceptions=True,
+        )
+        errors += collect_errors(results)
+    n_backfill, n_deferred = await _enqueue_backfills(
+        [item for item in items if item.request.security.id in backfilled]
+    )
+    logger.info(
+        "task_finished",
+        n_enqueued=n_enqueued,
+        n_skipped=n_skipped,
+        n_backfill=n_backfill,
+        n_deferred=n_deferred,
+        n_failed=len(errors),
+        errors=errors,
+    )
+
+
+def collect_errors(results: list) -> list[str]:
+    """Return errors of subtask results, of failed and of timed out subtasks."""
+    errors = []
+    for result in results:
+        if isinstance(result, BaseException):
+            errors += [repr(result)]
+        elif result.is_err:
+            errors += [repr(result.error)]
+        else:
+            errors += result.return_value
+    return errors
+
+
+async def _enqueue(items: list[WorkItem], slot: Lease | None = None):
+    """
+    Lease series of `items` and enqueue one subtask loading them in order.
+
+    Return the subtask, None if all series are leased already, and the number
+    of skipped series. Leases are released if the subtask is not enqueued.
+    """
+    security = items[0].request.security
+    leases = []
+    series = []
+    for item in items:
+        request = item.request
+        timeframe = request.timeframe.value
+        key = series_key(security.ticker, security.board, timeframe)
+        lease = Lease(redis, key, SERIES_LEASE_TTL_SECONDS)
+        if not await lease.acquire(ttl=SERIES_QUEUED_TTL_SECONDS):
+            continue
+        leases += [lease]
+        series += [
+            dict(
+                timeframe=timeframe,
+                time_from=str(request.time_from),
+                time_till=str(request.time_till),
+                lease_token=lease.token,
+            )
+        ]
+    n_skipped = len(items) - len(series)
+    if not series:
+        return None, n_skipped
+    try:
+        subtask = await load_series.kiq(
+            ticker=security.ticker,
+            board=security.board,
+            series=series,
+            slot_key=None if slot is None else slot.key,
+            slot_token=None if slot is None else slot.token,
+        )
+    except Exception:
+        for lease in leases:
+            await lease.release()
+        raise
+    return subtask, n_skipped
+
+
+async def _enqueue_backfills(items: list[WorkItem]) -> tuple[int, int]:
+    """Enqueue backfills per security while slots are free, return counts."""
+    groups: dict = {}
+    for item in items:
+        groups.setdefault(item.request.security.id, []).append(item)
+    n_enqueued = 0
+    for n, group in enumerate(groups.values()):
+        slot = await _acquire_backfill_slot()
+        if slot is None:
+            return n_enqueued, len(groups) - n
+        group.sort(key=lambda item: TIMEFRAME_PRIORITY[item.request.timeframe])
+        try:
+            subtask, _ = await _enqueue(group, slot)
+        except Exception:
+            await slot.release()
+            raise
+        if subtask is None:
+            await slot.release()
+            continue
+        n_enqueued += 1
+    return n_enqueued, 0
+
+
+async def _acquire_backfill_slot() -> Lease | None:
+    for slot in range(BACKFILL_TASKS):
+        lease = Lease(redis, backfill_slot_key(slot), SERIES_LEASE_TTL_SECONDS)
+        if await lease.acquire(ttl=SERIES_QUEUED_TTL_SECONDS):
+            return lease
+    return None
+
+
+@broker.task
+async def load_series(
+    ticker: str,
+    board: str,
+    series: list[dict[str, str]],
+    slot_key: str | None = None,
+    slot_token: str | None = None,
+) -> list[str]:
+    """
+    Load candles of timeframes of one security in order, return errors.
+
+    Each series is loaded under its lease, a backfill also holds its slot.
+    """
+    # own logger, subtasks of a worker run concurrently
+    logger = dependencies.get_logger()
+    logger.bind(task="load_series", ticker=ticker, board=board)
+    logger.info("task_started")
+    leases = []
+    to_load = []
+    for item in series:
+        key = series_key(ticker, board, item["timeframe"])
+        lease = Lease(redis, key, SERIES_LEASE_TTL_SECONDS, token=item["lease_token"])
+        if not await _retake(lease):
+            logger.info(
+                "series_skipped",
+                timeframe=item["timeframe"],
+                reason="series_in_progress",
+            )
+            continue
+        leases += [lease]
+        to_load += [item]
+    if slot_key is not None:
+        slot = Lease(redis, slot_key, SERIES_LEASE_TTL_SECONDS, token=slot_token)
+        if not await _retake(slot):
+            logger.info("task_skipped", reason="backfill_slot_taken")
+            for lease in leases:
+                await lease.release()
+            return []
+        leases += [slot]
+    errors = []
+    try:
+        async with AsyncExitStack() as stack:
+            for lease in leases:
+                await stack.enter_async_context(lease.hold(logger))
+            for item in to_load:
+                try:
+                    await _load_series(ticker, board, item)
+                except DatabaseException as e:
+                    errors += [f"{ticker} {item['timeframe']}: {e!r}"]
+                    logger.error("error", timeframe=item["timeframe"], exception=str(e))
+                except MarketDataSourceException as e:
+                    errors += [f"{ticker} {item['timeframe']}: {e!r}"]
+                    logger.error("error", timeframe=item["timeframe"], exception=str(e))
+    except LeaseLostException as e:
+        # another worker may load the same series now, stop loading
+        errors += [f"{ticker}: {e!r}"]
+    logger.info(
+        "task_finished",
+        db_pool=dependencies.get_pool_status(),
+        iss_requests=dependencies.get_rate_limiter_status(),
+    )
+    return errors
+
+
+async def _retake(lease: Lease) -> bool:
+    # the queued lease may have expired, take it again unless someone else did
+    return await lease.renew() or await lease.acquire()
+
+
+async def _load_series(ticker: str, board: str, item: dict[str, str]) -> None:
+    async with dependencies.get_security_repository() as security_repo:
+        repo = security_repo.filter_by_ticker(ticker).filter_by_board(board)
+        securities = [security async for security in repo]
+    request = LoadCandlesRequest(
+        security=securities[0],
+        timeframe=Timeframe(item["timeframe"]),
+        time_from=Timestamp(item["time_from"]),
+        time_till=Timestamp(item["time_till"]),
+    )
+    async with dependencies.get_load_candles_use_case() as use_case:
+        await use_case.execute(request)
+
+
+@broker.task(schedule=[{"cron": "0 3 * * *"}])
+async def create_partitions(logger=dependencies.get_logger()):
+    """Create candle table partitions for upcoming months."""
+    logger.bind(task="create_partitions")
+    logger.info("task_started")
+    today = Timestamp.today()
+    try:
+        async with dependencies.get_connection() as connection:
+            n_created = await create_candle_partitions(
+                connection,
+                date_from=today,
+                date_till=today + PARTITIONS_DAYS_AHEAD,
+            )
+            await connection.commit()
+        logger.info("partitions_created", n_created=n_created)
+    except DatabaseException as e:
         logger.error("error", exception=str(e))
     logger.info("task_finished")
@@ -0,0 +1,75 @@
+"""Tests for Redis leases."""
+
+import asyncio
+
+import pytest
+
+from app.dependency.test import Container, FakeRedis, UnavailableRedis
+from app.exceptions import LeaseLostException
+from app.tasks.lease import Lease
+
+dependencies = Container()
+
+
+@pytest.mark.asyncio
+async def test_lease_token():
+    """Only the holder of the token renews and releases the lease."""
+    redis = FakeRedis()
+    lease = Lease(redis, "lease", 60)
+    other = Lease(redis, "lease", 60)
+
+    assert await lease.acquire()
+    assert not await other.acquire()
+    assert not await other.renew()
+    await other.release()
+    assert await redis.get("lease") == lease.token
+
+    assert await Lease(redis, "lease", 60, token=lease.token).renew()
+    await lease.release()
+    assert await redis.get("lease") is None
+    assert not await lease.renew()
+    assert await other.acquire()
+
+
+@pytest.mark.asyncio
+async def test_lease_hold():
+    """Held lease outlives its TTL and is released on exit."""
+    redis = FakeRedis()
+    lease = Lease(redis, "lease", 0.03)
+    assert await lease.acquire()
+
+    async with lease.hold(dependencies.get_logger()):
+        await asyncio.sleep(0.1)
+        assert await redis.get("lease") == lease.token
+    assert await redis.get("lease") is None
+
+
+@pytest.mark.asyncio
+async def test_lease_hold_lost():
+    """Work is cancelled once the lease is taken by someone else."""
+    redis = FakeRedis()
+    lease = Lease(redis, "lease", 0.03)
+    assert await lease.acquire()
+
+    with pytest.raises(LeaseLostException):
+        async with lease.hold(dependencies.get_logger()):
+            await redis.set("lease", "other")
+            await asyncio.sleep(1)
+    assert lease.lost == "taken"
+    assert await redis.get("lease") == "other"
+
+
+@pytest.mark.asyncio
+async def test_lease_hold_redis_error():
+    """Redis errors cancel the work and do not hide exceptions of the work."""
+    lease = Lease(UnavailableRedis(), "lease", 0.03)
+    assert await lease.acquire()
+    with pytest.raises(LeaseLostException):
+        async with lease.hold(dependencies.get_logger()):
+            await asyncio.sleep(1)
+
+    lease = Lease(UnavailableRedis(), "lease", 60)
+    assert await lease.acquire()
+    with pytest.raises(ValueError):
+        async with lease.hold(dependencies.get_logger()):
+            raise ValueError("failed")
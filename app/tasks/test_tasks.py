@@ -0,0 +1,205 @@
+"""Tests for update_candles fan-out."""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from taskiq import InMemoryBroker
+from taskiq.result import TaskiqResult
+
+import app.tasks.tasks as tasks
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
+from app.dependency.test import Container, FakeRedis
+from app.tasks.lease import Lease
+from app.use_cases.update_candles import UpdateCandlesRequest
+
+dependencies = Container()
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    """Run tasks with test dependencies and a fake Redis."""
+    redis = FakeRedis()
+    monkeypatch.setattr(tasks, "dependencies", dependencies)
+    monkeypatch.setattr(tasks, "redis", redis)
+    return redis
+
+
+@pytest.fixture
+def calls(monkeypatch, redis) -> list[tuple]:
+    """Replace `load_series` with a recording task on an in-memory broker."""
+    broker = InMemoryBroker()
+    calls = []
+
+    async def load_series(ticker, board, series, slot_key=None, slot_token=None):
+        for item in series:
+            calls.append(("start", ticker, item["timeframe"], slot_key))
+            await asyncio.sleep(0.01)
+            calls.append(("end", ticker, item["timeframe"], slot_key))
+        return []
+
+    task = broker.register_task(load_series, task_name="load_series")
+    monkeypatch.setattr(tasks, "load_series", task)
+    return calls
+
+
+async def add_securities(n: int) -> list[Security]:
+    securities = [Security(ticker=uuid4().hex, board=uuid4().hex) for _ in range(n)]
+    async with dependencies.get_security_repository() as security_repo:
+        await security_repo.add(securities)
+    return securities
+
+
+async def clean_up(securities: list[Security]) -> None:
+    for security in securities:
+        async with dependencies.get_candle_repository() as candle_repo:
+            repo = candle_repo.filter_by_security(security)
+            await candle_repo.remove([r async for r in repo])
+        async with dependencies.get_candle_span_repository() as candle_span_repo:
+            repo = candle_span_repo.filter_by_security(security)
+            await candle_span_repo.remove([r async for r in repo])
+    async with dependencies.get_security_repository() as security_repo:
+        tickers = {security.ticker for security in securities}
+        await security_repo.remove(
+            [r async for r in security_repo if r.ticker in tickers]
+        )
+
+
+@pytest.mark.asyncio
+async def test_fan_out(redis, calls):
+    """Fresh M1 series are loaded before M10 and H1, leased series are skipped."""
+    securities = await add_securities(2)
+    tickers = {security.ticker for security in securities}
+    leased = tasks.series_key(
+        securities[1].ticker, securities[1].board, Timeframe.M10.value
+    )
+    await redis.set(leased, "other")
+
+    request = UpdateCandlesRequest(
+        time_from=Timestamp("2025-01-13"),
+        time_till=Timestamp("2025-01-14"),
+    )
+    await tasks.fan_out(request, dependencies.get_logger())
+
+    calls = [call for call in calls if call[1] in tickers]
+    assert len(calls) == 2 * 5
+    assert ("start", securities[1].ticker, Timeframe.M10.value, None) not in calls
+    m1_ends = [i for i, c in enumerate(calls) if c[2] == Timeframe.M1.value]
+    other_starts = [i for i, c in enumerate(calls) if c[2] != Timeframe.M1.value]
+    assert max(m1_ends) < min(other_starts)
+    assert await redis.get(leased) == "other"
+
+    await clean_up(securities)
+
+
+@pytest.mark.asyncio
+async def test_fan_out_backfill_slots(redis, calls):
+    """
+    Series of a security with a backfill are loaded in one subtask.
+
+    Backfills beyond free slots are left to a later run.
+    """
+    securities = await add_securities(2)
+    tickers = {security.ticker for security in securities}
+
+    request = UpdateCandlesRequest(
+        time_from=Timestamp("2025-01-01"),
+        time_till=Timestamp("2025-03-01"),
+    )
+    await tasks.fan_out(request, dependencies.get_logger())
+    await asyncio.sleep(0.1)
+
+    calls = [call for call in calls if call[1] in tickers]
+    slot = tasks.backfill_slot_key(0)
+    assert [call[0] for call in calls] == ["start", "end"] * 3
+    assert {call[1] for call in calls} == {calls[0][1]}
+    assert [call[2] for call in calls[::2]] == [tf.value for tf in Timeframe]
+    assert {call[3] for call in calls} == {slot}
+    m1_keys = [
+        tasks.series_key(security.ticker, security.board, Timeframe.M1.value)
+        for security in securities
+    ]
+    assert sum([await redis.get(key) is not None for key in m1_keys]) == 1
+
+    await clean_up(securities)
+
+
+@pytest.mark.asyncio
+async def test_fan_out_enqueue_failed(monkeypatch, redis):
+    """Series lease is released if its subtask can not be enqueued."""
+
+    class BrokenTask:
+        async def kiq(self, **kwargs):
+            raise ConnectionError("broker is not available")
+
+    monkeypatch.setattr(tasks, "load_series", BrokenTask())
+    securities = await add_securities(1)
+
+    request = UpdateCandlesRequest(
+        time_from=Timestamp("2025-01-13"),
+        time_till=Timestamp("2025-01-14"),
+    )
+    with pytest.raises(ConnectionError):
+        await tasks.fan_out(request, dependencies.get_logger())
+    assert [key for key in redis.values if securities[0].ticker in key] == []
+
+    await clean_up(securities)
+
+
+def test_collect_errors():
+    results = [
+        TimeoutError("no result"),
+        TaskiqResult(
+            is_err=True,
+            return_value=None,
+            execution_time=0,
+            error=ValueError("failed"),
+        ),
+        TaskiqResult(is_err=False, return_value=["SBER M1: error"], execution_time=0),
+        TaskiqResult(is_err=False, return_value=[], execution_time=0),
+    ]
+    assert tasks.collect_errors(results) == [
+        "TimeoutError('no result')",
+        "ValueError('failed')",
+        "SBER M1: error",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_load_series(redis):
+    """Series are loaded under their leases, a series leased by others is skipped."""
+    securities = await add_securities(1)
+    security = securities[0]
+    m10 = Lease(
+        redis,
+        tasks.series_key(security.ticker, security.board, Timeframe.M10.value),
+        tasks.SERIES_LEASE_TTL_SECONDS,
+    )
+    await m10.acquire()
+    h1_key = tasks.series_key(security.ticker, security.board, Timeframe.H1.value)
+    await redis.set(h1_key, "other")
+
+    errors = await tasks.load_series(
+        ticker=security.ticker,
+        board=security.board,
+        series=[
+            dict(
+                timeframe=tf.value,
+                time_from="2025-01-13",
+                time_till="2025-01-14",
+                lease_token=m10.token,
+            )
+            for tf in (Timeframe.M10, Timeframe.H1)
+        ],
+    )
+
+    assert errors == []
+    async with dependencies.get_candle_repository() as candle_repo:
+        repo = candle_repo.filter_by_security(security)
+        assert await repo.filter_by_timeframe(Timeframe.M10).count() == 2 * 49
+        assert await repo.filter_by_timeframe(Timeframe.H1).count() == 0
+    assert await redis.get(m10.key) is None
+    assert await redis.get(h1_key) == "other"
+
+    await clean_up(securities)
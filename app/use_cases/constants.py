@@ -0,0 +1,22 @@
+from app.core.entities import Timeframe
+
+# Minutes of the main trading session, used to estimate candles per day
+SESSION_MINUTES = 540
+
+# Requests estimated at more than BACKFILL_CANDLES candles are backfills,
+# they run in their own lane of BACKFILL_TASKS workers so that fresh updates
+# of other securities are not queued behind them
+BACKFILL_CANDLES = 20000
+BACKFILL_TASKS = 1
+
+# Order of timeframes with equal staleness, lower goes first
+TIMEFRAME_PRIORITY = {
+    Timeframe.M1: 0,
+    Timeframe.M10: 1,
+    Timeframe.H1: 2,
+}
+
+# GetCandles caches securities by (ticker, board) for SECURITY_CACHE_TTL_SECONDS,
+# so a security deleted and created again is found by its new id soon
+SECURITY_CACHE_SIZE = 1024
+SECURITY_CACHE_TTL_SECONDS = 60
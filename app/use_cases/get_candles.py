@@ -1,17 +1,43 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from datetime import datetime
+from time import monotonic
 
 from app.core.entities import Candle, Security, Timeframe, Timestamp
 from app.core.repository import ICandleRepository, ISecurityRepository
+from app.exceptions import InvalidCursorException
 from app.use_cases.base import (
     BaseUseCase,
     UseCaseRequest,
     UseCaseResponse,
 )
+from app.use_cases.constants import SECURITY_CACHE_SIZE, SECURITY_CACHE_TTL_SECONDS
+
+
+def encode_cursor(timestamp: Timestamp) -> str:
+    """Encode timestamp of the last returned candle as an opaque cursor."""
+    return urlsafe_b64encode(timestamp.dt.isoformat().encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Timestamp:
+    """Decode cursor produced by `encode_cursor`."""
+    try:
+        value = urlsafe_b64decode(cursor.encode()).decode()
+        return Timestamp(datetime.fromisoformat(value))
+    except (BinasciiError, ValueError) as e:
+        raise InvalidCursorException(f"Invalid cursor {cursor} ({e=})")
 
 
 @dataclass
 class GetCandlesRequest(UseCaseRequest):
-    """GetCandles Request."""
+    """
+    GetCandles Request.
+
+    If `cursor` is set, the page starts right after the candle the cursor
+    points to and `page_number` is ignored.
+    """
 
     ticker: str
     board: str
@@ -20,6 +46,7 @@ class GetCandlesRequest(UseCaseRequest):
     time_till: Timestamp
     page_number: int
     page_size: int
+    cursor: str | None = None
 
 
 @dataclass
@@ -28,11 +55,43 @@ class GetCandlesResponse(UseCaseResponse):
 
     result: list[Candle] | None = None
     errors: list[str] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+class SecurityCache:
+    """LRU cache of securities by (ticker, board), entries expire after `ttl`."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Security]] = (
+            OrderedDict()
+        )
+
+    def get(self, key: tuple[str, str]) -> Security | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, security = entry
+        if expires < monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return security
+
+    def put(self, key: tuple[str, str], security: Security) -> None:
+        self._entries[key] = (monotonic() + self.ttl, security)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
 
 
 class GetCandles(BaseUseCase):
     """GetCandles use case."""
 
+    # shared by requests of the process
+    _securities = SecurityCache(SECURITY_CACHE_SIZE, SECURITY_CACHE_TTL_SECONDS)
+
     def __init__(
         self,
         security_repo: ISecurityRepository,
@@ -52,17 +111,28 @@ class GetCandles(BaseUseCase):
         repo = repo.filter_by_timestamp_gte(request.time_from)
         repo = repo.filter_by_timestamp_lte(request.time_till)
 
-        idx_from = (request.page_number - 1) * request.page_size
-        idx_till = idx_from + request.page_size
-        repo = repo[idx_from, idx_till]
+        if request.cursor is not None:
+            repo = repo.filter_by_timestamp_gt(decode_cursor(request.cursor))
+            repo = repo[0, request.page_size]
+        else:
+            idx_from = (request.page_number - 1) * request.page_size
+            idx_till = idx_from + request.page_size
+            repo = repo[idx_from, idx_till]
 
         candles = [candle async for candle in repo]
-        response = GetCandlesResponse(result=candles)
+        next_cursor = None
+        if len(candles) == request.page_size:
+            next_cursor = encode_cursor(candles[-1].timestamp)
+        response = GetCandlesResponse(result=candles, next_cursor=next_cursor)
         return response
 
     async def _get_security(self, ticker: str, board: str) -> Security:
+        security = self._securities.get((ticker, board))
+        if security is not None:
+            return security
         repo = self.security_repo
         repo = repo.filter_by_board(board)
         repo = repo.filter_by_ticker(ticker)
         securities = [s async for s in repo]
+        self._securities.put((ticker, board), securities[0])
         return securities[0]
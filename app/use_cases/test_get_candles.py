@@ -0,0 +1,117 @@
+"""Tests for GetCandles use case."""
+
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.core.date_time import Timestamp
+from app.core.entities import Candle, Security, Timeframe
+from app.dependency.test import Container
+from app.exceptions import InvalidCursorException
+from app.use_cases.get_candles import (
+    GetCandles,
+    GetCandlesRequest,
+    decode_cursor,
+    encode_cursor,
+)
+
+dependencies = Container()
+
+
+async def add_candles(n: int) -> list[Candle]:
+    """Store `n` M10 candles of a new security, in time order."""
+    security = Security(ticker=uuid4().hex, board=uuid4().hex)
+    t = Timestamp("2025-01-15 10:00:00+03:00")
+    candles = [
+        Candle(
+            security=security,
+            timeframe=Timeframe.M10,
+            timestamp=Timestamp(t.dt + timedelta(minutes=10 * i)),
+            open=100 + i,
+            high=101 + i,
+            low=99 + i,
+            close=100.5 + i,
+        )
+        for i in range(n)
+    ]
+    async with dependencies.get_security_repository() as security_repo:
+        await security_repo.add([security])
+    async with dependencies.get_candle_repository() as candle_repo:
+        await candle_repo.add(candles)
+    return candles
+
+
+async def remove_candles(candles: list[Candle]) -> None:
+    security = candles[0].security
+    async with dependencies.get_candle_repository() as candle_repo:
+        await candle_repo.filter_by_security(security).remove_all()
+    async with dependencies.get_security_repository() as security_repo:
+        await security_repo.filter_by_ticker(security.ticker).remove_all()
+
+
+async def get_candles(
+    candles: list[Candle],
+    page_number: int = 1,
+    cursor: str | None = None,
+):
+    async with (
+        dependencies.get_security_repository() as security_repo,
+        dependencies.get_candle_repository() as candle_repo,
+    ):
+        use_case = GetCandles(security_repo=security_repo, candle_repo=candle_repo)
+        return await use_case.execute(
+            GetCandlesRequest(
+                ticker=candles[0].security.ticker,
+                board=candles[0].security.board,
+                timeframe=Timeframe.M10,
+                time_from=Timestamp("2025-01-15"),
+                time_till=Timestamp("2025-01-15"),
+                page_number=page_number,
+                page_size=10,
+                cursor=cursor,
+            )
+        )
+
+
+def test_cursor():
+    timestamp = Timestamp("2025-01-15 10:00:00+03:00")
+    assert decode_cursor(encode_cursor(timestamp)) == timestamp
+    with pytest.raises(InvalidCursorException):
+        decode_cursor("not a cursor")
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(encode_cursor(timestamp)[:-4])
+
+
+@pytest.mark.asyncio
+async def test_get_candles_cursor():
+    """Pages of a cursor continue one another, the last one has no cursor."""
+    candles = await add_candles(25)
+
+    pages = []
+    cursor = None
+    while True:
+        response = await get_candles(candles, cursor=cursor)
+        pages += [response.result]
+        cursor = response.next_cursor
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [c for page in pages for c in page] == candles
+    assert pages[1] == (await get_candles(candles, page_number=2)).result
+    # cursor overrides the page number
+    response = await get_candles(
+        candles, page_number=3, cursor=encode_cursor(candles[4].timestamp)
+    )
+    assert response.result == candles[5:15]
+
+    await remove_candles(candles)
+
+
+@pytest.mark.asyncio
+async def test_get_candles_invalid_cursor():
+    candles = await add_candles(1)
+    with pytest.raises(InvalidCursorException):
+        await get_candles(candles, cursor="not a cursor")
+    await remove_candles(candles)
@@ -0,0 +1,225 @@
+"""Tests for UpdateCandles use case."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+
+from app.core.date_time import Timestamp
+from app.core.entities import CandleSpan, Security, Timeframe
+from app.dependency.test import Container
+from app.market_data_loader.range_operations import Range
+from app.use_cases.load_candles import LoadCandlesRequest
+from app.use_cases.update_candles import (
+    BACKFILL,
+    FRESH,
+    UpdateCandles,
+    UpdateCandlesRequest,
+)
+
+dependencies = Container()
+
+
+class RecordingLoadCandles:
+    """Fake LoadCandles recording starts and ends, backfills take longer."""
+
+    def __init__(self, calls: list[tuple], backfill: set[Timeframe]):
+        self.calls = calls
+        self.backfill = backfill
+
+    async def execute(self, request: LoadCandlesRequest) -> None:
+        key = (request.security.ticker, request.timeframe)
+        self.calls.append(("start", *key))
+        await asyncio.sleep(0.1 if request.timeframe in self.backfill else 0.01)
+        self.calls.append(("end", *key))
+
+
+async def add_securities(n: int) -> list[Security]:
+    board = uuid4().hex
+    securities = [Security(ticker=uuid4().hex, board=board) for _ in range(n)]
+    async with dependencies.get_security_repository() as security_repo:
+        await security_repo.add(securities)
+    return securities
+
+
+async def remove_securities(securities: list[Security]) -> None:
+    for security in securities:
+        async with dependencies.get_candle_span_repository() as candle_span_repo:
+            await candle_span_repo.filter_by_security(security).remove_all()
+    async with dependencies.get_security_repository() as security_repo:
+        await security_repo.filter_by_board(securities[0].board).remove_all()
+
+
+def use_case(
+    securities: list[Security],
+    calls: list[tuple] | None = None,
+    **kwargs,
+) -> UpdateCandles:
+    """UpdateCandles over `securities` only, loading with RecordingLoadCandles."""
+
+    @asynccontextmanager
+    async def security_repo_provider():
+        async with dependencies.get_security_repository() as security_repo:
+            yield security_repo.filter_by_board(securities[0].board)
+
+    @asynccontextmanager
+    async def load_candles_provider():
+        yield RecordingLoadCandles(calls, {Timeframe.M1})
+
+    return UpdateCandles(
+        load_candles_provider=load_candles_provider,
+        security_repo_provider=security_repo_provider,
+        candle_span_repo_provider=dependencies.get_candle_span_repository,
+        logger=dependencies.get_logger(),
+        **kwargs,
+    )
+
+
+REQUEST = UpdateCandlesRequest(
+    time_from=Timestamp("2025-01-13"),
+    time_till=Timestamp("2025-01-14"),
+)
+
+
+@pytest.mark.asyncio
+async def test_plan_lanes():
+    """Requests estimated above `backfill_candles` go to the backfill lane."""
+    securities = await add_securities(2)
+
+    # 2 days: 1080 M1, 108 M10 and 18 H1 candles
+    items = await use_case(securities, backfill_candles=500).plan(REQUEST)
+
+    assert [(i.lane, i.request.timeframe, i.cost) for i in items] == [
+        (FRESH, Timeframe.M10, 108),
+        (FRESH, Timeframe.M10, 108),
+        (FRESH, Timeframe.H1, 18),
+        (FRESH, Timeframe.H1, 18),
+        (BACKFILL, Timeframe.M1, 1080),
+        (BACKFILL, Timeframe.M1, 1080),
+    ]
+    items = await use_case(securities, backfill_candles=1080).plan(REQUEST)
+    assert {i.lane for i in items} == {FRESH}
+
+    await remove_securities(securities)
+
+
+@pytest.mark.asyncio
+async def test_plan_spans():
+    """Covered days are not requested, a request spans the missing days only."""
+    securities = await add_securities(3)
+    covered, partial, new = securities
+
+    def span(security: Security, tf: Timeframe, date_from: str, date_till: str):
+        return CandleSpan(
+            security=security,
+            timeframe=tf,
+            date_from=Timestamp(date_from),
+            date_till=Timestamp(date_till),
+        )
+
+    spans = [span(covered, tf, "2025-01-01", "2025-01-31") for tf in Timeframe]
+    spans += [
+        span(partial, Timeframe.M10, "2025-01-10", "2025-01-13"),
+        span(partial, Timeframe.H1, "2025-01-13", "2025-01-13"),
+        span(partial, Timeframe.H1, "2025-01-15", "2025-01-15"),
+    ]
+    async with dependencies.get_candle_span_repository() as candle_span_repo:
+        await candle_span_repo.add(spans)
+
+    items = await use_case(securities).plan(
+        UpdateCandlesRequest(
+            time_from=Timestamp("2025-01-13"),
+            time_till=Timestamp("2025-01-16"),
+        )
+    )
+
+    items = {(i.request.security.ticker, i.request.timeframe): i for i in items}
+    assert {ticker for ticker, _ in items} == {partial.ticker, new.ticker}
+
+    def period(security: Security, tf: Timeframe) -> tuple[str, str]:
+        request = items[(security.ticker, tf)].request
+        return (str(request.time_from), str(request.time_till))
+
+    assert period(partial, Timeframe.M1) == ("2025-01-13", "2025-01-16")
+    assert period(partial, Timeframe.M10) == ("2025-01-14", "2025-01-16")
+    assert period(partial, Timeframe.H1) == ("2025-01-14", "2025-01-16")
+    for tf in Timeframe:
+        assert period(new, tf) == ("2025-01-13", "2025-01-16")
+    # the stored day in between is not counted
+    assert items[(partial.ticker, Timeframe.H1)].cost == 2 * 9
+
+    await remove_securities(securities)
+
+
+def test_work_item_priority():
+    """
+    Fresh items go most stale first, then by timeframe.
+
+    Backfills go by timeframe, then cheapest first.
+    """
+    update_candles = use_case([Security(ticker="", board="")], backfill_candles=1000)
+    security = Security(ticker="SBER", board="TQBR")
+    time_till = Timestamp("2025-01-20")
+
+    def item(timeframe: Timeframe, time_from: str, stored_till: str | None = None):
+        request = LoadCandlesRequest(
+            security=security,
+            timeframe=timeframe,
+            time_from=Timestamp(time_from),
+            time_till=time_till,
+        )
+        missing = [Range(request.time_from, time_till)]
+        stored = []
+        if stored_till is not None:
+            stored = [Range(Timestamp("2025-01-01"), Timestamp(stored_till))]
+        return update_candles._work_item(request, missing, stored)
+
+    fresh_h1_stale = item(Timeframe.H1, "2025-01-15", "2025-01-14")
+    fresh_m1 = item(Timeframe.M1, "2025-01-20", "2025-01-19")
+    fresh_m10 = item(Timeframe.M10, "2025-01-20", "2025-01-19")
+    backfill_m1_long = item(Timeframe.M1, "2025-01-10")
+    backfill_m1 = item(Timeframe.M1, "2025-01-18")
+    backfill_m10 = item(Timeframe.M10, "2024-12-01")
+
+    fresh = [fresh_m10, fresh_m1, fresh_h1_stale]
+    backfill = [backfill_m10, backfill_m1_long, backfill_m1]
+    assert {i.lane for i in fresh} == {FRESH}
+    assert {i.lane for i in backfill} == {BACKFILL}
+    assert [i.staleness for i in fresh] == [1, 1, 6]
+    assert sorted(fresh) == [fresh_h1_stale, fresh_m1, fresh_m10]
+    assert sorted(backfill) == [backfill_m1, backfill_m1_long, backfill_m10]
+
+
+@pytest.mark.asyncio
+async def test_backfill_lane():
+    """
+    Backfills run on their own workers and do not hold up fresh requests.
+
+    Lanes run at most `n_backfill_tasks` and `n_tasks` requests at once.
+    """
+    securities = await add_securities(3)
+    calls: list[tuple] = []
+
+    await use_case(
+        securities, calls, n_tasks=2, n_backfill_tasks=1, backfill_candles=500
+    ).execute(REQUEST)
+
+    backfill = [c for c in calls if c[2] == Timeframe.M1]
+    fresh = [c for c in calls if c[2] != Timeframe.M1]
+    assert len(backfill) == 2 * 3
+    assert len(fresh) == 2 * 6
+
+    def max_running(calls: list[tuple]) -> int:
+        running = [0]
+        for call in calls:
+            running += [running[-1] + (1 if call[0] == "start" else -1)]
+        return max(running)
+
+    assert max_running(backfill) == 1
+    assert max_running(fresh) == 2
+    first_backfill_end = calls.index(next(c for c in backfill if c[0] == "end"))
+    last_fresh_end = max(calls.index(c) for c in fresh if c[0] == "end")
+    assert last_fresh_end < first_backfill_end
+
+    await remove_securities(securities)
@@ -0,0 +1,34 @@
+"""Tests for VerifyResampling use case."""
+
+from uuid import uuid4
+
+import pytest
+
+from app.core.date_time import Timestamp
+from app.core.entities import Security, Timeframe
+from app.dependency.test import Container
+from app.use_cases.verify_resampling import VerifyResamplingRequest
+
+dependencies = Container()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "timeframe, n_bars", [(Timeframe.M10, 2 * 49), (Timeframe.H1, 2 * 9)]
+)
+async def test_verify_resampling(timeframe, n_bars):
+    """Bars resampled by the candle repository match bars of the source."""
+    security = Security(ticker=uuid4().hex, board=uuid4().hex)
+    async with dependencies.get_verify_resampling_use_case() as use_case:
+        response = await use_case.execute(
+            VerifyResamplingRequest(
+                security=security,
+                timeframe=timeframe,
+                time_from=Timestamp("2025-01-13"),
+                time_till=Timestamp("2025-01-14"),
+            )
+        )
+
+    report = response.result
+    assert report.n_source_bars == report.n_resampled_bars == n_bars
+    assert report.n_missing == report.n_extra == report.n_mismatched == 0
@@ -1,26 +1,40 @@
 """Update Candles use case implementation."""
 
 import asyncio
+from collections import defaultdict
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from itertools import product
+from time import monotonic
 from typing import AsyncContextManager
 
 from app.core.date_time import Timestamp
 from app.core.entities import Security, Timeframe
-from app.core.repository import ISecurityRepository
+from app.core.repository import ICandleSpanRepository, ISecurityRepository
+from app.core.resampling import TIMEFRAME_MINUTES
 from app.logger.logger import ILogger
+from app.market_data_loader.constants import TIMEZONE
+from app.market_data_loader.range_operations import Range, rangediff
 from app.use_cases.base import (
     BaseUseCase,
     UseCaseEvent,
     UseCaseRequest,
     UseCaseResponse,
 )
+from app.use_cases.constants import (
+    BACKFILL_CANDLES,
+    BACKFILL_TASKS,
+    SESSION_MINUTES,
+    TIMEFRAME_PRIORITY,
+)
 from app.use_cases.load_candles import LoadCandles, LoadCandlesRequest
 
+FRESH = "fresh"
+BACKFILL = "backfill"
+
 
-def yesterday() -> Timestamp:
-    return Timestamp.today() - 1
+def today() -> Timestamp:
+    return Timestamp(Timestamp.now(TIMEZONE).date())
 
 
 @dataclass
@@ -35,7 +49,7 @@ class UpdateCandlesRequest(UseCaseRequest):
     """UpdateCandles Request."""
 
     time_from: Timestamp = Timestamp("2024-08-01")
-    time_till: Timestamp = field(default_factory=yesterday)
+    time_till: Timestamp = field(default_factory=today)
 
 
 @dataclass
@@ -46,6 +60,18 @@ class UpdateCandlesResponse(UseCaseResponse):
     errors: list[str] = field(default_factory=list)
 
 
+@dataclass(order=True)
+class WorkItem:
+    """Queued load request, items with lower `priority` go first."""
+
+    priority: tuple
+    request: LoadCandlesRequest = field(compare=False)
+    lane: str = field(compare=False)
+    cost: int = field(compare=False)
+    staleness: int = field(compare=False)
+    enqueued: float = field(default=0.0, compare=False)
+
+
 class UpdateCandles(BaseUseCase):
     """UpdateCandles use case."""
 
@@ -53,50 +79,175 @@ class UpdateCandles(BaseUseCase):
         self,
         load_candles_provider: Callable[[], AsyncContextManager[LoadCandles]],
         security_repo_provider: Callable[[], AsyncContextManager[ISecurityRepository]],
+        candle_span_repo_provider: Callable[
+            [], AsyncContextManager[ICandleSpanRepository]
+        ],
         logger: ILogger,
         n_tasks: int = 5,
+        n_backfill_tasks: int = BACKFILL_TASKS,
+        backfill_candles: int = BACKFILL_CANDLES,
     ):
         """Initialize."""
         self.load_candles_provider = load_candles_provider
         self.security_repo_provider = security_repo_provider
+        self.candle_span_repo_provider = candle_span_repo_provider
         self.n_tasks = n_tasks
+        self.n_backfill_tasks = n_backfill_tasks
+        self.backfill_candles = backfill_candles
         self.logger = logger
 
     async def execute(self, request: UpdateCandlesRequest) -> UpdateCandlesResponse:
         """Execute."""
         async with self.security_repo_provider() as security_repo:
             securities = [security async for security in security_repo]
-        ml_requests = [
-            LoadCandlesRequest(
-                security=security,
-                timeframe=tf,
-                time_from=request.time_from,
-                time_till=request.time_till,
-            )
-            for security, tf in product(securities, Timeframe)
-        ]
-        queue = asyncio.Queue()
+        items = await self._plan(securities, request)
+        errors: list[str] = []
+        backfill = [item for item in items if item.lane == BACKFILL]
+        fresh = [item for item in items if item.lane == FRESH]
+        backfill_lane = asyncio.create_task(
+            self._dispatch(backfill, self.n_backfill_tasks, errors)
+        )
+        # M1 goes first, loaders build M10 and H1 from stored M1 candles
+        await self._dispatch(
+            [i for i in fresh if i.request.timeframe == Timeframe.M1],
+            self.n_tasks,
+            errors,
+        )
+        await self._dispatch(
+            [i for i in fresh if i.request.timeframe != Timeframe.M1],
+            self.n_tasks,
+            errors,
+        )
+        await backfill_lane
+
+        response = UpdateCandlesResponse(errors=errors)
+        event = UpdateCandlesEvent(securities=securities)
+        await self.log_event(event=event)
+        return response
+
+    async def plan(self, request: UpdateCandlesRequest) -> list[WorkItem]:
+        """Return work items in order of execution, fresh lane first."""
+        async with self.security_repo_provider() as security_repo:
+            securities = [security async for security in security_repo]
+        items = await self._plan(securities, request)
+        return sorted(items, key=lambda item: (item.lane == BACKFILL, item.priority))
+
+    async def _dispatch(self, items: list[WorkItem], n_tasks: int, errors: list[str]):
+        """Run items on `n_tasks` workers in order of priority, wait for all."""
+        queue = asyncio.PriorityQueue()
         consumers = [
-            asyncio.create_task(self._consume(queue)) for _ in range(self.n_tasks)
+            asyncio.create_task(self._consume(queue, errors)) for _ in range(n_tasks)
         ]
-        await self._produce(queue, ml_requests)
+        await self._produce(queue, items)
         await queue.join()
         for consumer in consumers:
             consumer.cancel()
 
-        response = UpdateCandlesResponse()
-        event = UpdateCandlesEvent(securities=securities)
-        await self.log_event(event=event)
-        return response
-
-    async def _consume(self, queue: asyncio.Queue):
+    async def _plan(
+        self,
+        securities: list[Security],
+        request: UpdateCandlesRequest,
+    ) -> list[WorkItem]:
+        """
+        Return work items for pairs of security and timeframe with missing days.
+
+        All candle spans are read in one query. A request covers the missing
+        periods of its pair, loaders skip the parts stored in between.
+
+        Today is never recorded in a span, so with `time_till` of today every
+        pair has a request on every run; for an up-to-date pair it loads only
+        today's candles after the latest stored one.
+        """
+        async with self.candle_span_repo_provider() as candle_span_repo:
+            spans = [span async for span in candle_span_repo]
+        stored: dict[tuple, list[Range]] = defaultdict(list)
+        for span in spans:
+            key = (span.security.id, span.timeframe)
+            stored[key] += [Range(span.date_from, span.date_till)]
+
+        items = []
+        for security, tf in product(securities, Timeframe):
+            missing = rangediff(
+                remove_what=stored[(security.id, tf)],
+                remove_from=Range(request.time_from, request.time_till),
+            )
+            if not missing:
+                continue
+            ml_request = LoadCandlesRequest(
+                security=security,
+                timeframe=tf,
+                time_from=missing[0].left,
+                time_till=missing[-1].right,
+            )
+            items += [self._work_item(ml_request, missing, stored[(security.id, tf)])]
+        self.logger.info(
+            "update_candles_planned",
+            n_pairs=len(securities) * len(Timeframe),
+            n_requests=len(items),
+            n_backfill=sum(item.lane == BACKFILL for item in items),
+        )
+        return items
+
+    def _work_item(
+        self,
+        request: LoadCandlesRequest,
+        missing: list[Range],
+        stored: list[Range],
+    ) -> WorkItem:
+        """
+        Estimate cost and staleness of a request and assign its lane.
+
+        Staleness is the number of days since the last stored day of the pair.
+        Fresh items go most stale first, backfills go cheapest first.
+        """
+        n_days = sum((r.right.date() - r.left.date()).days + 1 for r in missing)
+        cost = n_days * SESSION_MINUTES // TIMEFRAME_MINUTES[request.timeframe]
+        last = max((r.right for r in stored), default=request.time_from - 1)
+        staleness = (request.time_till.date() - last.date()).days
+        tf_priority = TIMEFRAME_PRIORITY[request.timeframe]
+        if cost > self.backfill_candles:
+            return WorkItem((tf_priority, cost), request, BACKFILL, cost, staleness)
+        return WorkItem(
+            (-staleness, tf_priority, cost), request, FRESH, cost, staleness
+        )
+
+    async def _consume(self, queue: asyncio.PriorityQueue, errors: list[str]):
         while True:
-            request = await queue.get()
-            request = request[0]
-            async with self.load_candles_provider() as load_candles_use_case:
-                await load_candles_use_case.execute(request)
-            queue.task_done()
-
-    async def _produce(self, queue: asyncio.Queue, requests: list[LoadCandlesRequest]):
-        for request in requests:
-            await queue.put((request,))
+            item: WorkItem = await queue.get()
+            request = item.request
+            started = monotonic()
+            stats = dict(
+                ticker=request.security.ticker,
+                board=request.security.board,
+                timeframe=request.timeframe.value,
+                lane=item.lane,
+                cost=item.cost,
+                staleness=item.staleness,
+                queue_wait=round(started - item.enqueued, 3),
+            )
+            try:
+                async with self.load_candles_provider() as load_candles_use_case:
+                    await load_candles_use_case.execute(request)
+            except Exception as e:
+                errors += [
+                    f"{request.security.ticker} {request.timeframe.value}: {e!r}"
+                ]
+                self.logger.error(
+                    "load_candles_failed",
+                    service_time=round(monotonic() - started, 3),
+                    error=repr(e),
+                    **stats,
+                )
+            else:
+                self.logger.info(
+                    "load_candles_done",
+                    service_time=round(monotonic() - started, 3),
+                    **stats,
+                )
+            finally:
+                queue.task_done()
+
+    async def _produce(self, queue: asyncio.PriorityQueue, items: list[WorkItem]):
+        for item in items:
+            item.enqueued = monotonic()
+            await queue.put(item)
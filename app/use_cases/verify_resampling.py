@@ -0,0 +1,191 @@
+"""Verify Resampling use case implementation."""
+
+from dataclasses import dataclass, field
+from datetime import datetime, time
+from math import isclose
+
+from app.core.date_time import Timestamp
+from app.core.entities import Candle, CandleData, Security, Timeframe
+from app.core.market_data_adapter import IMarketDataAdapter, MarketDataRequest
+from app.core.repository import ICandleRepository, ISecurityRepository
+from app.core.unit_of_work import IUnitOfWork
+from app.logger.logger import ILogger
+from app.market_data_loader.constants import TIMEZONE
+from app.use_cases.base import (
+    BaseUseCase,
+    UseCaseEvent,
+    UseCaseRequest,
+    UseCaseResponse,
+)
+
+
+@dataclass
+class ResamplingReport:
+    """Bars resampled from M1 vs. bars of the market data source."""
+
+    n_source_bars: int
+    n_resampled_bars: int
+    n_missing: int
+    n_extra: int
+    n_mismatched: int
+    mismatches: list[str] = field(default_factory=list)
+
+
+@dataclass
+class VerifyResamplingEvent(UseCaseEvent):
+    """VerifyResampling Event."""
+
+    security: Security
+    timeframe: Timeframe
+    report: ResamplingReport
+
+
+@dataclass
+class VerifyResamplingRequest(UseCaseRequest):
+    """VerifyResampling Request."""
+
+    security: Security
+    timeframe: Timeframe
+    time_from: Timestamp
+    time_till: Timestamp
+
+
+@dataclass
+class VerifyResamplingResponse(UseCaseResponse):
+    """VerifyResampling Response."""
+
+    result: ResamplingReport | None = None
+    errors: list[str] = field(default_factory=list)
+
+
+class VerifyResampling(BaseUseCase):
+    """
+    Compare bars resampled from M1 candles with bars loaded from the source.
+
+    Bars are resampled by `CandleRepository.resample`, the same code the
+    loader uses, in a transaction which is always rolled back.
+    """
+
+    max_mismatches = 10
+
+    def __init__(
+        self,
+        market_data_adapter: IMarketDataAdapter,
+        unit_of_work: IUnitOfWork,
+        security_repo: ISecurityRepository,
+        candle_repo: ICandleRepository,
+        logger: ILogger,
+    ):
+        """Initialize."""
+        self.market_data_adapter = market_data_adapter
+        self.unit_of_work = unit_of_work
+        self.security_repo = security_repo
+        self.candle_repo = candle_repo
+        self.logger = logger
+
+    async def execute(
+        self,
+        request: VerifyResamplingRequest,
+    ) -> VerifyResamplingResponse:
+        """Execute."""
+        m1 = await self._load(request, Timeframe.M1)
+        bars = await self._load(request, request.timeframe)
+        try:
+            resampled = {c.timestamp: c for c in await self._resample(request, m1)}
+        finally:
+            await self.unit_of_work.rollback()
+        expected = {c.timestamp: c for c in bars}
+
+        mismatches = [
+            f"{t}: {self._ohlc(expected[t])} != {self._ohlc(resampled[t])}"
+            for t in sorted(expected.keys() & resampled.keys(), key=lambda t: t.dt)
+            if not self._match(expected[t], resampled[t])
+        ]
+        report = ResamplingReport(
+            n_source_bars=len(expected),
+            n_resampled_bars=len(resampled),
+            n_missing=len(expected.keys() - resampled.keys()),
+            n_extra=len(resampled.keys() - expected.keys()),
+            n_mismatched=len(mismatches),
+            mismatches=mismatches[: self.max_mismatches],
+        )
+        event = VerifyResamplingEvent(
+            security=request.security,
+            timeframe=request.timeframe,
+            report=report,
+        )
+        await self.log_event(event=event)
+        return VerifyResamplingResponse(result=report)
+
+    async def _load(
+        self,
+        request: VerifyResamplingRequest,
+        timeframe: Timeframe,
+    ) -> list[CandleData]:
+        md_request = MarketDataRequest(
+            security=request.security,
+            timeframe=timeframe,
+            time_from=request.time_from,
+            time_till=request.time_till,
+        )
+        return await self.market_data_adapter.load(md_request)
+
+    async def _resample(
+        self,
+        request: VerifyResamplingRequest,
+        m1: list[CandleData],
+    ) -> list[Candle]:
+        """
+        Store `m1` in place of stored candles and resample them in the repository.
+
+        Must run in a transaction rolled back afterwards.
+        """
+        security = await self._get_security(request.security)
+        time_from = self._day_start(request.time_from)
+        time_till = self._day_start(request.time_till + 1)
+        for timeframe in (Timeframe.M1, request.timeframe):
+            await self.candle_repo.remove(
+                await self._stored(security, timeframe, time_from, time_till)
+            )
+        await self.candle_repo.add(
+            [Candle(**{**c.__dict__, "security": security}) for c in m1]
+        )
+        await self.candle_repo.resample(
+            security, Timeframe.M1, request.timeframe, time_from, time_till
+        )
+        return await self._stored(security, request.timeframe, time_from, time_till)
+
+    async def _get_security(self, security: Security) -> Security:
+        repo = self.security_repo.filter_by_ticker(security.ticker).filter_by_board(
+            security.board
+        )
+        async for stored in repo:
+            return stored
+        security = Security(ticker=security.ticker, board=security.board)
+        await self.security_repo.add([security])
+        return security
+
+    async def _stored(
+        self,
+        security: Security,
+        timeframe: Timeframe,
+        time_from: Timestamp,
+        time_till: Timestamp,
+    ) -> list[Candle]:
+        repo = (
+            self.candle_repo.filter_by_security(security)
+            .filter_by_timeframe(timeframe)
+            .filter_by_timestamp_gte(time_from)
+        )
+        return [c async for c in repo if c.timestamp.dt < time_till.dt]
+
+    def _day_start(self, day: Timestamp) -> Timestamp:
+        return Timestamp(datetime.combine(day.date(), time()), TIMEZONE)
+
+    def _ohlc(self, candle: CandleData) -> tuple[float, float, float, float]:
+        return (candle.open, candle.high, candle.low, candle.close)
+
+    def _match(self, a: CandleData, b: CandleData) -> bool:
+        return all(
+            isclose(x, y, rel_tol=1e-9) for x, y in zip(self._ohlc(a), self._ohlc(b))
+        )
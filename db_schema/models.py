@@ -2,7 +2,7 @@ from datetime import datetime, date
 import uuid
 
 from sqlalchemy import ForeignKey, Index
-from sqlalchemy import UUID, BIGINT, TIMESTAMP
+from sqlalchemy import UUID, BIGINT, SMALLINT, TIMESTAMP
 
 # from sqlalchemy.ext.asyncio import AsyncAttrs
 
@@ -28,11 +28,13 @@ class Security(Base):
 
 class Candle(Base):
     __tablename__ = "candle"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
-    id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
-    security_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("security.id"))
-    timeframe: Mapped[str]
-    timestamp: Mapped[datetime]
+    security_id: Mapped[uuid.UUID] = mapped_column(
+        UUID, ForeignKey("security.id"), primary_key=True
+    )
+    timeframe: Mapped[int] = mapped_column(SMALLINT, primary_key=True)
+    timestamp: Mapped[datetime] = mapped_column(primary_key=True)
     open: Mapped[float]
     high: Mapped[float]
     low: Mapped[float]
@@ -55,12 +57,3 @@ Index(
     Security.board,
     unique=True,
 )
-
-
-Index(
-    "idx_candle_unique",
-    Candle.security_id,
-    Candle.timeframe,
-    Candle.timestamp,
-    unique=True,
-)
@@ -0,0 +1,145 @@
+"""candle_partitioning
+
+Revision ID: 07f19a143985
+Revises: 63da74ca4f93
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "07f19a143985"
+down_revision: Union[str, None] = "63da74ca4f93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Creates monthly partitions candle_pYYYY_MM covering [date_from, date_till].
+# Rows that already landed in the default partition are moved to the new one.
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION candle_create_partitions(date_from date, date_till date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamptz :=
+        date_trunc('month', date_from)::timestamp AT TIME ZONE 'UTC';
+    month_end timestamptz;
+    partition_name text;
+    n_created integer := 0;
+BEGIN
+    WHILE month_start <= date_till::timestamp AT TIME ZONE 'UTC' LOOP
+        month_end :=
+            ((month_start AT TIME ZONE 'UTC') + interval '1 month') AT TIME ZONE 'UTC';
+        partition_name := format(
+            'candle_p%s', to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM')
+        );
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE candle INCLUDING DEFAULTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'WITH moved AS ('
+                '    DELETE FROM candle_default'
+                '    WHERE timestamp >= %L AND timestamp < %L RETURNING *'
+                ') INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE candle ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+            n_created := n_created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN n_created;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    op.rename_table("candle", "candle_unpartitioned")
+    op.drop_index("idx_candle_unique", table_name="candle_unpartitioned")
+    op.drop_constraint("candle_pkey", "candle_unpartitioned", type_="primary")
+    op.drop_constraint(
+        "candle_security_id_fkey", "candle_unpartitioned", type_="foreignkey"
+    )
+
+    op.create_table(
+        "candle",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("security_id", sa.UUID(), nullable=False),
+        sa.Column("timeframe", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("open", sa.Float(), nullable=False),
+        sa.Column("high", sa.Float(), nullable=False),
+        sa.Column("low", sa.Float(), nullable=False),
+        sa.Column("close", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["security_id"],
+            ["security.id"],
+        ),
+        sa.PrimaryKeyConstraint("id", "timestamp", name="candle_pkey"),
+        postgresql_partition_by="RANGE (timestamp)",
+    )
+    op.create_index(
+        "idx_candle_unique",
+        "candle",
+        ["security_id", "timeframe", "timestamp"],
+        unique=True,
+    )
+    op.execute("CREATE TABLE candle_default PARTITION OF candle DEFAULT")
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+    op.execute(
+        "SELECT candle_create_partitions("
+        "    LEAST("
+        "        (SELECT min(timestamp) FROM candle_unpartitioned)::date,"
+        "        current_date"
+        "    ),"
+        "    (current_date + interval '3 months')::date"
+        ")"
+    )
+    op.execute("INSERT INTO candle SELECT * FROM candle_unpartitioned")
+    op.drop_table("candle_unpartitioned")
+
+
+def downgrade() -> None:
+    op.rename_table("candle", "candle_partitioned")
+    op.drop_index("idx_candle_unique", table_name="candle_partitioned")
+    op.drop_constraint("candle_pkey", "candle_partitioned", type_="primary")
+    op.drop_constraint(
+        "candle_security_id_fkey", "candle_partitioned", type_="foreignkey"
+    )
+
+    op.create_table(
+        "candle",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("security_id", sa.UUID(), nullable=False),
+        sa.Column("timeframe", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("open", sa.Float(), nullable=False),
+        sa.Column("high", sa.Float(), nullable=False),
+        sa.Column("low", sa.Float(), nullable=False),
+        sa.Column("close", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["security_id"],
+            ["security.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_candle_unique",
+        "candle",
+        ["security_id", "timeframe", "timestamp"],
+        unique=True,
+    )
+    op.execute("INSERT INTO candle SELECT * FROM candle_partitioned")
+    op.execute("DROP TABLE candle_partitioned CASCADE")
+    op.execute("DROP FUNCTION candle_create_partitions(date, date)")
@@ -0,0 +1,66 @@
+"""candle_natural_key
+
+Revision ID: f11e768bad0f
+Revises: 07f19a143985
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f11e768bad0f"
+down_revision: Union[str, None] = "07f19a143985"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Timeframe is stored as candle duration in minutes.
+TIMEFRAME_TO_CODE = (
+    "CASE timeframe WHEN 'M1' THEN 1 WHEN 'M10' THEN 10 WHEN 'H1' THEN 60 END"
+)
+CODE_TO_TIMEFRAME = (
+    "CASE timeframe WHEN 1 THEN 'M1' WHEN 10 THEN 'M10' WHEN 60 THEN 'H1' END"
+)
+
+
+def upgrade() -> None:
+    op.drop_index("idx_candle_unique", table_name="candle")
+    op.drop_constraint("candle_pkey", "candle", type_="primary")
+    op.drop_column("candle", "id")
+    op.alter_column(
+        "candle",
+        "timeframe",
+        type_=sa.SmallInteger(),
+        postgresql_using=TIMEFRAME_TO_CODE,
+    )
+    op.create_primary_key(
+        "candle_pkey", "candle", ["security_id", "timeframe", "timestamp"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("candle_pkey", "candle", type_="primary")
+    op.alter_column(
+        "candle",
+        "timeframe",
+        type_=sa.String(),
+        postgresql_using=CODE_TO_TIMEFRAME,
+    )
+    op.add_column(
+        "candle",
+        sa.Column(
+            "id", sa.Uuid(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+    )
+    op.alter_column("candle", "id", server_default=None)
+    op.create_primary_key("candle_pkey", "candle", ["id", "timestamp"])
+    op.create_index(
+        "idx_candle_unique",
+        "candle",
+        ["security_id", "timeframe", "timestamp"],
+        unique=True,
+    )